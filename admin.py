@@ -1,12 +1,24 @@
-import sys
 from PyQt5.QtWidgets import (
-    QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
-    QPushButton, QTableWidget, QTableWidgetItem, QComboBox, QListWidget, QFrame, QMessageBox, QListWidgetItem
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
+    QPushButton, QTableView, QAbstractItemView, QComboBox, QFrame, QMessageBox, QFileDialog
 )
-from PyQt5.QtGui import QFont, QPixmap, QPalette, QBrush
-from PyQt5.QtCore import Qt
-import sqlite3
-from logging import LoggingWindow
+from PyQt5.QtGui import QFont
+from PyQt5.QtCore import Qt, QTimer
+from login import LoggingWindow
+from database import get_db
+from insights import DATE_RANGE_PRESETS, resolve_date_range
+from change_feed import LOW_STOCK_THRESHOLD
+from menu_import import apply_import, plan_import, read_records
+from menu_notifier import get_menu_notifier
+from table_models import QueryTableModel, SearchFilterProxyModel
+from db_worker import QueryExecutor
+from instrumentation import is_enabled, timed
+from metrics_overlay import MetricsOverlay
+from services import get_service
+from navigation import LOGIN_SCREEN, apply_background, get_window_stack
+
+COMMENT_PAGE_SIZE = 50
+COMMENT_SEARCH_DELAY_MS = 200
 
 
 class AdminHome(QWidget):
@@ -15,13 +27,11 @@ class AdminHome(QWidget):
         self.username = username
         self.setWindowTitle("Admin Home")
         self.setFixedSize(1400, 900)
+        self.executor = QueryExecutor(self)
 
         # Background setup
         self.setAutoFillBackground(True)
-        palette = QPalette()
-        pixmap = QPixmap("bg.jpg").scaled(self.size(), Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
-        palette.setBrush(QPalette.Window, QBrush(pixmap))
-        self.setPalette(palette)
+        apply_background(self)
 
         main_layout = QHBoxLayout()
         left_layout = QVBoxLayout()
@@ -36,7 +46,10 @@ class AdminHome(QWidget):
         self.price_input.setPlaceholderText("Item Price")
 
         self.quantity_input = QLineEdit()
-        self.quantity_input.setPlaceholderText("Item Quantity")
+        self.quantity_input.setPlaceholderText("Quantity to Add")
+
+        self.category_input = QLineEdit()
+        self.category_input.setPlaceholderText("Item Category (optional)")
 
         add_button = QPushButton("Add Item")
         add_button.clicked.connect(self.add_item)
@@ -45,16 +58,35 @@ class AdminHome(QWidget):
         add_layout.addWidget(self.name_input)
         add_layout.addWidget(self.price_input)
         add_layout.addWidget(self.quantity_input)
-        add_layout.addWidget(add_button)
+        add_layout.addWidget(self.category_input)
+        import_button = QPushButton("Import Menu...")
+        import_button.clicked.connect(self.import_menu)
+        import_button.setStyleSheet("background-color: white; color: black; font-weight: bold;")
+        add_buttons = QHBoxLayout()
+        add_buttons.addWidget(add_button)
+        add_buttons.addWidget(import_button)
+        add_layout.addLayout(add_buttons)
 
         # Menu Table
         menu_label = QLabel("Menu")
         menu_label.setStyleSheet("color: white; font-size: 18px; font-weight: bold;")
-        self.menu_table = QTableWidget()
-        self.menu_table.setColumnCount(3)
-        self.menu_table.setHorizontalHeaderLabels(["Item", "Price", "Quantity"])
+        self.menu_model = QueryTableModel(["Item", "Price", "Quantity"], get_db().get_menu_page, executor=self.executor)
+        self.menu_model.loadingChanged.connect(
+            lambda loading: menu_label.setText("Menu (loading...)" if loading else "Menu")
+        )
+        self.menu_proxy = SearchFilterProxyModel()
+        self.menu_proxy.setSourceModel(self.menu_model)
+        self.menu_search = QLineEdit()
+        self.menu_search.setPlaceholderText("Search menu...")
+        self.menu_search.setClearButtonEnabled(True)
+        self.menu_search.textChanged.connect(self.menu_proxy.set_query)
+        self.menu_table = QTableView()
+        self.menu_table.setModel(self.menu_proxy)
+        # Clicking a row loads it into the form for editing
+        self.menu_table.clicked.connect(self.fill_item_form)
+        self.menu_table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.menu_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: rgba(255, 255, 255, 140);
             }
             QHeaderView::section {
@@ -63,10 +95,25 @@ class AdminHome(QWidget):
             }
         """)
 
+        # Filled by the change feed as soon as any terminal takes an item to low stock
+        self.low_stock = {}
+        self.low_stock_label = QLabel()
+        self.low_stock_label.setWordWrap(True)
+        self.low_stock_label.setStyleSheet(
+            "background-color: rgba(180, 40, 40, 200); color: white; font-weight: bold; padding: 4px;"
+        )
+        self.low_stock_label.hide()
+
         left_layout.addLayout(add_layout)
+        left_layout.addWidget(self.low_stock_label)
         left_layout.addWidget(menu_label)
+        left_layout.addWidget(self.menu_search)
         left_layout.addWidget(self.menu_table)
         self.load_menu_items()
+        notifier = get_menu_notifier()
+        notifier.menuChanged.connect(self.apply_menu_changes)
+        notifier.lowStock.connect(self.show_low_stock)
+        notifier.resyncNeeded.connect(self.load_menu_items)
 
         # Separator
         separator = QFrame()
@@ -77,11 +124,26 @@ class AdminHome(QWidget):
         # Sales Table
         sales_label = QLabel("Sales")
         sales_label.setStyleSheet("color: white; font-size: 18px; font-weight: bold;")
-        self.sales_table = QTableWidget()
-        self.sales_table.setColumnCount(3)
-        self.sales_table.setHorizontalHeaderLabels(["Item", "Price", "Quantity"])
+        self.sales_range = (None, None)
+        self.sales_range_combo = QComboBox()
+        self.sales_range_combo.addItems(DATE_RANGE_PRESETS)
+        self.sales_range_combo.currentTextChanged.connect(self.change_sales_range)
+        sales_header = QHBoxLayout()
+        sales_header.addWidget(sales_label)
+        sales_header.addStretch()
+        sales_header.addWidget(self.sales_range_combo)
+        self.sales_model = QueryTableModel(
+            ["Item", "Price", "Quantity", "Sold At"], self.fetch_sales_page,
+            formatters={1: lambda price: f"${price:.2f}"}, executor=self.executor,
+        )
+        self.sales_model.loadingChanged.connect(
+            lambda loading: sales_label.setText("Sales (loading...)" if loading else "Sales")
+        )
+        self.sales_table = QTableView()
+        self.sales_table.setModel(self.sales_model)
+        self.sales_table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.sales_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: rgba(255, 255, 255, 140);
             }
             QHeaderView::section {
@@ -90,23 +152,59 @@ class AdminHome(QWidget):
             }
         """)
 
-        self.total_label = QLabel("Total Sales: $0.00")
+        self.total_label = QLabel("Total Sales: loading...")
         self.total_label.setStyleSheet("color: white; font-weight: bold; font-size: 16px;")
 
         # Comments
         comments_label = QLabel("Customer Comments")
         comments_label.setStyleSheet("color: white; font-size: 18px; font-weight: bold;")
-        self.comments_list = QListWidget()
-        self.comments_list.setFixedHeight(150)
-        self.comments_list.setStyleSheet("background-color: rgba(255, 255, 255, 140);")
+        self.comments_query = ""
+        self.comments_search = QLineEdit()
+        self.comments_search.setPlaceholderText("Search comments...")
+        self.comments_search.setClearButtonEnabled(True)
+        # Wait for a pause in typing before querying the full-text index
+        self.comments_search_timer = QTimer(self)
+        self.comments_search_timer.setSingleShot(True)
+        self.comments_search_timer.setInterval(COMMENT_SEARCH_DELAY_MS)
+        self.comments_search_timer.timeout.connect(self.search_comments)
+        self.comments_search.textChanged.connect(self.comments_search_timer.start)
+        comments_header = QHBoxLayout()
+        comments_header.addWidget(comments_label)
+        comments_header.addStretch()
+        comments_header.addWidget(self.comments_search)
+        # Pages of comments are read newest first as the list scrolls
+        self.comments_model = QueryTableModel(
+            ["When", "Author", "Comment"], self.fetch_comments_page,
+            page_size=COMMENT_PAGE_SIZE, executor=self.executor,
+        )
+        self.comments_model.loadingChanged.connect(
+            lambda loading: comments_label.setText(
+                "Customer Comments (loading...)" if loading else "Customer Comments"
+            )
+        )
+        self.comments_table = QTableView()
+        self.comments_table.setModel(self.comments_model)
+        self.comments_table.setFixedHeight(150)
+        self.comments_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.comments_table.verticalHeader().setVisible(False)
+        self.comments_table.horizontalHeader().setStretchLastSection(True)
+        self.comments_table.setStyleSheet("""
+            QTableView {
+                background-color: rgba(255, 255, 255, 140);
+            }
+            QHeaderView::section {
+                background-color: grey;
+                font-weight: bold;
+            }
+        """)
         self.load_comments()
 
         # Right Layout
-        right_layout.addWidget(sales_label)
+        right_layout.addLayout(sales_header)
         right_layout.addWidget(self.sales_table)
         right_layout.addWidget(self.total_label)
-        right_layout.addWidget(comments_label)
-        right_layout.addWidget(self.comments_list)
+        right_layout.addLayout(comments_header)
+        right_layout.addWidget(self.comments_table)
 
         button_layout = QHBoxLayout()
 
@@ -120,6 +218,15 @@ class AdminHome(QWidget):
         logout_btn.setFixedWidth(100)
         logout_btn.clicked.connect(self.logout)
 
+        # Live latency panel, only offered when instrumentation is recording
+        if is_enabled():
+            self.metrics_overlay = MetricsOverlay(self)
+            metrics_btn = QPushButton("Latency")
+            metrics_btn.setStyleSheet("background-color: white; color: black; font-weight: bold; padding: 6px;")
+            metrics_btn.setFixedWidth(100)
+            metrics_btn.clicked.connect(self.metrics_overlay.toggle)
+            button_layout.addWidget(metrics_btn)
+
         button_layout.addWidget(show_insights_btn)
         button_layout.addWidget(logout_btn)
         button_layout.setAlignment(Qt.AlignRight)
@@ -147,20 +254,40 @@ class AdminHome(QWidget):
         self.update_sales_table()
 
     def get_menu(self):
-        conn = sqlite3.connect("restaurant.db")
-        c = conn.cursor()
-        c.execute("SELECT item_name, price, quantity FROM menu")
-        items = c.fetchall()
-        conn.close()
-        return items
+        return get_db().get_menu()
 
     def load_menu_items(self):
-        items = self.get_menu()
-        self.menu_table.setRowCount(len(items))
-        for row_idx, (name, price, quantity) in enumerate(items):
-            self.menu_table.setItem(row_idx, 0, QTableWidgetItem(str(name)))
-            self.menu_table.setItem(row_idx, 1, QTableWidgetItem(str(price)))
-            self.menu_table.setItem(row_idx, 2, QTableWidgetItem(str(quantity)))
+        self.menu_model.refresh()
+
+    def apply_menu_changes(self, changes):
+        self.menu_model.patch_rows(
+            {change.menu_id: (change.item_name, change.price, change.quantity)
+             for change in changes if change.op != "delete"},
+            [change.menu_id for change in changes if change.op == "delete"],
+        )
+        # Restocked or removed items drop out of the low-stock banner
+        for change in changes:
+            if change.op == "delete" or change.quantity > LOW_STOCK_THRESHOLD:
+                self.low_stock.pop(change.item_name, None)
+        self.update_low_stock_label()
+
+    def show_low_stock(self, changes):
+        for change in changes:
+            self.low_stock[change.item_name] = change.quantity
+        self.update_low_stock_label()
+
+    def update_low_stock_label(self):
+        self.low_stock_label.setVisible(bool(self.low_stock))
+        self.low_stock_label.setText("⚠️ Low stock: " + ", ".join(
+            f"{name} ({quantity} left)" for name, quantity in sorted(self.low_stock.items())
+        ))
+
+    def fill_item_form(self, index):
+        item_name, price, _ = self.menu_model.row_values(self.menu_proxy.mapToSource(index).row())
+        self.name_input.setText(item_name)
+        self.price_input.setText(f"{price:g}")
+        # The quantity is added to stock on save, so editing a price must not resend the current stock
+        self.quantity_input.setText("0")
 
     def add_item(self):
         item_name = self.name_input.text().strip()
@@ -175,86 +302,125 @@ class AdminHome(QWidget):
             QMessageBox.warning(self, "Input Error", "Item name cannot be empty.")
             return
 
-        with sqlite3.connect("restaurant.db") as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT price, quantity FROM menu WHERE LOWER(item_name) = LOWER(?)", (item_name,))
-            result = cursor.fetchone()
-
-            if result:
-                cursor.execute("""
-                    UPDATE menu
-                    SET price    = ?,
-                        quantity = quantity + ?
-                    WHERE LOWER(item_name) = LOWER(?)
-                """, (price, quantity, item_name))
-            else:
-                cursor.execute("""
-                    INSERT INTO menu (item_name, price, quantity)
-                    VALUES (?, ?, ?)
-                """, (item_name, price, quantity))
-
-            conn.commit()
+        category = self.category_input.text().strip() or None
+        self.executor.submit(
+            None, get_db().upsert_menu_item, item_name, price, quantity, category,
+            on_result=lambda _: self.item_added(),
+            on_error=lambda e: QMessageBox.warning(self, "Database Error", f"Could not save item: {e}"),
+        )
 
-        self.load_menu_items()
+    def item_added(self):
+        # The change feed patches the menu row; poll now rather than at the next tick
+        get_menu_notifier().poll_now()
         self.name_input.clear()
         self.price_input.clear()
         self.quantity_input.clear()
+        self.category_input.clear()
         QMessageBox.information(self, "Success", "Item added or updated successfully.")
 
+    def import_menu(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Import Menu", "", "Menu files (*.csv *.json *.jsonl);;All files (*)"
+        )
+        if not path:
+            return
+        box = QMessageBox(self)
+        box.setWindowTitle("Import Menu")
+        box.setText("Add the file's quantities to current stock, or replace stock with them?")
+        add_button = box.addButton("Add to Stock", QMessageBox.AcceptRole)
+        replace_button = box.addButton("Replace Stock", QMessageBox.AcceptRole)
+        box.addButton(QMessageBox.Cancel)
+        box.exec_()
+        if box.clickedButton() not in (add_button, replace_button):
+            return
+        add_stock = box.clickedButton() is add_button
+        # Validation and the diff run on the worker; nothing is written until the preview is confirmed
+        self.executor.submit(
+            None, lambda: plan_import(get_db(), read_records(path), add_stock),
+            on_result=self.preview_import,
+            on_error=lambda e: QMessageBox.warning(self, "Import Error", f"Could not read {path}: {e}"),
+        )
+
+    def preview_import(self, plan):
+        details = "\n".join(plan.describe(limit=200))
+        if plan.errors:
+            box = QMessageBox(QMessageBox.Warning, "Import Error",
+                              f"Nothing was imported: fix the invalid rows first.\n\n{plan.summary()}",
+                              QMessageBox.Ok, self)
+            box.setDetailedText(details)
+            box.exec_()
+            return
+        if plan.count("new") + plan.count("updated") == 0:
+            QMessageBox.information(self, "Import Menu", f"The menu already matches the file ({plan.summary()}).")
+            return
+        box = QMessageBox(QMessageBox.Question, "Import Menu", f"Apply these changes?\n\n{plan.summary()}",
+                          QMessageBox.Yes | QMessageBox.No, self)
+        box.setDetailedText(details)
+        if box.exec_() != QMessageBox.Yes:
+            return
+        self.executor.submit(
+            None, apply_import, get_db(), plan,
+            on_result=self.menu_imported,
+            on_error=lambda e: QMessageBox.warning(self, "Database Error", f"Import failed, nothing was saved: {e}"),
+        )
+
+    def menu_imported(self, written):
+        # The feed delivers the import as one batch of patches, or one reload when it is large
+        get_menu_notifier().poll_now()
+        QMessageBox.information(self, "Import Menu", f"Imported {written} menu item(s).")
+
     def get_sales(self):
-        conn = sqlite3.connect("restaurant.db")
-        c = conn.cursor()
-        c.execute("SELECT item_name, price, quantity FROM sales")
-        sales = c.fetchall()
-        conn.close()
-        return sales
+        return get_db().get_sales()
+
+    def fetch_sales_page(self, before_id, limit):
+        return get_db().get_sales_page(before_id, limit, *self.sales_range)
 
     def get_total_sales(self):
-        conn = sqlite3.connect("restaurant.db")
-        c = conn.cursor()
-        c.execute("SELECT SUM(price * quantity) FROM sales")
-        total = c.fetchone()[0]
-        conn.close()
-        return total or 0.0
+        return get_service().total_sales(*self.sales_range)
 
+    def change_sales_range(self, preset):
+        self.sales_range = resolve_date_range(preset)
+        # The rows paged in so far belong to the old range
+        self.sales_model.reload()
+        self.update_sales_total()
+
+    @timed("op", "update_sales_table")
     def update_sales_table(self):
-        sales = self.get_sales()
-        self.sales_table.setRowCount(len(sales))
-        for row_idx, (item, price, quantity) in enumerate(sales):
-            self.sales_table.setItem(row_idx, 0, QTableWidgetItem(str(item)))
-            self.sales_table.setItem(row_idx, 1, QTableWidgetItem(f"${price:.2f}"))
-            self.sales_table.setItem(row_idx, 2, QTableWidgetItem(str(quantity)))
-        total = self.get_total_sales()
-        self.total_label.setText(f"Total Sales: ${total:.2f}")
+        self.sales_model.refresh()
+        self.update_sales_total()
+
+    def update_sales_total(self):
+        self.executor.submit(
+            "total_sales", self.get_total_sales,
+            on_result=lambda total: self.total_label.setText(f"Total Sales: ${total:.2f}"),
+        )
 
     def load_comments(self):
-        comments = self.get_comments()
-        for comment in comments:
-            item = QListWidgetItem(comment)
-            self.comments_list.addItem(item)
-
-    def get_comments(self):
-        conn = sqlite3.connect("restaurant.db")
-        c = conn.cursor()
-        c.execute("SELECT comment FROM comments")
-        comments = [row[0] for row in c.fetchall()]
-        conn.close()
-        return comments
+        self.comments_model.refresh()
+
+    def fetch_comments_page(self, before_id, limit):
+        return get_service().comments(before_id, limit, self.comments_query or None)
+
+    def search_comments(self):
+        query = self.comments_search.text().strip()
+        if query != self.comments_query:
+            self.comments_query = query
+            self.comments_model.reload()
+
+    def closeEvent(self, event):
+        self.executor.cancel_all()
+        super().closeEvent(event)
+
+    def screen_shown(self):
+        # The menu is kept current by the change feed even while this screen is hidden
+        self.update_sales_table()
+        self.load_comments()
 
     def open_insights(self):
         from features import InsightsPage
-        self.insights_window = InsightsPage(self.username)
-        self.insights_window.show()
-        self.close()
+        self.insights_window = get_window_stack().show_screen(
+            ("insights", self.username), lambda: InsightsPage(self.username)
+        )
 
     def logout(self):
-        self.login_window = LoggingWindow()
-        self.login_window.show()
-        self.close()
-
-
-if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = AdminHome("admin_user")  # Test with fake username
-    window.show()
-    sys.exit(app.exec_())
+        self.login_window = get_window_stack().reset(LOGIN_SCREEN, LoggingWindow)
@@ -0,0 +1,168 @@
+"""Rebuild or verify the trigger-maintained sales aggregates and basket counts against the raw sales table.
+
+    python aggregates.py --verify
+    python aggregates.py --rebuild
+"""
+import argparse
+import sys
+
+from database import DB_PATH, Database
+from migrations import BASKET_BACKFILL
+
+# Revenue is accumulated as REAL, so allow for rounding drift
+TOLERANCE = 0.005
+# Rollup table -> bucket expression over sales.sold_at (see migrations.SALES_LEDGER)
+ROLLUPS = {
+    "sales_daily": "substr(sold_at, 1, 10)",
+    "sales_monthly": "substr(sold_at, 1, 7)",
+}
+
+
+def rebuild(conn):
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("DELETE FROM sales_item_totals")
+        conn.execute("""
+            INSERT INTO sales_item_totals (item_name, quantity, revenue)
+            SELECT item_name, SUM(quantity), SUM(price * quantity) FROM sales GROUP BY item_name
+        """)
+        conn.execute("""
+            INSERT OR REPLACE INTO sales_summary (id, total_quantity, total_revenue)
+            SELECT 1, COALESCE(SUM(quantity), 0), COALESCE(SUM(price * quantity), 0) FROM sales
+        """)
+        for table, bucket in ROLLUPS.items():
+            conn.execute(f"DELETE FROM {table}")
+            conn.execute(f"""
+                INSERT INTO {table} (bucket, item_name, quantity, revenue)
+                SELECT {bucket}, item_name, SUM(quantity), SUM(price * quantity)
+                FROM sales WHERE sold_at IS NOT NULL GROUP BY 1, item_name
+            """)
+        for statement in BASKET_BACKFILL:
+            conn.execute(statement)
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def verify(conn, tolerance=TOLERANCE):
+    """Return a list of human-readable mismatches; empty when the aggregates are correct."""
+    # One read transaction so a concurrent checkout can't show up as a false mismatch
+    conn.execute("BEGIN")
+    try:
+        expected = {
+            name: (qty, revenue) for name, qty, revenue in conn.execute(
+                "SELECT item_name, SUM(quantity), SUM(price * quantity) FROM sales GROUP BY item_name"
+            )
+        }
+        stored = {
+            name: (qty, revenue) for name, qty, revenue in conn.execute(
+                "SELECT item_name, quantity, revenue FROM sales_item_totals"
+            )
+        }
+        summary = conn.execute(
+            "SELECT total_quantity, total_revenue FROM sales_summary WHERE id = 1"
+        ).fetchone() or (0, 0.0)
+        rollups = {
+            table: (
+                {
+                    (day, name): (qty, revenue) for day, name, qty, revenue in conn.execute(f"""
+                        SELECT {bucket}, item_name, SUM(quantity), SUM(price * quantity)
+                        FROM sales WHERE sold_at IS NOT NULL GROUP BY 1, item_name
+                    """)
+                },
+                {
+                    (day, name): (qty, revenue) for day, name, qty, revenue in conn.execute(
+                        f"SELECT bucket, item_name, quantity, revenue FROM {table}"
+                    )
+                },
+            )
+            for table, bucket in ROLLUPS.items()
+        }
+        baskets = _basket_counts(conn)
+    finally:
+        conn.execute("COMMIT")
+
+    problems = _compare(expected, stored, tolerance, lambda name: name)
+    for table, (exp_rows, got_rows) in rollups.items():
+        problems.extend(_compare(exp_rows, got_rows, tolerance, lambda key, t=table: f"{t} {key[0]} {key[1]}"))
+    exp_qty = sum(qty for qty, _ in expected.values())
+    exp_rev = sum(revenue for _, revenue in expected.values())
+    if summary[0] != exp_qty or abs(summary[1] - exp_rev) > tolerance:
+        problems.append(
+            f"grand total: expected qty={exp_qty} revenue={exp_rev:.2f}, "
+            f"stored qty={summary[0]} revenue={summary[1]:.2f}"
+        )
+    for label, (exp_counts, got_counts) in baskets.items():
+        for key in sorted(set(exp_counts) | set(got_counts)):
+            if exp_counts.get(key, 0) != got_counts.get(key, 0):
+                problems.append(
+                    f"{label} {key}: expected {exp_counts.get(key, 0)} orders, stored {got_counts.get(key, 0)}"
+                )
+    return problems
+
+
+def _basket_counts(conn):
+    """{label: (expected, stored)} order counts for the basket tables."""
+    lines = "(SELECT DISTINCT order_id, item_name FROM sales WHERE order_id IS NOT NULL)"
+    return {
+        "baskets": (
+            {"all": conn.execute(
+                "SELECT COUNT(DISTINCT order_id) FROM sales WHERE order_id IS NOT NULL"
+            ).fetchone()[0]},
+            dict(conn.execute("SELECT 'all', baskets FROM basket_summary WHERE id = 1")),
+        ),
+        "basket_items": (
+            dict(conn.execute(f"SELECT item_name, COUNT(*) FROM {lines} GROUP BY item_name")),
+            dict(conn.execute("SELECT item_name, baskets FROM basket_items")),
+        ),
+        "basket_pairs": (
+            {
+                (a, b): count for a, b, count in conn.execute(f"""
+                    SELECT x.item_name, y.item_name, COUNT(*)
+                    FROM {lines} x JOIN {lines} y ON y.order_id = x.order_id AND y.item_name > x.item_name
+                    GROUP BY x.item_name, y.item_name
+                """)
+            },
+            {(a, b): count for a, b, count in conn.execute("SELECT item_a, item_b, baskets FROM basket_pairs")},
+        ),
+    }
+
+
+def _compare(expected, stored, tolerance, describe):
+    problems = []
+    for key in sorted(set(expected) | set(stored)):
+        exp_qty, exp_rev = expected.get(key, (0, 0.0))
+        got_qty, got_rev = stored.get(key, (0, 0.0))
+        if exp_qty != got_qty or abs(exp_rev - got_rev) > tolerance:
+            problems.append(
+                f"{describe(key)}: expected qty={exp_qty} revenue={exp_rev:.2f}, "
+                f"stored qty={got_qty} revenue={got_rev:.2f}"
+            )
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument("--verify", action="store_true", help="compare aggregates with the sales table")
+    action.add_argument("--rebuild", action="store_true", help="recompute aggregates from the sales table")
+    parser.add_argument("--db", default=DB_PATH)
+    args = parser.parse_args()
+
+    db = Database(args.db, pool_size=1)
+    with db.connection() as conn:
+        if args.rebuild:
+            rebuild(conn)
+            print("Sales aggregates and basket counts rebuilt.")
+        problems = verify(conn)
+    db.close()
+
+    for problem in problems:
+        print(problem)
+    print("Sales aggregates OK." if not problems else f"{len(problems)} mismatches found.")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,383 @@
+"""Local HTTP/JSON API over services.RestaurantService, built on asyncio streams.
+
+    python api_server.py --port 8080
+    curl localhost:8080/menu?limit=5
+    curl -X POST localhost:8080/cart/alice/items -d '{"item_name": "Cola", "quantity": 2}'
+    curl -X POST localhost:8080/cart/alice/checkout
+    python api_server.py --metrics metrics/    # also write latency metrics every 10 s
+
+Reads run concurrently on a thread pool (one pooled connection each, which WAL lets
+proceed alongside a writer). Every write goes through one queue drained by a single
+thread, so requests in this process never compete for SQLite's write lock or burn
+time in busy retries; a full queue answers 503 instead of piling up latency.
+"""
+import argparse
+import asyncio
+import dataclasses
+import json
+import math
+import queue
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import instrumentation
+from checkout import CheckoutError, EmptyCartError
+from database import DB_PATH, Database
+from services import RestaurantService, ServiceError
+
+READER_THREADS = 8
+WRITE_QUEUE_SIZE = 1000
+MAX_BODY_BYTES = 64 * 1024
+# Idle keep-alive connections are closed after this many seconds
+KEEP_ALIVE_TIMEOUT = 15.0
+METRICS_EXPORT_INTERVAL = 10.0
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class WriteQueue:
+    """Runs submitted write calls one at a time, in arrival order, on a dedicated thread.
+
+    The thread takes the next job as soon as the previous one commits, without a
+    round trip through the event loop, which is busy serving reads under load.
+    """
+
+    def __init__(self, maxsize=WRITE_QUEUE_SIZE):
+        self._queue = queue.Queue(maxsize)
+        self._thread = threading.Thread(target=self._drain, name="db-writer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    async def stop(self):
+        self._queue.put(None)
+        await asyncio.get_running_loop().run_in_executor(None, self._thread.join)
+
+    def __len__(self):
+        return self._queue.qsize()
+
+    async def submit(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        try:
+            self._queue.put_nowait((fn, args, future, loop))
+        except queue.Full:
+            raise HttpError(HTTPStatus.SERVICE_UNAVAILABLE, "Write queue is full, retry shortly") from None
+        return await future
+
+    def _drain(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            fn, args, future, loop = job
+            try:
+                result = fn(*args)
+            except Exception as e:
+                loop.call_soon_threadsafe(_settle, future, None, e)
+            else:
+                loop.call_soon_threadsafe(_settle, future, result, None)
+
+
+def _settle(future, result, error):
+    if future.cancelled():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+def to_json(value):
+    """Encode service results: namedtuples become objects, dates ISO strings, infinities null."""
+    def convert(item):
+        if hasattr(item, "_asdict"):
+            return {key: convert(field) for key, field in item._asdict().items()}
+        if dataclasses.is_dataclass(item):
+            return {field.name: convert(getattr(item, field.name)) for field in dataclasses.fields(item)}
+        if isinstance(item, dict):
+            return {str(key): convert(field) for key, field in item.items()}
+        if isinstance(item, (list, tuple)):
+            return [convert(field) for field in item]
+        if isinstance(item, date):
+            return item.isoformat()
+        if isinstance(item, float) and not math.isfinite(item):
+            return None
+        return item
+    return json.dumps(convert(value), ensure_ascii=False).encode("utf-8")
+
+
+def _int_param(query, name, default):
+    try:
+        return int(query[name][0]) if name in query else default
+    except ValueError:
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"{name} must be an integer") from None
+
+
+def _date_range(query):
+    try:
+        start = date.fromisoformat(query["start"][0]) if "start" in query else None
+        end = date.fromisoformat(query["end"][0]) if "end" in query else None
+    except ValueError:
+        raise HttpError(HTTPStatus.BAD_REQUEST, "start and end must be YYYY-MM-DD dates") from None
+    if end is not None and start is None:
+        raise HttpError(HTTPStatus.BAD_REQUEST, "end needs a start")
+    if start is not None and end is None:
+        end = date.today()
+    return start, end
+
+
+def _field(body, name, kind=str):
+    value = body.get(name) if isinstance(body, dict) else None
+    if not isinstance(value, kind) or isinstance(value, bool):
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"Body needs {name!r} ({kind.__name__})")
+    return value
+
+
+class ApiServer:
+    def __init__(self, service, readers=READER_THREADS, write_queue_size=WRITE_QUEUE_SIZE, metrics_dir=None):
+        self.service = service
+        self.metrics_dir = metrics_dir
+        self.readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="db-reader")
+        self.writes = WriteQueue(write_queue_size)
+        self.requests = 0
+        # (method, path pattern, handler); handlers get the match groups, query and body
+        self.routes = [
+            ("GET", r"/health", self.health),
+            ("GET", r"/menu", self.menu),
+            ("GET", r"/menu/low-stock", self.low_stock),
+            ("GET", r"/cart/([^/]+)", self.cart),
+            ("POST", r"/cart/([^/]+)/items", self.add_to_cart),
+            ("DELETE", r"/cart/([^/]+)/items/([^/]+)", self.remove_from_cart),
+            ("POST", r"/cart/([^/]+)/checkout", self.checkout),
+            ("GET", r"/insights/trending", self.trending),
+            ("GET", r"/insights/inventory", self.inventory),
+            ("GET", r"/insights/reorder", self.reorder),
+            ("GET", r"/insights/bought-together", self.bought_together),
+            ("GET", r"/insights/sales-total", self.sales_total),
+            ("GET", r"/comments", self.comments),
+            ("POST", r"/comments", self.add_comment),
+        ]
+        # Requests are timed per route, e.g. "GET /cart/{}", not per URL
+        self.routes = [
+            (method, re.compile(pattern + "$"), handler, f"{method} {pattern.replace('([^/]+)', '{}')}")
+            for method, pattern, handler in self.routes
+        ]
+
+    async def call(self, name, *args):
+        """Run a service method: writes through the writer queue, reads on the reader pool."""
+        fn = getattr(self.service, name)
+        if name in self.service.WRITES:
+            return await self.writes.submit(fn, *args)
+        return await asyncio.get_running_loop().run_in_executor(self.readers, fn, *args)
+
+    # --- Handlers
+    async def health(self, query, body):
+        return {"status": "ok", "requests": self.requests, "write_queue": len(self.writes)}
+
+    async def menu(self, query, body):
+        return await self.call("menu", _int_param(query, "after_id", None), _int_param(query, "limit", 200))
+
+    async def low_stock(self, query, body):
+        return await self.call("low_stock", _int_param(query, "threshold", 3))
+
+    async def cart(self, query, body, username):
+        return await self.call("cart", username)
+
+    async def add_to_cart(self, query, body, username):
+        item_name = _field(body, "item_name")
+        quantity = body.get("quantity", 1)
+        if not isinstance(quantity, int) or isinstance(quantity, bool):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "quantity must be an integer")
+        return await self.call("add_to_cart", username, item_name, quantity)
+
+    async def remove_from_cart(self, query, body, username, item_name):
+        return await self.call("remove_from_cart", username, item_name)
+
+    async def checkout(self, query, body, username):
+        return await self.call("checkout", username)
+
+    async def trending(self, query, body):
+        return await self.call("trending", _int_param(query, "limit", 5), *_date_range(query))
+
+    async def inventory(self, query, body):
+        return await self.call("inventory_stats")
+
+    async def reorder(self, query, body):
+        try:
+            return await self.call("reorder", _int_param(query, "limit", 20))
+        except ImportError as e:
+            raise HttpError(HTTPStatus.NOT_IMPLEMENTED, str(e)) from None
+
+    async def bought_together(self, query, body):
+        return await self.call("bought_together", _int_param(query, "limit", 5), query.get("item", [None])[0])
+
+    async def sales_total(self, query, body):
+        return {"total": await self.call("total_sales", *_date_range(query))}
+
+    async def comments(self, query, body):
+        return await self.call(
+            "comments", _int_param(query, "before_id", None), _int_param(query, "limit", 50),
+            query.get("q", [None])[0],
+        )
+
+    async def add_comment(self, query, body):
+        comment = _field(body, "comment")
+        author = body.get("author")
+        if author is not None and not isinstance(author, str):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "author must be a string")
+        await self.call("add_comment", comment, author)
+        return {"saved": True}
+
+    # --- HTTP
+    async def dispatch(self, method, target, body):
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+        allowed = []
+        for route_method, pattern, handler, label in self.routes:
+            match = pattern.match(path)
+            if not match:
+                continue
+            if route_method != method:
+                allowed.append(route_method)
+                continue
+            query = parse_qs(url.query)
+            try:
+                payload = json.loads(body) if body else {}
+            except ValueError:
+                raise HttpError(HTTPStatus.BAD_REQUEST, "Body is not valid JSON") from None
+            args = [unquote(group) for group in match.groups()]
+            if not instrumentation.is_enabled():
+                return await handler(query, payload, *args)
+            with instrumentation.get_metrics().timer("http", label):
+                return await handler(query, payload, *args)
+        if allowed:
+            raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, f"Use {' or '.join(allowed)} for {path}")
+        raise HttpError(HTTPStatus.NOT_FOUND, f"No route for {path}")
+
+    async def respond(self, method, target, body):
+        """Return (status, JSON bytes) for one request."""
+        self.requests += 1
+        try:
+            return HTTPStatus.OK, to_json(await self.dispatch(method, target, body))
+        except HttpError as e:
+            status, message = e.status, str(e)
+        except EmptyCartError as e:
+            status, message = HTTPStatus.BAD_REQUEST, str(e)
+        except CheckoutError as e:
+            status, message = HTTPStatus.CONFLICT, str(e)
+        except ServiceError as e:
+            status, message = HTTPStatus(e.status), str(e)
+        except Exception as e:
+            print(f"{method} {target} failed: {e!r}", file=sys.stderr)
+            status, message = HTTPStatus.INTERNAL_SERVER_ERROR, "Internal error"
+        return status, to_json({"error": message})
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    status, payload = HTTPStatus.BAD_REQUEST, to_json({"error": "Invalid Content-Length"})
+                    keep_alive = False
+                elif length > MAX_BODY_BYTES:
+                    status, payload = HTTPStatus.REQUEST_ENTITY_TOO_LARGE, to_json({"error": "Body too large"})
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = await self.respond(method.upper(), target, body)
+                    connection = headers.get("connection", "").lower()
+                    keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def export_metrics(self, interval=METRICS_EXPORT_INTERVAL):
+        loop = asyncio.get_running_loop()
+        metrics = instrumentation.get_metrics()
+        while True:
+            await asyncio.sleep(interval)
+            await loop.run_in_executor(None, metrics.export, self.metrics_dir)
+
+    async def serve(self, host, port, ready=None):
+        self.writes.start()
+        server = await asyncio.start_server(self.handle_connection, host, port, backlog=512)
+        exporter = asyncio.create_task(self.export_metrics()) if self.metrics_dir else None
+        if ready is not None:
+            ready(server.sockets[0].getsockname()[1])
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if exporter is not None:
+                exporter.cancel()
+                instrumentation.get_metrics().export(self.metrics_dir)
+            await self.writes.stop()
+            self.readers.shutdown(wait=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--host", default="127.0.0.1", help="interface to bind; keep it local")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--readers", type=int, default=READER_THREADS, help="concurrent read threads")
+    parser.add_argument("--metrics", metavar="DIR", help="record latencies and write metrics.prom/metrics.json into DIR")
+    args = parser.parse_args()
+    if args.metrics:
+        instrumentation.enable()
+
+    # One pooled connection per reader thread plus the writer
+    db = Database(args.db, pool_size=args.readers + 1)
+    server = ApiServer(RestaurantService(db), readers=args.readers, metrics_dir=args.metrics)
+    try:
+        asyncio.run(server.serve(
+            args.host, args.port, ready=lambda port: print(f"Serving on http://{args.host}:{port}", flush=True)
+        ))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""Password hashing and sign-in with a small cache of recent successful verifications.
+
+Passwords are stored as "pbkdf2_sha256$<iterations>$<salt>$<hash>". Rows written
+before hashing was introduced still hold the plaintext password; they are checked
+as-is and upgraded to a hash on the first successful sign-in, as are hashes made
+with fewer iterations than the current setting.
+"""
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from database import get_db
+from instrumentation import timed
+
+ALGORITHM = "pbkdf2_sha256"
+# Tune with `python -m benchmarks.bench_auth` on the slowest terminal
+ITERATIONS = int(os.environ.get("RESTAURANT_AUTH_ITERATIONS", "200000"))
+SALT_BYTES = 16
+CACHE_ENTRIES = 128
+# A cached verification lasts about one shift
+CACHE_TTL_SECONDS = 8 * 3600.0
+
+_CacheEntry = namedtuple("_CacheEntry", ["user", "stored", "digest", "created"])
+
+
+def _b64(raw):
+    return base64.b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _unb64(text):
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def hash_password(password, iterations=None, salt=None):
+    iterations = iterations or ITERATIONS
+    salt = salt or secrets.token_bytes(SALT_BYTES)
+    derived = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    return f"{ALGORITHM}${iterations}${_b64(salt)}${_b64(derived)}"
+
+
+def is_hashed(stored):
+    return stored.startswith(ALGORITHM + "$")
+
+
+def verify_password(password, stored):
+    """Constant-time check of a password against a stored hash (or legacy plaintext)."""
+    if not is_hashed(stored):
+        return hmac.compare_digest(password.encode("utf-8"), stored.encode("utf-8"))
+    try:
+        _algorithm, iterations, salt, expected = stored.split("$")
+        derived = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), _unb64(salt), int(iterations))
+    except ValueError:
+        return False
+    return hmac.compare_digest(derived, _unb64(expected))
+
+
+def needs_rehash(stored, iterations=None):
+    if not is_hashed(stored):
+        return True
+    return int(stored.split("$")[1]) < (iterations or ITERATIONS)
+
+
+class Authenticator:
+    """Signs users in and up against the users table.
+
+    Successful verifications are remembered per (username, role) as a keyed digest of
+    the password, so a repeat login at shift change skips PBKDF2. The digest key is
+    random per process and an entry only matches while the stored hash is unchanged.
+    Failed attempts are never cached.
+    """
+
+    def __init__(self, db=None, iterations=None, max_entries=CACHE_ENTRIES, ttl=CACHE_TTL_SECONDS,
+                 clock=time.monotonic):
+        self.db = db or get_db()
+        self.iterations = iterations or ITERATIONS
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._key = secrets.token_bytes(32)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        # Unknown users still pay for one hash, so response time doesn't reveal which names exist
+        self._dummy_hash = hash_password(secrets.token_hex(8), self.iterations)
+        self.hits = 0
+        self.misses = 0
+
+    def _digest(self, password):
+        return hmac.new(self._key, password.encode("utf-8"), hashlib.sha256).digest()
+
+    @timed("op", "sign_in")
+    def sign_in(self, username, password, role):
+        """Return the User on success, otherwise None."""
+        found = self.db.get_credentials(username, role)
+        if found is None:
+            verify_password(password, self._dummy_hash)
+            return None
+        user, stored = found
+
+        key = (username, role)
+        digest = self._digest(password)
+        with self._lock:
+            entry = self._entries.get(key)
+            if (entry and entry.stored == stored and self.clock() - entry.created < self.ttl
+                    and hmac.compare_digest(entry.digest, digest)):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.user
+            self.misses += 1
+
+        if not verify_password(password, stored):
+            return None
+        if needs_rehash(stored, self.iterations):
+            stored = hash_password(password, self.iterations)
+            self.db.set_password_hash(user.id, stored)
+
+        with self._lock:
+            self._entries[key] = _CacheEntry(user, stored, digest, self.clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return user
+
+    def sign_up(self, username, password, role):
+        """Return False when the (username, role) account already exists."""
+        return self.db.create_user(username, hash_password(password, self.iterations), role)
+
+    def forget(self, username=None, role=None):
+        with self._lock:
+            if username is None:
+                self._entries.clear()
+            else:
+                self._entries.pop((username, role), None)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_authenticator = None
+_authenticator_lock = threading.Lock()
+
+
+def get_authenticator():
+    global _authenticator
+    with _authenticator_lock:
+        if _authenticator is None:
+            _authenticator = Authenticator()
+        return _authenticator
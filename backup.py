@@ -0,0 +1,249 @@
+"""Online backups of the live database through SQLite's backup API, safe while terminals keep selling.
+
+    python backup.py --dir backups/                              # one verified snapshot
+    python backup.py --dir backups/ --compress --keep 48 --every 30   # every 30 minutes, keep the last 48
+    python backup.py --out restaurant-copy.db --pages 64 --pause-ms 20
+
+A file copy taken while a checkout commits can capture half a transaction. The
+backup API instead copies pages through a connection of its own: BATCH_PAGES
+pages per step with a pause between steps. In WAL mode the copy reads one
+snapshot held open for the whole run, which never blocks writers (checkouts carry
+on, the WAL just cannot be checkpointed past it until the copy ends). In rollback
+journal mode each step takes a brief shared lock instead, and a write between
+steps makes SQLite restart the copy.
+
+Each snapshot is written to a temporary file, checked with PRAGMA integrity_check,
+optionally gzipped and only then renamed into place, so a listed snapshot is
+always complete. The report gives the time spent inside backup steps, when the
+source is actually held, next to the wall-clock time; benchmarks/backup_impact.py
+measures what a running backup does to checkout latency.
+"""
+import argparse
+import gzip
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+from database import BUSY_TIMEOUT_MS, DB_PATH
+
+BATCH_PAGES = 256
+PAUSE_SECONDS = 0.02
+# Restarts tolerated in rollback-journal mode before giving up on a busy database
+MAX_RESTARTS = 20
+KEEP_SNAPSHOTS = 14
+SNAPSHOT_PREFIX = "restaurant-"
+_SNAPSHOT_RE = re.compile(rf"^{SNAPSHOT_PREFIX}\d{{8}}-\d{{6}}\.db(\.gz)?$")
+
+
+class BackupError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class BackupReport:
+    path: str
+    pages: int
+    bytes: int
+    steps: int
+    restarts: int
+    seconds: float            # wall clock, pauses included
+    step_seconds: float       # time spent inside backup steps, waiting for the source included
+    max_step_ms: float        # the longest single step: the longest the source was held at once
+    snapshot_seconds: float   # how long a WAL read snapshot was held (0 in rollback-journal mode)
+    integrity: str            # "ok", "skipped" or the first integrity_check complaint
+    compressed: bool
+
+    def describe(self):
+        lock = (
+            f"one WAL read snapshot for {self.snapshot_seconds:.2f}s (writers not blocked)"
+            if self.snapshot_seconds else "a shared lock per step"
+        )
+        return (
+            f"{self.path}: {self.pages:,} pages, {self.bytes / 1e6:.1f} MB in {self.seconds:.2f}s; "
+            f"{self.steps} steps, {self.step_seconds * 1000:.0f} ms in steps (longest {self.max_step_ms:.1f} ms), "
+            f"{lock}; {self.restarts} restarts; integrity {self.integrity}"
+        )
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    conn.execute(f"PRAGMA busy_timeout = {int(BUSY_TIMEOUT_MS)}")
+    return conn
+
+
+def copy_database(source_path, dest_path, pages=BATCH_PAGES, pause=PAUSE_SECONDS, max_restarts=MAX_RESTARTS):
+    """Copy source_path into dest_path page batch by page batch.
+
+    Returns (pages, steps, restarts, step_seconds, max_step_seconds, snapshot_seconds).
+    """
+    source = _connect(source_path)
+    dest = _connect(dest_path)
+    stats = {"steps": 0, "restarts": 0, "step": 0.0, "max_step": 0.0, "remaining": None, "total": 0}
+    step_started = time.perf_counter()
+
+    def progress(status, remaining, total):
+        nonlocal step_started
+        elapsed = time.perf_counter() - step_started
+        stats["steps"] += 1
+        stats["step"] += elapsed
+        stats["max_step"] = max(stats["max_step"], elapsed)
+        stats["total"] = total
+        if stats["remaining"] is not None and remaining > stats["remaining"]:
+            stats["restarts"] += 1
+            if stats["restarts"] > max_restarts:
+                raise BackupError(f"the database changed under the backup {max_restarts} times; retry when quieter")
+        stats["remaining"] = remaining
+        # The source is not locked between steps, so this is where terminals catch up
+        if remaining and pause:
+            time.sleep(pause)
+        step_started = time.perf_counter()
+
+    snapshot_started = None
+    try:
+        wal = source.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        if wal:
+            # Pin one consistent snapshot so commits during the copy don't restart it
+            source.execute("BEGIN")
+            source.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+            snapshot_started = time.perf_counter()
+        try:
+            source.backup(dest, pages=pages, progress=progress)
+        finally:
+            snapshot_seconds = time.perf_counter() - snapshot_started if wal else 0.0
+            if wal:
+                source.execute("COMMIT")
+        # The copy inherits WAL mode from the header; make it a self-contained single file
+        dest.execute("PRAGMA journal_mode = DELETE")
+    except sqlite3.Error as e:
+        raise BackupError(f"backup of {source_path} failed: {e}") from e
+    finally:
+        source.close()
+        dest.close()
+    return stats["total"], stats["steps"], stats["restarts"], stats["step"], stats["max_step"], snapshot_seconds
+
+
+def check_integrity(path):
+    """Return "ok" or the first problem PRAGMA integrity_check reports."""
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute("PRAGMA integrity_check").fetchall()
+    finally:
+        conn.close()
+    return rows[0][0] if rows else "no result"
+
+
+def _gzip(path, dest_path):
+    with open(path, "rb") as src, gzip.open(dest_path, "wb", compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+
+
+def _remove_partials(dest_path):
+    for leftover in (f"{dest_path}.partial", f"{dest_path}.partial.gz"):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+
+
+def backup(source_path, dest_path, pages=BATCH_PAGES, pause=PAUSE_SECONDS, verify=True, compress=False):
+    """Back up source_path to dest_path (gzipped when `compress`) and return a BackupReport.
+
+    dest_path only appears once the copy is complete and, with `verify`, has passed
+    the integrity check; a failed check raises BackupError and leaves nothing behind.
+    """
+    started = time.perf_counter()
+    partial = f"{dest_path}.partial"
+    _remove_partials(dest_path)
+    try:
+        total, steps, restarts, step_seconds, max_step, snapshot_seconds = copy_database(
+            source_path, partial, pages, pause
+        )
+        integrity = check_integrity(partial) if verify else "skipped"
+        if integrity not in ("ok", "skipped"):
+            raise BackupError(f"backup failed the integrity check: {integrity}")
+        if compress:
+            _gzip(partial, f"{partial}.gz")
+            os.remove(partial)
+            partial = f"{partial}.gz"
+        os.replace(partial, dest_path)
+    except BaseException:
+        _remove_partials(dest_path)
+        raise
+    return BackupReport(
+        path=dest_path,
+        pages=total,
+        bytes=os.path.getsize(dest_path),
+        steps=steps,
+        restarts=restarts,
+        seconds=time.perf_counter() - started,
+        step_seconds=step_seconds,
+        max_step_ms=max_step * 1000,
+        snapshot_seconds=snapshot_seconds,
+        integrity=integrity,
+        compressed=compress,
+    )
+
+
+def list_snapshots(directory):
+    """Snapshot file names in directory, oldest first (the timestamp sorts as text)."""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(name for name in os.listdir(directory) if _SNAPSHOT_RE.match(name))
+
+
+def snapshot(source_path, directory, keep=KEEP_SNAPSHOTS, compress=False, **options):
+    """Write a timestamped snapshot into directory, then delete all but the newest `keep`."""
+    os.makedirs(directory, exist_ok=True)
+    name = f"{SNAPSHOT_PREFIX}{datetime.now().strftime('%Y%m%d-%H%M%S')}.db" + (".gz" if compress else "")
+    report = backup(source_path, os.path.join(directory, name), compress=compress, **options)
+    snapshots = list_snapshots(directory)
+    for old in snapshots[:max(0, len(snapshots) - keep)]:
+        os.remove(os.path.join(directory, old))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=DB_PATH)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--out", help="write one backup to this file")
+    target.add_argument("--dir", help="write rotating timestamped snapshots into this directory")
+    parser.add_argument("--keep", type=int, default=KEEP_SNAPSHOTS, help="snapshots to keep with --dir")
+    parser.add_argument("--every", type=float, metavar="MINUTES", help="with --dir, repeat until interrupted")
+    parser.add_argument("--compress", action="store_true", help="gzip the backup")
+    parser.add_argument("--pages", type=int, default=BATCH_PAGES, help="pages copied per step")
+    parser.add_argument("--pause-ms", type=float, default=PAUSE_SECONDS * 1000, help="pause between steps")
+    parser.add_argument("--no-verify", action="store_true", help="skip PRAGMA integrity_check on the copy")
+    args = parser.parse_args()
+    if args.every and not args.dir:
+        parser.error("--every needs --dir")
+    if not os.path.exists(args.db):
+        parser.error(f"{args.db} does not exist")
+
+    options = {"pages": args.pages, "pause": args.pause_ms / 1000, "verify": not args.no_verify}
+    try:
+        while True:
+            started = time.monotonic()
+            try:
+                if args.dir:
+                    report = snapshot(args.db, args.dir, args.keep, args.compress, **options)
+                else:
+                    report = backup(args.db, args.out, compress=args.compress, **options)
+            except BackupError as e:
+                print(e, file=sys.stderr)
+                if not args.every:
+                    return 1
+            else:
+                print(report.describe(), flush=True)
+            if not args.every:
+                return 0
+            time.sleep(max(0.0, args.every * 60 - (time.monotonic() - started)))
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
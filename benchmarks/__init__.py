@@ -0,0 +1,3 @@
+"""Headless benchmarks; run them with `python -m benchmarks.<module>` from the repository root."""
+# The checkout metrics and every benchmark report percentiles the same way
+from checkout import percentile  # noqa: F401
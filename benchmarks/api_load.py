@@ -0,0 +1,188 @@
+"""Load test for api_server: keep-alive HTTP clients replaying a front-end request mix.
+
+Run from the repository root:
+    python -m benchmarks.api_load --clients 32 --duration 10            # starts a server on a generated dataset
+    python -m benchmarks.api_load --url http://127.0.0.1:8080 --clients 64
+
+Each client plays one front-end (tablet, kitchen display, till) on its own keep-alive
+connection: mostly menu, cart and insights reads, with cart adds and checkouts mixed
+in. The server runs in its own process so client and server don't share an event loop.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+from benchmarks import percentile
+from benchmarks.datagen import generate
+from database import Database
+
+# (route label, relative weight)
+REQUEST_MIX = (
+    ("GET /menu", 30),
+    ("GET /cart", 20),
+    ("POST /cart/items", 25),
+    ("POST /checkout", 5),
+    ("GET /insights/trending", 10),
+    ("GET /insights/inventory", 5),
+    ("GET /menu/low-stock", 5),
+)
+
+
+class HttpClient:
+    """Minimal HTTP/1.1 client over one keep-alive connection."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        payload = json.dumps(body).encode("utf-8") if body is not None else b""
+        self.writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n\r\n".encode("latin-1") + payload
+        )
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length, keep_alive = 0, True
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+            elif name.lower() == "connection":
+                keep_alive = value.strip().lower() != "close"
+        data = await self.reader.readexactly(length)
+        if not keep_alive:
+            await self.close()
+        return status, data
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = self.reader = None
+
+
+async def run_client(client_id, host, port, items, duration, stats):
+    rng = random.Random(client_id)
+    username = f"api_client_{client_id}"
+    labels, weights = zip(*REQUEST_MIX)
+    client = HttpClient(host, port)
+    deadline = time.monotonic() + duration
+    try:
+        while time.monotonic() < deadline:
+            label = rng.choices(labels, weights=weights)[0]
+            if label == "GET /menu":
+                args = ("GET", f"/menu?limit=50&after_id={rng.randrange(len(items))}")
+            elif label == "GET /cart":
+                args = ("GET", f"/cart/{username}")
+            elif label == "POST /cart/items":
+                args = ("POST", f"/cart/{username}/items", {"item_name": rng.choice(items), "quantity": 1})
+            elif label == "POST /checkout":
+                args = ("POST", f"/cart/{username}/checkout")
+            elif label == "GET /insights/trending":
+                args = ("GET", "/insights/trending?limit=5&start=" + time.strftime("%Y-%m-01"))
+            elif label == "GET /insights/inventory":
+                args = ("GET", "/insights/inventory")
+            else:
+                args = ("GET", "/menu/low-stock")
+            start = time.perf_counter()
+            status, _ = await client.request(*args)
+            stats[label].append(((time.perf_counter() - start) * 1000, status))
+    finally:
+        await client.close()
+
+
+async def run_load(host, port, items, clients, duration):
+    stats = defaultdict(list)
+    started = time.perf_counter()
+    await asyncio.gather(*(run_client(index, host, port, items, duration, stats) for index in range(clients)))
+    return stats, time.perf_counter() - started
+
+
+def start_server(db_path, readers):
+    """Launch api_server in a subprocess on a free port; returns (process, port)."""
+    process = subprocess.Popen(
+        [sys.executable, "api_server.py", "--db", db_path, "--port", "0", "--readers", str(readers)],
+        stdout=subprocess.PIPE, text=True,
+    )
+    line = process.stdout.readline()
+    if not line.startswith("Serving on"):
+        process.kill()
+        raise RuntimeError(f"api_server did not start: {line!r}")
+    return process, int(line.rsplit(":", 1)[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="existing server to load; by default one is started on a generated dataset")
+    parser.add_argument("--db", help="dataset to copy for the started server instead of generating one")
+    parser.add_argument("--clients", type=int, default=32, help="concurrent keep-alive connections")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--readers", type=int, default=8, help="reader threads for the started server")
+    parser.add_argument("--menu-items", type=int, default=500)
+    parser.add_argument("--sales", type=int, default=50000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        process = None
+        if args.url:
+            url = urlsplit(args.url)
+            host, port = url.hostname, url.port or 80
+            db_path = args.db
+        else:
+            db_path = os.path.join(workdir, "api.db")
+            if args.db:
+                shutil.copy(args.db, db_path)
+            else:
+                db = Database(db_path, pool_size=1)
+                generate(db, menu_items=args.menu_items, users=200, sales=args.sales, cart_rows=0)
+                db.close()
+            # Plenty of stock so adds measure the write path rather than sold-out items
+            db = Database(db_path, pool_size=1)
+            with db.transaction() as conn:
+                conn.execute("UPDATE menu SET quantity = 1000000")
+            db.close()
+            process, port = start_server(db_path, args.readers)
+            host = "127.0.0.1"
+        db = Database(db_path, pool_size=1) if db_path else None
+        try:
+            if db is not None:
+                items = [item.item_name for item in db.get_menu()]
+            else:
+                items = [f"Item {index:04d}" for index in range(args.menu_items)]
+            stats, elapsed = asyncio.run(run_load(host, port, items, args.clients, args.duration))
+        finally:
+            if db is not None:
+                db.close()
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    total = sum(len(samples) for samples in stats.values())
+    print(f"{total:,} requests from {args.clients} clients in {elapsed:.1f}s: {total / elapsed:,.0f} req/s")
+    print(f"{'route':<26}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for label, _weight in REQUEST_MIX:
+        samples = stats.get(label, [])
+        latencies = sorted(latency for latency, _status in samples)
+        errors = sum(1 for _latency, status in samples if status >= 500)
+        print(f"{label:<26}{len(samples):>8}{percentile(latencies, 50):>10.2f}{percentile(latencies, 95):>10.2f}"
+              f"{percentile(latencies, 99):>10.2f}{errors:>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
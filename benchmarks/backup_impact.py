@@ -0,0 +1,124 @@
+"""Checkout latency with and without an online backup running, on a copy of a dataset.
+
+Run from the repository root:
+    python -m benchmarks.backup_impact --terminals 4
+    python -m benchmarks.backup_impact --db /tmp/bench.db --pages 64 --pause-ms 5
+    python -m benchmarks.backup_impact --journal-mode DELETE     # per-step locks and restarts instead
+
+Terminal processes add to cart and check out for the whole run; the backup starts
+once they have settled and runs as many times as fit in the backup phase.
+Checkouts are split by whether they finished while a backup was copying.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+from backup import BATCH_PAGES, PAUSE_SECONDS, BackupError, backup
+from benchmarks import percentile
+from benchmarks.datagen import generate
+from checkout import CheckoutEngine, CheckoutError
+from database import Database
+
+# Checkouts right after the terminals start pay for opening connections and warming caches
+WARMUP_SECONDS = 1.0
+
+
+def terminal(db_path, journal_mode, index, items, deadline, results):
+    db = Database(db_path, pool_size=1, journal_mode=journal_mode)
+    engine = CheckoutEngine(db)
+    rng = random.Random(index)
+    username = f"backup_terminal_{index}"
+    samples = []
+    while time.time() < deadline:
+        try:
+            for _ in range(rng.randint(1, 4)):
+                db.add_to_cart(username, rng.choice(items))
+            start = time.perf_counter()
+            engine.checkout(username)
+            samples.append((time.time(), (time.perf_counter() - start) * 1000))
+        except (CheckoutError, sqlite3.Error):
+            pass
+    results.put(samples)
+    db.close()
+
+
+def summarize(label, latencies):
+    latencies = sorted(latencies)
+    print(f"{label:<22}{len(latencies):>8}{percentile(latencies, 50):>10.2f}{percentile(latencies, 95):>10.2f}"
+          f"{percentile(latencies, 99):>10.2f}{(latencies[-1] if latencies else 0.0):>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="dataset to copy instead of generating one")
+    parser.add_argument("--terminals", type=int, default=4)
+    parser.add_argument("--phase", type=float, default=5.0, help="seconds without, then with, backups running")
+    parser.add_argument("--sales", type=int, default=200000)
+    parser.add_argument("--pages", type=int, default=BATCH_PAGES)
+    parser.add_argument("--pause-ms", type=float, default=PAUSE_SECONDS * 1000)
+    parser.add_argument("--journal-mode", default="WAL")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db_path = os.path.join(workdir, "backup_bench.db")
+        if args.db:
+            shutil.copy(args.db, db_path)
+        db = Database(db_path, pool_size=1, journal_mode=args.journal_mode)
+        if not args.db:
+            generate(db, menu_items=500, users=200, sales=args.sales, cart_rows=0, comments=0)
+        with db.transaction() as conn:
+            conn.execute("UPDATE menu SET quantity = 1000000")
+        items = [item.item_name for item in db.get_menu()]
+        db.close()
+
+        started = time.time()
+        deadline = started + 2 * args.phase
+        results = multiprocessing.Queue()
+        procs = [
+            multiprocessing.Process(
+                target=terminal, args=(db_path, args.journal_mode, index, items, deadline, results)
+            )
+            for index in range(args.terminals)
+        ]
+        for proc in procs:
+            proc.start()
+        time.sleep(args.phase)
+
+        windows, reports = [], []
+        while time.time() < deadline:
+            window_start = time.time()
+            try:
+                reports.append(backup(
+                    db_path, os.path.join(workdir, "copy.db"), pages=args.pages, pause=args.pause_ms / 1000,
+                    verify=False,
+                ))
+            except BackupError as e:
+                print(e)
+            windows.append((window_start, time.time()))
+
+        samples = []
+        for _ in procs:
+            samples.extend(results.get())
+        for proc in procs:
+            proc.join()
+
+    during = [ms for at, ms in samples if any(start <= at <= end for start, end in windows)]
+    before = [ms for at, ms in samples if started + WARMUP_SECONDS <= at < started + args.phase]
+    print(f"{args.terminals} terminals, {args.journal_mode} journal, {args.pages} pages per step, "
+          f"{args.pause_ms:g} ms pause")
+    for report in reports:
+        print(report.describe())
+    print(f"{'checkout':<22}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    summarize("without backup", before)
+    summarize("during backup", during)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""Measure PBKDF2 cost against sign-in latency to pick RESTAURANT_AUTH_ITERATIONS.
+
+Run from the repository root on the slowest terminal:
+    python -m benchmarks.bench_auth --target-ms 250
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from auth import ITERATIONS, Authenticator, hash_password, verify_password
+from benchmarks import percentile
+from database import Database
+
+COSTS = (50_000, 100_000, 200_000, 400_000, 600_000)
+
+
+def time_verify(iterations, repeat):
+    stored = hash_password("correct horse battery staple", iterations)
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        verify_password("correct horse battery staple", stored)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return sorted(latencies)
+
+
+def time_sign_in(repeat):
+    """Full sign-in through the users table: cold (PBKDF2) and cached repeat logins."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "auth.db"), pool_size=1)
+        authenticator = Authenticator(db)
+        authenticator.sign_up("cashier", "secret", "Customer")
+        cold, cached = [], []
+        for _ in range(repeat):
+            authenticator.forget()
+            for latencies in (cold, cached):
+                start = time.perf_counter()
+                if not authenticator.sign_in("cashier", "secret", "Customer"):
+                    raise RuntimeError("benchmark user could not sign in")
+                latencies.append((time.perf_counter() - start) * 1000)
+        db.close()
+    return sorted(cold), sorted(cached)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target-ms", type=float, default=250.0, help="acceptable p95 sign-in time")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--costs", type=lambda text: [int(v) for v in text.split(",")], default=COSTS)
+    args = parser.parse_args()
+
+    print(f"{'iterations':>12}{'verifies/s':>12}{'p50 ms':>10}{'p95 ms':>10}")
+    recommended = None
+    for iterations in args.costs:
+        latencies = time_verify(iterations, args.repeat)
+        p95 = percentile(latencies, 95)
+        print(f"{iterations:>12,}{1000 / percentile(latencies, 50):>12.1f}"
+              f"{percentile(latencies, 50):>10.1f}{p95:>10.1f}")
+        if p95 <= args.target_ms:
+            recommended = max(recommended or 0, iterations)
+
+    cold, cached = time_sign_in(args.repeat)
+    print(f"\nsign_in at the current {ITERATIONS:,} iterations: cold p50 {percentile(cold, 50):.1f} ms, "
+          f"cached p50 {percentile(cached, 50):.3f} ms")
+    if recommended:
+        print(f"Highest tested cost within {args.target_ms:.0f} ms: RESTAURANT_AUTH_ITERATIONS={recommended}")
+    else:
+        print(f"No tested cost fits in {args.target_ms:.0f} ms; try lower --costs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Compare the hot lookups before and after the index migration.
+
+Run from the repository root:  python -m benchmarks.bench_indexes --rows 1000000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+import migrations
+
+# (label, query before the migration, query after it, params)
+QUERIES = [
+    ("menu lookup",
+     "SELECT price, quantity FROM menu WHERE LOWER(item_name) = LOWER(?)",
+     "SELECT price, quantity FROM menu WHERE item_name = ? COLLATE NOCASE",
+     ("ITEM 0417",)),
+    ("cart line",
+     "SELECT quantity FROM cart WHERE username = ? AND item_name = ?",
+     "SELECT quantity FROM cart WHERE username = ? AND item_name = ?",
+     ("user_42", "Item 0007")),
+    ("low stock",
+     "SELECT item_name, quantity FROM menu WHERE quantity <= 3",
+     "SELECT item_name, quantity FROM menu WHERE quantity <= 3",
+     ()),
+    ("trending",
+     "SELECT item_name, SUM(quantity) AS total_qty FROM sales GROUP BY item_name ORDER BY total_qty DESC LIMIT 5",
+     "SELECT item_name, SUM(quantity) AS total_qty FROM sales GROUP BY item_name ORDER BY total_qty DESC LIMIT 5",
+     ()),
+]
+
+
+def seed(conn, rows, menu_items=2000, users=500, cart_rows=50000):
+    rng = random.Random(1234)
+    names = [f"Item {i:04d}" for i in range(menu_items)]
+    conn.execute("BEGIN")
+    conn.executemany(
+        "INSERT INTO menu (item_name, price, quantity) VALUES (?, ?, ?)",
+        ((name, round(rng.uniform(1, 50), 2), rng.randint(0, 100)) for name in names),
+    )
+    conn.executemany(
+        "INSERT INTO cart (username, item_name, price, quantity) VALUES (?, ?, ?, ?)",
+        ((f"user_{rng.randrange(users)}", rng.choice(names), 10.0, rng.randint(1, 4)) for _ in range(cart_rows)),
+    )
+    conn.executemany(
+        "INSERT INTO sales (username, item_name, price, quantity) VALUES (?, ?, ?, ?)",
+        ((f"user_{rng.randrange(users)}", rng.choice(names), 10.0, rng.randint(1, 4)) for _ in range(rows)),
+    )
+    conn.execute("COMMIT")
+
+
+def time_query(conn, sql, params, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        conn.execute(sql, params).fetchall()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000, help="sales rows to seed")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "bench.db"), isolation_level=None)
+        migrations.migrate(conn, target=1)
+        print(f"Seeding {args.rows:,} sales rows...")
+        seed(conn, args.rows)
+
+        before = {label: time_query(conn, old, params, args.repeat) for label, old, _new, params in QUERIES}
+        start = time.perf_counter()
+        migrations.migrate(conn)
+        migrate_ms = (time.perf_counter() - start) * 1000
+        conn.execute("ANALYZE")
+        after = {label: time_query(conn, new, params, args.repeat) for label, _old, new, params in QUERIES}
+
+        print(f"Migration to v{migrations.get_version(conn)} took {migrate_ms:.0f} ms\n")
+        print(f"{'query':<14}{'before ms':>12}{'after ms':>12}{'speedup':>10}  plan")
+        for label, _old, new, params in QUERIES:
+            plan = "; ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {new}", params))
+            speedup = before[label] / after[label] if after[label] else float("inf")
+            print(f"{label:<14}{before[label]:>12.3f}{after[label]:>12.3f}{speedup:>9.1f}x  {plan}")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Seeded synthetic data in the restaurant.db schema: menu, users, order history and open carts.
+
+Run from the repository root:
+    python -m benchmarks.datagen --db /tmp/bench.db --sales 1000000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from auth import hash_password
+from database import Database
+
+CATEGORIES = {
+    "Pizza": (["Margherita", "Pepperoni", "Four Cheese", "Veggie", "BBQ Chicken", "Hawaiian"], (6, 18)),
+    "Burgers": (["Classic", "Cheese", "Double", "Mushroom", "Chicken", "Veggie"], (5, 15)),
+    "Pasta": (["Alfredo", "Bolognese", "Pesto", "Carbonara", "Arrabbiata"], (7, 16)),
+    "Salads": (["Caesar", "Greek", "Garden", "Tuna", "Quinoa"], (4, 11)),
+    "Drinks": (["Cola", "Lemonade", "Iced Tea", "Orange Juice", "Water", "Coffee"], (1, 5)),
+    "Desserts": (["Brownie", "Cheesecake", "Ice Cream", "Tiramisu", "Apple Pie"], (3, 9)),
+}
+# Appended to the dish name, e.g. "Large Caesar Salad"
+SUFFIXES = {"Pizza": "Pizza", "Burgers": "Burger", "Salads": "Salad"}
+VARIANTS = ["", "Small", "Large", "Family", "Spicy", "Deluxe", "Mini", "Extra"]
+# Relative order volume per hour of the day: lunch and dinner peaks
+HOURLY_WEIGHTS = [0, 0, 0, 0, 0, 0, 1, 2, 3, 3, 4, 8, 10, 8, 4, 3, 3, 5, 9, 10, 8, 5, 2, 1]
+BATCH = 10000
+# Customer comments are stitched together from these fragments
+COMMENT_OPENERS = ["Loved the", "Really enjoyed the", "Not a fan of the", "The", "Please bring back the",
+                   "Cold", "Amazing", "Too salty:", "Great value on the", "Slow service but the"]
+COMMENT_CLOSERS = ["", "!", ", will order again.", ", portion was small.", " - five stars.",
+                   ", arrived late.", ", best in town.", ", needs more sauce.", ", staff were friendly."]
+
+
+def menu_rows(rng, count):
+    """Unique (item_name, price, quantity, category) rows, cycling through name variants."""
+    bases = [(category, name) for category, (names, _) in CATEGORIES.items() for name in names]
+    rows = []
+    for index in range(count):
+        category, name = bases[index % len(bases)]
+        variant = VARIANTS[(index // len(bases)) % len(VARIANTS)]
+        series = index // (len(bases) * len(VARIANTS))
+        item_name = " ".join(part for part in (variant, name, SUFFIXES.get(category, "")) if part)
+        if series:
+            item_name = f"{item_name} #{series + 1}"
+        low, high = CATEGORIES[category][1]
+        rows.append((item_name, round(rng.uniform(low, high), 2), rng.randint(0, 120), category))
+    return rows
+
+
+def popularity(count, skew=1.1):
+    """Cumulative Zipf-like weights so a few items dominate sales, as on a real menu."""
+    total, cumulative = 0.0, []
+    for rank in range(1, count + 1):
+        total += 1 / rank ** skew
+        cumulative.append(total)
+    return cumulative
+
+
+def order_times(rng, count, days, end):
+    start = end - timedelta(days=days)
+    day_weights = [1.0 + (0.3 if (start + timedelta(days=day)).weekday() >= 4 else 0) for day in range(days)]
+    days_drawn = sorted(rng.choices(range(days), weights=day_weights, k=count))
+    for day in days_drawn:
+        hour = rng.choices(range(24), weights=HOURLY_WEIGHTS)[0]
+        yield start + timedelta(days=day, hours=hour, minutes=rng.randrange(60), seconds=rng.randrange(60))
+
+
+def generate(db, menu_items=500, users=2000, sales=100000, cart_rows=20000, days=365, seed=42, comments=5000):
+    """Fill an empty (migrated) database; returns a dict of row counts."""
+    rng = random.Random(seed)
+    menu = menu_rows(rng, menu_items)
+    # Popular items are not simply the first rows of the menu
+    ranked = menu[:]
+    rng.shuffle(ranked)
+    weights = popularity(len(ranked))
+    usernames = [f"user_{index:05d}" for index in range(users)]
+
+    with db.transaction() as conn:
+        conn.executemany(
+            "INSERT INTO menu (item_name, price, quantity, category) VALUES (?, ?, ?, ?)", menu
+        )
+        conn.executemany(
+            "INSERT INTO users (username, password, role) VALUES (?, ?, ?)",
+            # Deliberately cheap hashes keep generation fast; sign-in upgrades them to the current cost
+            [(name, hash_password(f"pw_{name}", iterations=1000), "Admin" if index % 100 == 0 else "Customer")
+             for index, name in enumerate(usernames)],
+        )
+
+    # Orders of 1-5 lines until the requested number of sales lines exists
+    sizes, planned = [], 0
+    while planned < sales:
+        sizes.append(min(rng.randint(1, 5), sales - planned))
+        planned += sizes[-1]
+    end = datetime.now().replace(microsecond=0)
+    times = order_times(rng, len(sizes), days, end)
+    for first in range(0, len(sizes), BATCH):
+        order_batch, sales_batch = [], []
+        for order_id, size in enumerate(sizes[first:first + BATCH], start=first + 1):
+            username = rng.choice(usernames)
+            sold_at = next(times).strftime("%Y-%m-%d %H:%M:%S")
+            total = 0.0
+            for item_name, price, _stock, _category in rng.choices(ranked, cum_weights=weights, k=size):
+                quantity = rng.choices((1, 2, 3, 4), weights=(70, 20, 7, 3))[0]
+                sales_batch.append((username, item_name, price, quantity, order_id, sold_at))
+                total += price * quantity
+            order_batch.append((order_id, username, sold_at, round(total, 2)))
+        with db.transaction() as conn:
+            conn.executemany("INSERT INTO orders (id, username, created_at, total) VALUES (?, ?, ?, ?)", order_batch)
+            conn.executemany(
+                "INSERT INTO sales (username, item_name, price, quantity, order_id, sold_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                sales_batch,
+            )
+
+    # Open carts hold one row per (user, item), as apply_cart_changes keeps them
+    carts = {}
+    while len(carts) < min(cart_rows, users * len(menu)):
+        item_name, price, _stock, _category = rng.choices(ranked, cum_weights=weights)[0]
+        carts[(rng.choice(usernames), item_name)] = (price, rng.randint(1, 3))
+    with db.transaction() as conn:
+        conn.executemany(
+            "INSERT INTO cart (username, item_name, price, quantity) VALUES (?, ?, ?, ?)",
+            [(user, item, price, quantity) for (user, item), (price, quantity) in carts.items()],
+        )
+    end = datetime.now().replace(microsecond=0)
+    comment_rows = [
+        (f"{rng.choice(COMMENT_OPENERS)} {rng.choice(ranked)[0].lower()}{rng.choice(COMMENT_CLOSERS)}",
+         rng.choice(usernames), created.strftime("%Y-%m-%d %H:%M:%S"))
+        for created in sorted(order_times(rng, comments, days, end))
+    ]
+    with db.transaction() as conn:
+        conn.executemany("INSERT INTO comments (comment, author, created_at) VALUES (?, ?, ?)", comment_rows)
+        conn.execute("ANALYZE")
+
+    return {"menu": len(menu), "users": users, "orders": len(sizes), "sales": planned, "cart": len(carts),
+            "comments": comments}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", required=True, help="database file to create (must not contain data)")
+    parser.add_argument("--menu-items", type=int, default=500)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--sales", type=int, default=100000, help="sales lines to generate")
+    parser.add_argument("--cart-rows", type=int, default=20000)
+    parser.add_argument("--comments", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=365, help="length of the order history")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    db = Database(args.db, pool_size=1)
+    with db.connection() as conn:
+        if conn.execute("SELECT EXISTS (SELECT 1 FROM menu)").fetchone()[0]:
+            parser.error(f"{args.db} already has menu rows; generate into a new file")
+    start = time.perf_counter()
+    counts = generate(
+        db, menu_items=args.menu_items, users=args.users, sales=args.sales,
+        cart_rows=args.cart_rows, days=args.days, seed=args.seed, comments=args.comments,
+    )
+    db.close()
+    print(", ".join(f"{count:,} {table}" for table, count in counts.items())
+          + f" written in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
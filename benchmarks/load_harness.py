@@ -0,0 +1,138 @@
+"""Multi-process load harness: N customer terminals plus one admin dashboard on one database file.
+
+Run from the repository root:
+    python -m benchmarks.load_harness --terminals 8 --duration 10
+    python -m benchmarks.load_harness --terminals 8 --journal-mode DELETE   # compare with rollback journal
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from collections import defaultdict
+
+from backup import copy_database
+from benchmarks import percentile
+from benchmarks.bench_indexes import seed
+from checkout import CheckoutEngine, CheckoutError
+from database import Database
+
+MENU_ITEMS = 200
+
+
+def _timed(latencies, name, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    latencies[name].append((time.perf_counter() - start) * 1000)
+    return result
+
+
+def customer_session(db_path, db_options, terminal, duration, results):
+    db = Database(db_path, pool_size=1, **db_options)
+    engine = CheckoutEngine(db)
+    rng = random.Random(terminal)
+    username = f"terminal_{terminal}"
+    latencies = defaultdict(list)
+    errors = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        try:
+            for _ in range(rng.randint(1, 5)):
+                _timed(latencies, "add_to_cart", db.add_to_cart, username, f"Item {rng.randrange(MENU_ITEMS):04d}")
+            _timed(latencies, "confirm_order", engine.checkout, username)
+        except (CheckoutError, sqlite3.Error):
+            errors += 1
+    results.put((dict(latencies), errors, engine.metrics.snapshot()["busy_retries"]))
+    db.close()
+
+
+def admin_session(db_path, db_options, duration, poll_interval, results):
+    db = Database(db_path, pool_size=1, **db_options)
+    latencies = defaultdict(list)
+    errors = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        try:
+            _timed(latencies, "get_sales", db.get_sales)
+            _timed(latencies, "get_total_sales", db.get_total_sales)
+        except sqlite3.Error:
+            errors += 1
+        time.sleep(poll_interval)
+    results.put((dict(latencies), errors, 0))
+    db.close()
+
+
+def run(db_path, terminals, duration, poll_interval, db_options):
+    results = multiprocessing.Queue()
+    procs = [
+        multiprocessing.Process(target=customer_session, args=(db_path, db_options, i, duration, results))
+        for i in range(terminals)
+    ]
+    procs.append(multiprocessing.Process(
+        target=admin_session, args=(db_path, db_options, duration, poll_interval, results)
+    ))
+    start = time.perf_counter()
+    for proc in procs:
+        proc.start()
+    merged = defaultdict(list)
+    errors = retries = 0
+    for _ in procs:
+        latencies, proc_errors, proc_retries = results.get()
+        for name, values in latencies.items():
+            merged[name].extend(values)
+        errors += proc_errors
+        retries += proc_retries
+    for proc in procs:
+        proc.join()
+    return merged, errors, retries, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--terminals", type=int, default=4, help="customer processes")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per session")
+    parser.add_argument("--poll-interval", type=float, default=0.25, help="admin refresh interval")
+    parser.add_argument("--journal-mode", default="WAL")
+    parser.add_argument("--busy-timeout", type=int, default=5000, help="milliseconds")
+    parser.add_argument("--wal-autocheckpoint", type=int, default=1000, help="pages")
+    parser.add_argument("--sales-rows", type=int, default=20000, help="history seeded before the run")
+    parser.add_argument("--db", help="existing database to copy and load instead of a seeded one")
+    args = parser.parse_args()
+
+    db_options = {
+        "journal_mode": args.journal_mode,
+        "busy_timeout_ms": args.busy_timeout,
+        "wal_autocheckpoint": args.wal_autocheckpoint,
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "load.db")
+        if args.db:
+            # The workload writes sales and orders, so never run it against the file itself;
+            # the backup API also picks up commits still in the source's WAL
+            copy_database(args.db, db_path, pause=0)
+        else:
+            db = Database(db_path, pool_size=1, **db_options)
+            with db.connection() as conn:
+                seed(conn, args.sales_rows, menu_items=MENU_ITEMS, cart_rows=0)
+                conn.execute("UPDATE menu SET quantity = 1000000")
+            db.close()
+
+        latencies, errors, retries, elapsed = run(
+            db_path, args.terminals, args.duration, args.poll_interval, db_options
+        )
+
+    print(f"{args.terminals} terminals + 1 admin, journal_mode={args.journal_mode}, "
+          f"busy_timeout={args.busy_timeout}ms, {elapsed:.1f}s wall")
+    print(f"{'operation':<18}{'count':>8}{'ops/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name in ("add_to_cart", "confirm_order", "get_sales", "get_total_sales"):
+        values = sorted(latencies.get(name, []))
+        print(f"{name:<18}{len(values):>8}{len(values) / args.duration:>10.1f}"
+              f"{percentile(values, 50):>10.2f}{percentile(values, 99):>10.2f}"
+              f"{(values[-1] if values else 0):>10.2f}")
+    print(f"errors={errors} busy_retries={retries}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""Headless benchmark suite for the data-access hot paths, with baseline JSON comparison.
+
+Run from the repository root:
+    python -m benchmarks.suite --sales 1000000 --save-baseline baseline.json
+    python -m benchmarks.suite --sales 1000000 --baseline baseline.json    # exits 1 on a regression
+
+Operations run against a copy of the dataset (generated by benchmarks.datagen, or
+--db), so the same dataset can be reused between runs and is never modified.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from datetime import date, timedelta
+
+from auth import Authenticator
+from benchmarks import percentile
+from benchmarks.datagen import generate
+from change_feed import ChangeFeed
+from checkout import CheckoutEngine
+from database import Database
+from forecasting import forecast_demand
+from insights import InsightsEngine
+from session_cart import InventoryLedger, SessionCart
+
+# Allowed slowdown against the baseline before a result counts as a regression
+TOLERANCE = 0.25
+
+# setup() runs untimed before each call of run(); max_calls caps deliberately slow operations
+Operation = namedtuple("Operation", ["name", "run", "setup", "max_calls"], defaults=(None,))
+
+
+def build_operations(db, journal_dir, seed=7):
+    rng = random.Random(seed)
+    with db.connection() as conn:
+        items = [row[0] for row in conn.execute("SELECT item_name FROM menu ORDER BY id")]
+    engine = CheckoutEngine(db)
+    insights = InsightsEngine(db)
+    ledger = InventoryLedger(db)
+    authenticator = Authenticator(db)
+    feed = ChangeFeed(db)
+    authenticator.sign_up("bench_cashier", "bench password", "Customer")
+    cart = SessionCart("bench_session", db=db, ledger=ledger, engine=engine, journal_dir=journal_dir)
+    today = date.today()
+
+    def fill_cart(username, lines=3):
+        for _ in range(lines):
+            db.add_to_cart(username, rng.choice(items))
+
+    def sign_in():
+        return authenticator.sign_in("bench_cashier", "bench password", "Customer")
+
+    def fill_session_cart(lines=5):
+        for _ in range(lines):
+            cart.add(rng.choice(items), 10.0)
+
+    return [
+        Operation("add_to_cart", lambda: db.add_to_cart(f"bench_{rng.randrange(50)}", rng.choice(items)), None),
+        Operation("session_cart_flush", cart.flush, fill_session_cart),
+        Operation("confirm_order", lambda: engine.checkout("bench_checkout"), lambda: fill_cart("bench_checkout")),
+        Operation("get_trending_items", lambda: db.get_trending_items(5), None),
+        Operation("trending_last_7_days", lambda: db.get_trending_items(5, today - timedelta(days=6), today), None),
+        Operation("trending_last_90_days", lambda: db.get_trending_items(5, today - timedelta(days=89), today), None),
+        Operation("get_total_sales", db.get_total_sales, None),
+        Operation("get_inventory_stats", insights._compute_inventory_stats, None),
+        Operation("inventory_stats_cached", insights.inventory_stats, None),
+        Operation("demand_forecast", lambda: forecast_demand(db), None),
+        Operation("top_basket_pairs", lambda: insights._bought_together(10, None), None),
+        Operation("basket_partners", lambda: insights._bought_together(10, rng.choice(items)), None),
+        Operation("get_low_stock_items", db.get_low_stock_items, None),
+        Operation("get_menu_page", lambda: db.get_menu_page(None, 200), None),
+        Operation("get_sales_page", lambda: db.get_sales_page(None, 200), None),
+        Operation("menu_feed_poll", feed.poll, None),
+        Operation("get_comments_page", lambda: db.get_comments_page(None, 50), None),
+        Operation("search_comments", lambda: db.get_comments_page(None, 50, rng.choice(items).split()[0]), None),
+        Operation("sign_in", sign_in, authenticator.forget, max_calls=20),
+        Operation("sign_in_cached", sign_in, None),
+    ]
+
+
+def measure(operation, iterations, warmup):
+    if operation.max_calls:
+        iterations = min(iterations, operation.max_calls)
+        warmup = min(warmup, 1)
+    latencies = []
+    for index in range(warmup + iterations):
+        if operation.setup:
+            operation.setup()
+        start = time.perf_counter()
+        operation.run()
+        elapsed = (time.perf_counter() - start) * 1000
+        if index >= warmup:
+            latencies.append(elapsed)
+    latencies.sort()
+    busy = sum(latencies)
+    return {
+        "count": len(latencies),
+        "ops_per_sec": len(latencies) / busy * 1000 if busy else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": latencies[-1] if latencies else 0.0,
+    }
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Return {operation: reason} for every result that is slower than the baseline allows."""
+    regressions = {}
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if result["p50_ms"] > base["p50_ms"] * (1 + tolerance):
+            regressions[name] = f"p50 {base['p50_ms']:.3f} -> {result['p50_ms']:.3f} ms"
+        elif result["ops_per_sec"] < base["ops_per_sec"] * (1 - tolerance):
+            regressions[name] = f"ops/s {base['ops_per_sec']:.0f} -> {result['ops_per_sec']:.0f}"
+    return regressions
+
+
+def prepare_dataset(args, workdir):
+    path = os.path.join(workdir, "bench.db")
+    if args.db:
+        shutil.copy(args.db, path)
+        meta = {"source": os.path.abspath(args.db)}
+    else:
+        db = Database(path, pool_size=1)
+        start = time.perf_counter()
+        meta = generate(
+            db, menu_items=args.menu_items, users=args.users, sales=args.sales,
+            cart_rows=args.cart_rows, seed=args.seed,
+        )
+        db.close()
+        print(f"Generated dataset in {time.perf_counter() - start:.1f}s: "
+              + ", ".join(f"{count:,} {table}" for table, count in meta.items()))
+    db = Database(path)
+    # Writes in the suite must never run out of stock
+    with db.transaction() as conn:
+        conn.execute("UPDATE menu SET quantity = 1000000")
+    return db, meta
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="existing dataset to copy instead of generating one")
+    parser.add_argument("--menu-items", type=int, default=500)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--sales", type=int, default=100000)
+    parser.add_argument("--cart-rows", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--iterations", type=int, default=200, help="timed calls per operation")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--only", help="comma-separated operation names")
+    parser.add_argument("--save-baseline", metavar="PATH", help="write the results as a baseline JSON file")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="allowed slowdown, 0.25 = 25%%")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db, dataset = prepare_dataset(args, workdir)
+        operations = build_operations(db, os.path.join(workdir, "journal"))
+        if args.only:
+            wanted = set(args.only.split(","))
+            operations = [operation for operation in operations if operation.name in wanted]
+        results = {operation.name: measure(operation, args.iterations, args.warmup) for operation in operations}
+        db.close()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            saved = json.load(f)
+        baseline = saved["results"]
+        if saved.get("dataset") != dataset:
+            print(f"warning: baseline dataset {saved.get('dataset')} differs from {dataset}", file=sys.stderr)
+    regressions = compare(results, baseline, args.tolerance)
+
+    print(f"{'operation':<24}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+          + (f"{'vs base':>10}" if baseline else ""))
+    for name, result in results.items():
+        line = (f"{name:<24}{result['ops_per_sec']:>10.0f}{result['p50_ms']:>10.3f}{result['p95_ms']:>10.3f}"
+                f"{result['p99_ms']:>10.3f}{result['max_ms']:>10.3f}")
+        if name in baseline:
+            change = (result["p50_ms"] / baseline[name]["p50_ms"] - 1) * 100 if baseline[name]["p50_ms"] else 0.0
+            line += f"{change:>+9.0f}%"
+        if name in regressions:
+            line += f"  REGRESSION ({regressions[name]})"
+        print(line)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "dataset": dataset,
+                "environment": {"python": platform.python_version(), "sqlite": sqlite3.sqlite_version},
+                "iterations": args.iterations,
+                "results": results,
+            }, f, indent=2)
+        print(f"Baseline written to {args.save_baseline}")
+
+    if regressions:
+        print(f"{len(regressions)} operation(s) regressed by more than {args.tolerance:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
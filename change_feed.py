@@ -0,0 +1,66 @@
+"""Tail the menu_changes log for row-level menu deltas and low-stock alerts.
+
+Triggers on the menu table append every insert, update and delete to menu_changes,
+whichever terminal or process made it. A ChangeFeed remembers the last change id it
+has seen and reads only newer rows, so a poll is one primary-key range scan and
+costs the same however large the menu is. menu_notifier.py drives a feed from the
+Qt event loop; this module has no UI dependency.
+"""
+import threading
+from collections import namedtuple
+
+from database import get_db
+
+LOW_STOCK_THRESHOLD = 3
+# More changes than this in one poll (a bulk import, say) are cheaper to reload than to patch
+BATCH_LIMIT = 500
+
+# changes: the latest change per menu row, oldest first; resync: re-read the menu instead
+FeedBatch = namedtuple("FeedBatch", ["changes", "low_stock", "resync"])
+
+
+def coalesce(changes):
+    """Fold several changes to one menu row into one carrying the earliest old_quantity."""
+    merged = {}
+    for change in changes:
+        first = merged.pop(change.menu_id, None)
+        if first is not None and change.op != "delete":
+            op = "insert" if first.op == "insert" else change.op
+            change = change._replace(op=op, old_quantity=first.old_quantity)
+        merged[change.menu_id] = change
+    return list(merged.values())
+
+
+def is_low_stock_alert(change, threshold=LOW_STOCK_THRESHOLD):
+    """A new item at or below the threshold, or stock that fell and is now at or below it."""
+    if change.op == "delete" or change.quantity > threshold:
+        return False
+    return change.old_quantity is None or change.quantity < change.old_quantity
+
+
+class ChangeFeed:
+    """Reads menu changes committed after a cursor; by default, after the feed was created."""
+
+    def __init__(self, db=None, after_id=None, threshold=LOW_STOCK_THRESHOLD, batch_limit=BATCH_LIMIT):
+        self.db = db or get_db()
+        self.threshold = threshold
+        self.batch_limit = batch_limit
+        self.cursor = self.db.get_latest_menu_change_id() if after_id is None else after_id
+        # Polls may run on worker threads; the cursor must advance one batch at a time
+        self._lock = threading.Lock()
+
+    def poll(self):
+        """Return a FeedBatch for everything since the last poll, or None when nothing changed."""
+        with self._lock:
+            oldest, changes = self.db.get_menu_changes(self.cursor, self.batch_limit + 1)
+            if not changes:
+                return None
+            # Entries after the cursor were pruned: patches would be incomplete
+            missed = oldest is not None and oldest > self.cursor + 1
+            if missed or len(changes) > self.batch_limit:
+                self.cursor = self.db.get_latest_menu_change_id()
+                return FeedBatch([], [], True)
+            self.cursor = changes[-1].id
+        latest = coalesce(changes)
+        alerts = [change for change in latest if is_low_stock_alert(change, self.threshold)]
+        return FeedBatch(latest, alerts, False)
@@ -0,0 +1,186 @@
+"""Atomic checkout: moves a cart into sales inside one BEGIN IMMEDIATE transaction."""
+import random
+import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+
+from database import get_db
+from instrumentation import timed
+
+MAX_RETRIES = 5
+RETRY_BASE_DELAY = 0.01
+LATENCY_WINDOW = 1000
+
+
+class CheckoutError(Exception):
+    pass
+
+
+class EmptyCartError(CheckoutError):
+    pass
+
+
+class StockError(CheckoutError):
+    def __init__(self, items):
+        super().__init__(f"Not enough stock for: {', '.join(items)}")
+        self.items = items
+
+
+@dataclass(frozen=True)
+class ReceiptLine:
+    item_name: str
+    price: float
+    quantity: int
+
+    @property
+    def subtotal(self):
+        return self.price * self.quantity
+
+
+@dataclass(frozen=True)
+class Receipt:
+    order_id: int
+    sold_at: str
+    username: str
+    lines: tuple
+    total: float
+    attempts: int
+    latency_ms: float
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def is_busy_error(exc):
+    code = getattr(exc, "sqlite_errorcode", None)
+    if code is not None:
+        return code in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    return "locked" in str(exc) or "busy" in str(exc)
+
+
+class CheckoutMetrics:
+    """Thread-safe checkout counters plus a rolling window of latencies."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.checkouts = 0
+        self.failures = 0
+        self.busy_retries = 0
+
+    def record_success(self, latency_ms):
+        with self._lock:
+            self.checkouts += 1
+            self._latencies.append(latency_ms)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+
+    def record_retry(self):
+        with self._lock:
+            self.busy_retries += 1
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            return {
+                "checkouts": self.checkouts,
+                "failures": self.failures,
+                "busy_retries": self.busy_retries,
+                "p50_ms": percentile(latencies, 50),
+                "p95_ms": percentile(latencies, 95),
+                "p99_ms": percentile(latencies, 99),
+                "max_ms": latencies[-1] if latencies else 0.0,
+            }
+
+
+class CheckoutEngine:
+    def __init__(self, db=None, max_retries=MAX_RETRIES):
+        self.db = db or get_db()
+        self.max_retries = max_retries
+        self.metrics = CheckoutMetrics()
+
+    @timed("op", "checkout")
+    def checkout(self, username):
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                order_id, sold_at, lines = self._checkout_once(username)
+                break
+            except sqlite3.OperationalError as exc:
+                if not is_busy_error(exc) or attempt > self.max_retries:
+                    self.metrics.record_failure()
+                    raise
+                self.metrics.record_retry()
+                # Exponential backoff with jitter so competing terminals spread out
+                time.sleep(RETRY_BASE_DELAY * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
+            except CheckoutError:
+                self.metrics.record_failure()
+                raise
+
+        latency_ms = (time.perf_counter() - start) * 1000
+        self.metrics.record_success(latency_ms)
+        lines = tuple(ReceiptLine(*line) for line in lines)
+        return Receipt(
+            order_id=order_id,
+            sold_at=sold_at,
+            username=username,
+            lines=lines,
+            total=sum(line.subtotal for line in lines),
+            attempts=attempt,
+            latency_ms=latency_ms,
+        )
+
+    def _checkout_once(self, username):
+        # IMMEDIATE takes the write lock up front, so we never fail halfway through on upgrade
+        with self.db.transaction(immediate=True) as conn:
+            lines = conn.execute(
+                "SELECT item_name, price, quantity FROM cart WHERE username = ? ORDER BY id", (username,)
+            ).fetchall()
+            if not lines:
+                raise EmptyCartError("Cart is empty")
+
+            # Stock was reserved by add_to_cart; make sure every line still has a backing menu row
+            invalid = conn.execute("""
+                SELECT c.item_name
+                FROM cart c
+                LEFT JOIN menu m ON m.item_name = c.item_name COLLATE NOCASE
+                WHERE c.username = ? AND (m.id IS NULL OR m.quantity < 0)
+            """, (username,)).fetchall()
+            if invalid:
+                raise StockError([row[0] for row in invalid])
+
+            # Local time, the same clock the date-range filters use
+            sold_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            order_id = conn.execute("""
+                INSERT INTO orders (username, created_at, total)
+                SELECT ?, ?, SUM(price * quantity) FROM cart WHERE username = ?
+            """, (username, sold_at, username)).lastrowid
+            conn.execute("""
+                INSERT INTO sales (username, item_name, price, quantity, order_id, sold_at)
+                SELECT username, item_name, price, quantity, ?, ? FROM cart WHERE username = ? ORDER BY id
+            """, (order_id, sold_at, username))
+            conn.execute("DELETE FROM cart WHERE username = ?", (username,))
+        return order_id, sold_at, lines
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_checkout_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = CheckoutEngine()
+        return _engine
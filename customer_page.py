@@ -1,14 +1,23 @@
 from PyQt5.QtWidgets import (
-    QApplication, QMainWindow, QLabel, QPushButton, QTableWidget, QTableWidgetItem,
-    QVBoxLayout, QHBoxLayout, QWidget, QTextEdit, QFrame, QMessageBox
+    QMainWindow, QLabel, QPushButton, QTableView, QAbstractItemView,
+    QVBoxLayout, QHBoxLayout, QWidget, QTextEdit, QFrame, QMessageBox, QLineEdit
 )
-from PyQt5.QtGui import QFont, QPixmap, QPalette, QBrush
-from PyQt5.QtCore import Qt, QEvent
-import sys
-from logging import LoggingWindow
+from PyQt5.QtGui import QFont
+from PyQt5.QtCore import Qt, QEvent, QTimer
 import sqlite3
+from login import LoggingWindow
+from database import get_db
+from checkout import CheckoutError
+from session_cart import SessionCart, get_ledger
+from table_models import QueryTableModel, SearchFilterProxyModel
+from menu_notifier import get_menu_notifier
+from db_worker import QueryExecutor
+from instrumentation import timed
+from services import get_service
+from navigation import LOGIN_SCREEN, apply_background, get_window_stack
+
+CART_FLUSH_INTERVAL_MS = 3000
 
-DB_PATH = "restaurant.db"
 
 class CustomerHome(QMainWindow):
     def __init__(self, username):
@@ -17,6 +26,8 @@ class CustomerHome(QMainWindow):
         self.setWindowTitle("Customer Home")
         self.setGeometry(100, 100, 1400, 900)
         self.setFixedSize(1400, 900)
+        self.executor = QueryExecutor(self)
+        self.cart = None
 
         self.set_background("bg.jpg")
 
@@ -29,10 +40,18 @@ class CustomerHome(QMainWindow):
         self.welcome_label.setAlignment(Qt.AlignCenter)
 
         # Menu Table
-        self.menu_table = QTableWidget(0, 3)
-        self.menu_table.setHorizontalHeaderLabels(["Item", "Price", "Quantity"])
+        self.menu_model = QueryTableModel(["Item", "Price", "Quantity"], self.fetch_menu_page, executor=self.executor)
+        self.menu_proxy = SearchFilterProxyModel()
+        self.menu_proxy.setSourceModel(self.menu_model)
+        self.menu_search = QLineEdit()
+        self.menu_search.setPlaceholderText("Search menu...")
+        self.menu_search.setClearButtonEnabled(True)
+        self.menu_search.textChanged.connect(self.menu_proxy.set_query)
+        self.menu_table = QTableView()
+        self.menu_table.setModel(self.menu_proxy)
+        self.menu_table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.menu_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: rgba(255, 255, 255, 150);
                 color: black;
                 gridline-color: gray;
@@ -45,16 +64,23 @@ class CustomerHome(QMainWindow):
         """)
         self.menu_table.verticalHeader().setVisible(False)
         self.load_menu_items()
+        notifier = get_menu_notifier()
+        notifier.menuChanged.connect(self.apply_menu_changes)
+        notifier.resyncNeeded.connect(self.load_menu_items)
 
         # Add to Cart button
         self.add_to_cart_btn = QPushButton("Add to Cart")
+        self.add_to_cart_btn.setEnabled(False)
         self.add_to_cart_btn.clicked.connect(self.handle_add_to_cart)
 
         # Cart Table
-        self.cart_table = QTableWidget(0, 3)
-        self.cart_table.setHorizontalHeaderLabels(["Item", "Price", "Quantity"])
+        # The cart lives in memory, so its model reads it directly without the executor
+        self.cart_model = QueryTableModel(["Item", "Price", "Quantity"], self.fetch_cart_page)
+        self.cart_table = QTableView()
+        self.cart_table.setModel(self.cart_model)
+        self.cart_table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.cart_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: rgba(255, 255, 255, 150);
                 color: black;
                 gridline-color: gray;
@@ -102,7 +128,11 @@ class CustomerHome(QMainWindow):
         menu_layout = QVBoxLayout()
         menu_label = QLabel("Menu")
         menu_label.setStyleSheet("color: white; font-weight: bold;")
+        self.menu_model.loadingChanged.connect(
+            lambda loading: menu_label.setText("Menu (loading...)" if loading else "Menu")
+        )
         menu_layout.addWidget(menu_label)
+        menu_layout.addWidget(self.menu_search)
         menu_layout.addWidget(self.menu_table)
         menu_layout.addWidget(self.add_to_cart_btn)
 
@@ -122,151 +152,181 @@ class CustomerHome(QMainWindow):
 
         central_widget.setLayout(main_layout)
 
+        # Loading the session cart replays any journal left by a crashed session
+        self.total_label.setText("Total = loading...")
+        self.executor.submit(None, SessionCart, self.username, on_result=self.cart_ready, on_error=self.show_db_error)
+
+        self.flush_timer = QTimer(self)
+        self.flush_timer.timeout.connect(self.flush_cart)
+        self.flush_timer.start(CART_FLUSH_INTERVAL_MS)
+
+    def cart_ready(self, cart):
+        self.cart = cart
+        self.add_to_cart_btn.setEnabled(True)
+        # Replayed journal entries hold reservations, so re-read the menu net of them
+        self.load_menu_items()
         self.refresh_cart_table()
 
     def set_background(self, image_path):
-        background = QPixmap(image_path)
-        if background.isNull():
+        if not apply_background(self, image_path):
             print("Background image not found.")
-            return
-        palette = QPalette()
-        palette.setBrush(QPalette.Window, QBrush(background.scaled(self.size(), Qt.IgnoreAspectRatio, Qt.SmoothTransformation)))
-        self.setPalette(palette)
 
     def get_menu(self):
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        c.execute("SELECT item_name, price, quantity FROM menu")
-        items = c.fetchall()
-        conn.close()
-        return items
+        return get_db().get_menu()
+
+    def fetch_menu_page(self, after, limit):
+        # Show what is left after this terminal's unflushed reservations
+        ledger = get_ledger()
+        rows = []
+        for item_id, name, price, quantity in get_db().get_menu_page(after, limit):
+            ledger.observe(name, quantity)
+            rows.append((item_id, name, price, ledger.available(name)))
+        return rows
+
+    def fetch_cart_page(self, after, limit):
+        return self.cart.page(after, limit) if self.cart else []
 
     def load_menu_items(self):
-        items = self.get_menu()
-        self.menu_table.setRowCount(len(items))
-        for row_idx, (name, price, quantity) in enumerate(items):
-            self.menu_table.setItem(row_idx, 0, QTableWidgetItem(str(name)))
-            self.menu_table.setItem(row_idx, 1, QTableWidgetItem(str(price)))
-            self.menu_table.setItem(row_idx, 2, QTableWidgetItem(str(quantity)))
+        self.menu_model.refresh()
+
+    def apply_menu_changes(self, changes):
+        # Stock written by any terminal, shown net of this terminal's unflushed reservations
+        ledger = get_ledger()
+        updates = {}
+        for change in changes:
+            if change.op != "delete":
+                ledger.observe(change.item_name, change.quantity)
+                updates[change.menu_id] = (change.item_name, change.price, ledger.available(change.item_name))
+        self.menu_model.patch_rows(updates, [change.menu_id for change in changes if change.op == "delete"])
+
+    def update_menu_stock(self, item_name):
+        row = self.menu_model.find_row(0, item_name)
+        if row >= 0:
+            name, price, _ = self.menu_model.row_values(row)
+            self.menu_model.set_row_values(row, (name, price, get_ledger().available(name)))
 
     def handle_add_to_cart(self):
-        selected = self.menu_table.currentRow()
-        if selected < 0:
+        selected = self.menu_table.currentIndex()
+        if not selected.isValid():
             QMessageBox.warning(self, "No Selection", "Please select an item to add.")
             return
-        item_name = self.menu_table.item(selected, 0).text()
-        self.add_to_cart(self.username, item_name)
-        self.load_menu_items()
+        item_name, price, _ = self.menu_model.row_values(self.menu_proxy.mapToSource(selected).row())
+        if not self.add_to_cart(item_name, price):
+            QMessageBox.warning(self, "Out of Stock", f"{item_name} is out of stock.")
+            return
+        self.update_menu_stock(item_name)
         self.refresh_cart_table()
 
     def handle_delete_from_cart(self):
-        selected = self.cart_table.currentRow()
-        if selected < 0:
+        selected = self.cart_table.currentIndex()
+        if not selected.isValid():
             QMessageBox.warning(self, "No Selection", "Please select an item to delete.")
             return
-        item_name = self.cart_table.item(selected, 0).text()
-        self.delete_from_cart(self.username, item_name)
-        self.load_menu_items()
+        item_name = self.cart_model.row_values(selected.row())[0]
+        self.delete_from_cart(item_name)
+        self.update_menu_stock(item_name)
         self.refresh_cart_table()
 
+    def flush_cart(self):
+        if self.cart and self.cart.has_pending():
+            self.executor.submit(None, self.cart.flush, on_result=self.cart_flushed, on_error=self.show_db_error)
+
+    def cart_flushed(self, result):
+        if result.shortfalls:
+            self.show_shortfalls(result.shortfalls)
+            self.refresh_tables()
+
+    def show_shortfalls(self, shortfalls):
+        missing = ", ".join(f"{name} (-{qty})" for name, qty in shortfalls)
+        QMessageBox.warning(self, "Stock Changed", f"Some items sold out on another terminal: {missing}")
+
     def handle_confirm_order(self):
-        self.confirm_order(self.username)
-        QMessageBox.information(self, "Order Confirmed", "Your order has been placed!")
+        if not self.cart:
+            return
+        self.confirm_btn.setEnabled(False)
+        self.executor.submit(
+            None, self.confirm_order,
+            on_result=self.order_confirmed, on_error=self.order_failed,
+        )
+
+    def order_confirmed(self, result):
+        self.confirm_btn.setEnabled(True)
+        receipt, shortfalls = result
+        if shortfalls:
+            self.show_shortfalls(shortfalls)
+        else:
+            QMessageBox.information(self, "Order Confirmed", f"Your order has been placed! Total = ${receipt.total}")
+        self.refresh_tables()
+
+    def order_failed(self, error):
+        self.confirm_btn.setEnabled(True)
+        if isinstance(error, CheckoutError):
+            QMessageBox.warning(self, "Order Failed", str(error))
+        else:
+            self.show_db_error(error)
+        self.refresh_tables()
+
+    def show_db_error(self, error):
+        QMessageBox.warning(self, "Database Error", f"Something went wrong: {error}")
+
+    def refresh_tables(self):
+        # Menu rows arrive through the change feed; poll now so this terminal's own writes show at once
+        get_menu_notifier().poll_now()
         self.refresh_cart_table()
-        self.load_menu_items()
 
     def refresh_cart_table(self):
-        cart = self.get_cart(self.username)
-        self.cart_table.setRowCount(len(cart))
-        for row_idx, (item_name, quantity, price) in enumerate(cart):
-            self.cart_table.setItem(row_idx, 0, QTableWidgetItem(item_name))
-            self.cart_table.setItem(row_idx, 1, QTableWidgetItem(str(price)))
-            self.cart_table.setItem(row_idx, 2, QTableWidgetItem(str(quantity)))
-        total = self.calculate_total(self.username)
-        self.total_label.setText(f"Total = ${total}")
-
-    def add_to_cart(self, username, item_name):
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT price, quantity FROM menu WHERE item_name = ?", (item_name,))
-            item = cursor.fetchone()
-            if item and item[1] > 0:
-                price = item[0]
-                cursor.execute("SELECT quantity FROM cart WHERE username = ? AND item_name = ?", (username, item_name))
-                cart_item = cursor.fetchone()
-                if cart_item:
-                    new_qty = cart_item[0] + 1
-                    cursor.execute("UPDATE cart SET quantity = ? WHERE username = ? AND item_name = ?",
-                                   (new_qty, username, item_name))
-                else:
-                    cursor.execute("INSERT INTO cart (username, item_name, price, quantity) VALUES (?, ?, ?, ?)",
-                                   (username, item_name, price, 1))
-                cursor.execute("UPDATE menu SET quantity = quantity - 1 WHERE item_name = ?", (item_name,))
-                conn.commit()
-
-    def get_cart(self, username):
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT item_name, quantity, price FROM cart WHERE username = ?", (username,))
-            return cursor.fetchall()
-
-    def delete_from_cart(self, username, item_name):
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT quantity FROM cart WHERE username = ? AND item_name = ?", (username, item_name))
-            item = cursor.fetchone()
-            if item:
-                qty_to_restore = item[0]
-                cursor.execute("DELETE FROM cart WHERE username = ? AND item_name = ?", (username, item_name))
-                cursor.execute("UPDATE menu SET quantity = quantity + ? WHERE item_name = ?",
-                               (qty_to_restore, item_name))
-                conn.commit()
-
-    def calculate_total(self, username):
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT price, quantity FROM cart WHERE username = ?", (username,))
-            items = cursor.fetchall()
-            return sum(price * qty for price, qty in items)
-
-    def confirm_order(self, username):
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT item_name, price, quantity FROM cart WHERE username = ?", (username,))
-            cart_items = cursor.fetchall()
-            for item_name, price, quantity in cart_items:
-                cursor.execute("INSERT INTO sales (username, item_name, price, quantity) VALUES (?, ?, ?, ?)",
-                               (username, item_name, price, quantity))
-            cursor.execute("DELETE FROM cart WHERE username = ?", (username,))
-            conn.commit()
+        self.cart_model.refresh()
+        self.total_label.setText(f"Total = ${self.calculate_total()}")
+
+    @timed("op", "add_to_cart")
+    def add_to_cart(self, item_name, price):
+        return self.cart.add(item_name, price)
+
+    def get_cart(self):
+        return self.cart.lines()
+
+    def delete_from_cart(self, item_name):
+        return self.cart.remove(item_name)
+
+    def calculate_total(self):
+        return self.cart.total() if self.cart else 0
+
+    @timed("op", "confirm_order")
+    def confirm_order(self):
+        return self.cart.checkout()
 
     def eventFilter(self, obj, event):
         if obj == self.comment_input and event.type() == QEvent.KeyPress:
             if event.key() in (Qt.Key_Return, Qt.Key_Enter):
                 comment = self.comment_input.toPlainText().strip()
                 if comment:
-                    self.save_comment_to_db(comment)
                     self.comment_input.clear()
-                    QMessageBox.information(self, "Thank you!", "Your comment has been saved.")
+                    self.executor.submit(
+                        None, self.save_comment_to_db, comment,
+                        on_result=lambda _: QMessageBox.information(self, "Thank you!", "Your comment has been saved."),
+                        on_error=self.show_db_error,
+                    )
                 else:
                     QMessageBox.warning(self, "Empty", "Please enter a comment before submitting.")
                 return True
         return super().eventFilter(obj, event)
 
     def save_comment_to_db(self, comment):
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("INSERT INTO comments (comment) VALUES (?)", (comment,))
-            conn.commit()
+        get_service().add_comment(comment, self.username)
+
+    def closeEvent(self, event):
+        self.executor.cancel_all()
+        self.flush_timer.stop()
+        if self.cart:
+            try:
+                self.cart.flush()
+            except sqlite3.Error:
+                pass  # still in the journal, replayed on the next sign-in
+        super().closeEvent(event)
+
+    def screen_shown(self):
+        if self.cart:
+            self.refresh_tables()
 
     def logout(self):
-        self.login_window = LoggingWindow()
-        self.login_window.show()
-        self.close()
-
-if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = CustomerHome()
-    window.show()
-    sys.exit(app.exec_())
-
+        self.login_window = get_window_stack().reset(LOGIN_SCREEN, LoggingWindow)
@@ -0,0 +1,529 @@
+import os
+import queue
+import re
+import sqlite3
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import migrations
+from instrumentation import InstrumentedConnection, is_enabled
+
+DB_PATH = os.environ.get("RESTAURANT_DB", "restaurant.db")
+POOL_SIZE = 4
+STATEMENT_CACHE_SIZE = 128
+
+# Concurrency settings, overridable per terminal through the environment
+JOURNAL_MODE = os.environ.get("RESTAURANT_DB_JOURNAL_MODE", "WAL")
+BUSY_TIMEOUT_MS = int(os.environ.get("RESTAURANT_DB_BUSY_TIMEOUT_MS", "5000"))
+# Pages of WAL after which a committing connection runs a passive checkpoint
+WAL_AUTOCHECKPOINT = int(os.environ.get("RESTAURANT_DB_WAL_AUTOCHECKPOINT", "1000"))
+
+# Applied once per pooled connection when it is opened
+PRAGMAS = (
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -8000",
+)
+
+_MAX_ROWID = 2 ** 63 - 1
+_WORD_RE = re.compile(r"\w+")
+
+MenuItem = namedtuple("MenuItem", ["item_name", "price", "quantity"])
+SaleRow = namedtuple("SaleRow", ["item_name", "price", "quantity"])
+CartLine = namedtuple("CartLine", ["item_name", "quantity", "price"])
+TrendingItem = namedtuple("TrendingItem", ["item_name", "total_qty"])
+User = namedtuple("User", ["id", "username", "role"])
+Comment = namedtuple("Comment", ["id", "created_at", "author", "comment"])
+# baskets: orders containing both items; item_baskets/partner_baskets: orders containing each
+BasketPair = namedtuple("BasketPair", ["item_name", "partner", "baskets", "item_baskets", "partner_baskets"])
+MenuChange = namedtuple(
+    "MenuChange", ["id", "menu_id", "op", "item_name", "price", "quantity", "old_quantity", "category"]
+)
+
+
+class Database:
+    """Shared data-access layer over a small pool of long-lived connections."""
+
+    def __init__(self, path=DB_PATH, pool_size=POOL_SIZE, journal_mode=JOURNAL_MODE,
+                 busy_timeout_ms=BUSY_TIMEOUT_MS, wal_autocheckpoint=WAL_AUTOCHECKPOINT):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.wal_autocheckpoint = wal_autocheckpoint
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        # Slots start empty and are filled with a real connection on first use
+        for _ in range(pool_size):
+            self._pool.put(None)
+        with self.connection() as conn:
+            # journal_mode is stored in the file, so every terminal sees the same mode
+            self.journal_mode = conn.execute(f"PRAGMA journal_mode = {journal_mode}").fetchone()[0]
+            self.schema_version = migrations.migrate(conn)
+
+    def _open(self):
+        conn = sqlite3.connect(
+            self.path,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            factory=InstrumentedConnection if is_enabled() else sqlite3.Connection,
+        )
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        conn.execute(f"PRAGMA wal_autocheckpoint = {int(self.wal_autocheckpoint)}")
+        # NORMAL is durable across application crashes in WAL mode and skips an fsync per commit
+        conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        conn = self._pool.get()
+        try:
+            if conn is None:
+                conn = self._open()
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    @contextmanager
+    def transaction(self, immediate=False):
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                # A failed COMMIT (e.g. SQLITE_BUSY) leaves the transaction open; never pool it like that
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+
+    def checkpoint(self, mode="PASSIVE"):
+        """Run a WAL checkpoint; returns (busy, wal_pages, checkpointed_pages)."""
+        if mode.upper() not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+            raise ValueError(f"Unknown checkpoint mode: {mode}")
+        with self.connection() as conn:
+            return conn.execute(f"PRAGMA wal_checkpoint({mode.upper()})").fetchone()
+
+    def close(self):
+        if self.journal_mode == "wal":
+            # Leave a small WAL behind; ignore failures if another terminal holds it
+            try:
+                self.checkpoint("TRUNCATE")
+            except sqlite3.Error:
+                pass
+        for _ in range(self._pool.maxsize):
+            conn = self._pool.get()
+            if conn is not None:
+                conn.close()
+        for _ in range(self._pool.maxsize):
+            self._pool.put(None)
+
+    # --- Menu
+    def get_menu(self):
+        with self.connection() as conn:
+            rows = conn.execute("SELECT item_name, price, quantity FROM menu").fetchall()
+        return [MenuItem(*row) for row in rows]
+
+    def get_menu_page(self, after_id=None, limit=200):
+        with self.connection() as conn:
+            rows = conn.execute(
+                "SELECT id, item_name, price, quantity FROM menu WHERE id > ? ORDER BY id LIMIT ?",
+                (after_id or 0, limit),
+            ).fetchall()
+        return rows
+
+    def upsert_menu_item(self, item_name, price, quantity, category=None):
+        # Single index seek on idx_menu_item_name instead of a LOWER() scan;
+        # an existing item keeps its category unless a new one is given
+        with self.transaction() as conn:
+            conn.execute("""
+                INSERT INTO menu (item_name, price, quantity, category)
+                VALUES (:name, :price, :quantity, COALESCE(:category, 'General'))
+                ON CONFLICT (item_name COLLATE NOCASE) DO UPDATE
+                SET price    = excluded.price,
+                    quantity = quantity + excluded.quantity,
+                    category = COALESCE(:category, category)
+            """, {"name": item_name, "price": price, "quantity": quantity, "category": category})
+
+    def bulk_upsert_menu_items(self, items, add_stock=True):
+        """Upsert (item_name, price, quantity, category) rows with one executemany in one transaction.
+
+        With add_stock the quantity is added to existing stock (a delivery), otherwise it
+        replaces it (a new menu). A None category keeps the existing one.
+        """
+        stock = "quantity + excluded.quantity" if add_stock else "excluded.quantity"
+        with self.transaction(immediate=True) as conn:
+            conn.executemany(f"""
+                INSERT INTO menu (item_name, price, quantity, category)
+                VALUES (?1, ?2, ?3, COALESCE(?4, 'General'))
+                ON CONFLICT (item_name COLLATE NOCASE) DO UPDATE
+                SET price    = excluded.price,
+                    quantity = {stock},
+                    category = COALESCE(?4, category)
+            """, items)
+
+    def get_low_stock_items(self, threshold=3):
+        with self.connection() as conn:
+            rows = conn.execute(
+                "SELECT item_name, price, quantity FROM menu WHERE quantity <= ?", (threshold,)
+            ).fetchall()
+        return [MenuItem(*row) for row in rows]
+
+    # --- Cart
+    def add_to_cart(self, username, item_name, quantity=1):
+        with self.transaction(immediate=True) as conn:
+            # Reserve stock with one conditional update so two terminals can't both take the last unit
+            reserved = conn.execute(
+                "UPDATE menu SET quantity = quantity - ? WHERE item_name = ? COLLATE NOCASE AND quantity >= ?",
+                (quantity, item_name, quantity),
+            ).rowcount
+            if not reserved:
+                return False
+            # Cart and sales lines use the menu's spelling, whatever case the caller typed
+            item_name, price = conn.execute(
+                "SELECT item_name, price FROM menu WHERE item_name = ? COLLATE NOCASE", (item_name,)
+            ).fetchone()
+            updated = conn.execute(
+                "UPDATE cart SET quantity = quantity + ? WHERE username = ? AND item_name = ?",
+                (quantity, username, item_name),
+            ).rowcount
+            if not updated:
+                conn.execute(
+                    "INSERT INTO cart (username, item_name, price, quantity) VALUES (?, ?, ?, ?)",
+                    (username, item_name, price, quantity),
+                )
+        return True
+
+    def get_cart(self, username):
+        with self.connection() as conn:
+            rows = conn.execute(
+                "SELECT item_name, quantity, price FROM cart WHERE username = ? ORDER BY id", (username,)
+            ).fetchall()
+        return [CartLine(*row) for row in rows]
+
+    def get_cart_page(self, username, after_id=None, limit=200):
+        with self.connection() as conn:
+            rows = conn.execute(
+                "SELECT id, item_name, price, quantity FROM cart WHERE username = ? AND id > ? ORDER BY id LIMIT ?",
+                (username, after_id or 0, limit),
+            ).fetchall()
+        return rows
+
+    def delete_from_cart(self, username, item_name):
+        # Reads then writes: a deferred BEGIN could fail the upgrade with SQLITE_BUSY_SNAPSHOT, which is never retried
+        with self.transaction(immediate=True) as conn:
+            item = conn.execute(
+                "SELECT quantity FROM cart WHERE username = ? AND item_name = ?", (username, item_name)
+            ).fetchone()
+            if not item:
+                return False
+            conn.execute("DELETE FROM cart WHERE username = ? AND item_name = ?", (username, item_name))
+            conn.execute(
+                "UPDATE menu SET quantity = quantity + ? WHERE item_name = ? COLLATE NOCASE", (item[0], item_name)
+            )
+        return True
+
+    def get_cart_flush_seq(self, username):
+        with self.connection() as conn:
+            row = conn.execute("SELECT seq FROM cart_flush_state WHERE username = ?", (username,)).fetchone()
+        return row[0] if row else 0
+
+    def apply_cart_changes(self, username, changes, seq):
+        """Apply a batch of (item_name, price, delta) cart changes in one transaction.
+
+        Returns how many units of each change were applied; a positive delta can be
+        cut short when another terminal already took the stock.
+        """
+        applied = []
+        with self.transaction(immediate=True) as conn:
+            for item_name, price, delta in changes:
+                if delta > 0:
+                    taken = delta
+                    if not conn.execute(
+                        "UPDATE menu SET quantity = quantity - ? WHERE item_name = ? COLLATE NOCASE AND quantity >= ?",
+                        (delta, item_name, delta),
+                    ).rowcount:
+                        row = conn.execute(
+                            "SELECT quantity FROM menu WHERE item_name = ? COLLATE NOCASE", (item_name,)
+                        ).fetchone()
+                        taken = max(0, min(delta, row[0] if row else 0))
+                        if taken:
+                            conn.execute(
+                                "UPDATE menu SET quantity = quantity - ? WHERE item_name = ? COLLATE NOCASE",
+                                (taken, item_name),
+                            )
+                else:
+                    taken = delta
+                    conn.execute(
+                        "UPDATE menu SET quantity = quantity - ? WHERE item_name = ? COLLATE NOCASE",
+                        (delta, item_name),
+                    )
+                applied.append(taken)
+                if not taken:
+                    continue
+                if not conn.execute(
+                    "UPDATE cart SET quantity = quantity + ? WHERE username = ? AND item_name = ?",
+                    (taken, username, item_name),
+                ).rowcount and taken > 0:
+                    conn.execute(
+                        "INSERT INTO cart (username, item_name, price, quantity) VALUES (?, ?, ?, ?)",
+                        (username, item_name, price, taken),
+                    )
+                conn.execute(
+                    "DELETE FROM cart WHERE username = ? AND item_name = ? AND quantity <= 0", (username, item_name)
+                )
+            conn.execute("""
+                INSERT INTO cart_flush_state (username, seq) VALUES (?, ?)
+                ON CONFLICT (username) DO UPDATE SET seq = excluded.seq
+            """, (username, seq))
+        return applied
+
+    def get_cart_total(self, username):
+        with self.connection() as conn:
+            total = conn.execute(
+                "SELECT SUM(price * quantity) FROM cart WHERE username = ?", (username,)
+            ).fetchone()[0]
+        return total or 0
+
+    # --- Sales
+    def get_sales(self):
+        with self.connection() as conn:
+            rows = conn.execute("SELECT item_name, price, quantity FROM sales").fetchall()
+        return [SaleRow(*row) for row in rows]
+
+    def get_sales_page(self, before_id=None, limit=200, start=None, end=None):
+        """Newest sales first, optionally limited to the inclusive date range [start, end].
+
+        Keyed on the rowid so deep pages don't pay for OFFSET; a date range is served
+        by idx_sales_sold_at, so its cost depends on the range, not the whole history.
+        """
+        clauses, params = [], []
+        if before_id is not None:
+            clauses.append("id < ?")
+            params.append(before_id)
+        if start is not None:
+            clauses.append("sold_at >= ?")
+            params.append(start.isoformat())
+        if end is not None:
+            clauses.append("sold_at < ?")
+            params.append((end + timedelta(days=1)).isoformat())
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self.connection() as conn:
+            rows = conn.execute(
+                f"SELECT id, item_name, price, quantity, COALESCE(sold_at, '') FROM sales {where} "
+                "ORDER BY id DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        return rows
+
+    def get_total_sales(self, start=None, end=None):
+        # All-time totals are maintained by triggers (see aggregates.py); ranges read the rollups
+        with self.connection() as conn:
+            if start is None and end is None:
+                row = conn.execute("SELECT total_revenue FROM sales_summary WHERE id = 1").fetchone()
+            else:
+                rollup, params = _rollup_query(start, end)
+                row = conn.execute(f"SELECT SUM(revenue) FROM ({rollup})", params).fetchone()
+        return (row[0] if row else None) or 0.0
+
+    def get_trending_items(self, limit=5, start=None, end=None):
+        with self.connection() as conn:
+            if start is None and end is None:
+                rows = conn.execute('''
+                    SELECT item_name, quantity
+                    FROM sales_item_totals
+                    WHERE quantity > 0
+                    ORDER BY quantity DESC
+                    LIMIT ?
+                ''', (limit,)).fetchall()
+            else:
+                rollup, params = _rollup_query(start, end)
+                rows = conn.execute(f'''
+                    SELECT item_name, SUM(quantity) AS total_qty
+                    FROM ({rollup})
+                    GROUP BY item_name
+                    HAVING total_qty > 0
+                    ORDER BY total_qty DESC
+                    LIMIT ?
+                ''', (*params, limit)).fetchall()
+        return [TrendingItem(*row) for row in rows]
+
+    # --- Market baskets
+    def get_basket_count(self):
+        with self.connection() as conn:
+            row = conn.execute("SELECT baskets FROM basket_summary WHERE id = 1").fetchone()
+        return row[0] if row else 0
+
+    def get_top_basket_pairs(self, limit=10):
+        """The pairs bought together most often, read from idx_basket_pairs_baskets."""
+        with self.connection() as conn:
+            rows = conn.execute("""
+                SELECT p.item_a, p.item_b, p.baskets, a.baskets, b.baskets
+                FROM basket_pairs p
+                JOIN basket_items a ON a.item_name = p.item_a
+                JOIN basket_items b ON b.item_name = p.item_b
+                ORDER BY p.baskets DESC
+                LIMIT ?
+            """, (limit,)).fetchall()
+        return [BasketPair(*row) for row in rows]
+
+    def get_basket_partners(self, item_name, limit=10):
+        """Items most often in the same order as item_name."""
+        with self.connection() as conn:
+            rows = conn.execute("""
+                SELECT ?1, p.partner, p.baskets, a.baskets, b.baskets
+                FROM (
+                    SELECT item_b AS partner, baskets FROM basket_pairs WHERE item_a = ?1
+                    UNION ALL
+                    SELECT item_a, baskets FROM basket_pairs WHERE item_b = ?1
+                ) p
+                JOIN basket_items a ON a.item_name = ?1
+                JOIN basket_items b ON b.item_name = p.partner
+                ORDER BY p.baskets DESC
+                LIMIT ?2
+            """, (item_name, limit)).fetchall()
+        return [BasketPair(*row) for row in rows]
+
+    # --- Change tracking
+    def get_data_versions(self):
+        with self.connection() as conn:
+            return dict(conn.execute("SELECT name, version FROM data_versions").fetchall())
+
+    def get_menu_changes(self, after_id=0, limit=500):
+        """Return (oldest retained change id, changes with id > after_id in id order).
+
+        A caller whose after_id is older than the oldest retained change has missed
+        pruned entries and must re-read the menu instead.
+        """
+        with self.connection() as conn:
+            oldest = conn.execute("SELECT MIN(id) FROM menu_changes").fetchone()[0]
+            rows = conn.execute(
+                "SELECT id, menu_id, op, item_name, price, quantity, old_quantity, category "
+                "FROM menu_changes WHERE id > ? ORDER BY id LIMIT ?",
+                (after_id, limit),
+            ).fetchall()
+        return oldest, [MenuChange(*row) for row in rows]
+
+    def get_latest_menu_change_id(self):
+        with self.connection() as conn:
+            return conn.execute("SELECT COALESCE(MAX(id), 0) FROM menu_changes").fetchone()[0]
+
+    # --- Comments
+    def get_comments_page(self, before_id=None, limit=50, query=None):
+        """Newest comments first, keyset-paged by id; `query` is matched by comments_fts.
+
+        Rows are (id, created_at, author, comment) with "" for the columns of comments
+        written before they were recorded.
+        """
+        match = _fts_query(query) if query else None
+        with self.connection() as conn:
+            if match is None:
+                rows = conn.execute("""
+                    SELECT id, COALESCE(created_at, ''), COALESCE(author, ''), comment
+                    FROM comments WHERE id < ? ORDER BY id DESC LIMIT ?
+                """, (before_id or _MAX_ROWID, limit)).fetchall()
+            else:
+                # FTS5 walks its rowids in descending order itself, so no sort is needed
+                rows = conn.execute("""
+                    SELECT c.id, COALESCE(c.created_at, ''), COALESCE(c.author, ''), c.comment
+                    FROM comments_fts
+                    JOIN comments c ON c.id = comments_fts.rowid
+                    WHERE comments_fts MATCH ? AND comments_fts.rowid < ?
+                    ORDER BY comments_fts.rowid DESC LIMIT ?
+                """, (match, before_id or _MAX_ROWID, limit)).fetchall()
+        return [Comment(*row) for row in rows]
+
+    def add_comment(self, comment, author=None):
+        # Local time, like sales.sold_at
+        created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT INTO comments (comment, author, created_at) VALUES (?, ?, ?)", (comment, author, created_at)
+            )
+
+    # --- Users
+    def get_credentials(self, username, role):
+        """Return (User, stored password hash) or None; served by idx_users_username_role."""
+        with self.connection() as conn:
+            row = conn.execute(
+                "SELECT id, username, role, password FROM users WHERE username = ? AND role = ?",
+                (username, role),
+            ).fetchone()
+        return (User(*row[:3]), row[3]) if row else None
+
+    def set_password_hash(self, user_id, password_hash):
+        with self.transaction() as conn:
+            conn.execute("UPDATE users SET password = ? WHERE id = ?", (password_hash, user_id))
+
+    def create_user(self, username, password_hash, role):
+        # The unique index makes this atomic: two terminals signing up the same name can't both win
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "INSERT INTO users (username, password, role) VALUES (?, ?, ?) "
+                "ON CONFLICT (username, role) DO NOTHING",
+                (username, password_hash, role),
+            )
+        return cursor.rowcount == 1
+
+
+def _fts_query(text):
+    """Turn free text into an FTS5 query: every word must match, each as a prefix.
+
+    Words are quoted, so FTS5 operators and punctuation typed by the user are literal.
+    Returns None when the text has no words to search for.
+    """
+    words = _WORD_RE.findall(text)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def _month_end(day):
+    next_month = (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return next_month - timedelta(days=1)
+
+
+def _rollup_segments(start, end):
+    """Split the inclusive date range into (table, low, high) pieces: whole months are
+    read from sales_monthly and the ragged edges from sales_daily."""
+    segments = []
+    month_start = start if start.day == 1 else _month_end(start) + timedelta(days=1)
+    months_end = end if end == _month_end(end) else end.replace(day=1) - timedelta(days=1)
+    if month_start > months_end:
+        return [("sales_daily", start.isoformat(), end.isoformat())]
+    if start < month_start:
+        segments.append(("sales_daily", start.isoformat(), (month_start - timedelta(days=1)).isoformat()))
+    segments.append(("sales_monthly", month_start.isoformat()[:7], months_end.isoformat()[:7]))
+    if months_end < end:
+        segments.append(("sales_daily", (months_end + timedelta(days=1)).isoformat(), end.isoformat()))
+    return segments
+
+
+def _rollup_query(start, end):
+    if start is None or end is None:
+        # Open-ended ranges: bounds that sort before/after every stored bucket
+        start_bucket = start.isoformat() if start else "0000-00-00"
+        end_bucket = end.isoformat() if end else "9999-99-99"
+        return (
+            "SELECT item_name, quantity, revenue FROM sales_daily WHERE bucket BETWEEN ? AND ?",
+            (start_bucket, end_bucket),
+        )
+    parts, params = [], []
+    for table, low, high in _rollup_segments(start, end):
+        parts.append(f"SELECT item_name, quantity, revenue FROM {table} WHERE bucket BETWEEN ? AND ?")
+        params.extend((low, high))
+    return " UNION ALL ".join(parts), tuple(params)
+
+
+_db = None
+_db_lock = threading.Lock()
+
+
+def get_db():
+    global _db
+    with _db_lock:
+        if _db is None:
+            _db = Database()
+        return _db
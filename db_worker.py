@@ -0,0 +1,105 @@
+"""Run database calls on a QThreadPool and deliver the results back on the GUI thread."""
+import itertools
+import sys
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from instrumentation import get_metrics, is_enabled
+
+
+class _TaskSignals(QObject):
+    finished = pyqtSignal(object, int, object)  # key, generation, result
+    failed = pyqtSignal(object, int, object)    # key, generation, exception
+
+
+class _QueryTask(QRunnable):
+    def __init__(self, executor, key, generation, fn, args, kwargs):
+        super().__init__()
+        self.executor = executor
+        # The executor dies with its screen (e.g. at logout); the signals must outlive it
+        self.signals = executor.signals
+        self.key = key
+        self.generation = generation
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self):
+        # Skip requests that were superseded while they sat in the queue
+        if not self.executor.is_current(self.key, self.generation):
+            return
+        try:
+            if is_enabled():
+                with get_metrics().timer("task", getattr(self.fn, "__qualname__", type(self.fn).__name__)):
+                    result = self.fn(*self.args, **self.kwargs)
+            else:
+                result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            self.signals.failed.emit(self.key, self.generation, e)
+        else:
+            self.signals.finished.emit(self.key, self.generation, result)
+
+
+class QueryExecutor(QObject):
+    """Submit callables by key; a newer submit with the same key cancels the older one.
+
+    Pass key=None for calls that must always run (writes) and never be superseded.
+    Callbacks always run on the thread that owns the executor.
+    """
+
+    def __init__(self, parent=None, pool=None):
+        super().__init__(parent)
+        self.pool = pool or QThreadPool.globalInstance()
+        # No Qt parent: running tasks keep the signals alive after the owning screen is deleted
+        self.signals = _TaskSignals()
+        self.signals.finished.connect(self._on_finished)
+        self.signals.failed.connect(self._on_failed)
+        self._generations = {}
+        self._callbacks = {}
+        self._unique_keys = itertools.count()
+
+    def submit(self, key, fn, *args, on_result=None, on_error=None, **kwargs):
+        if key is None:
+            key = ("unique", next(self._unique_keys))
+        generation = self._generations.get(key, 0) + 1
+        self._generations[key] = generation
+        self._callbacks[key] = (generation, on_result, on_error)
+        self.pool.start(_QueryTask(self, key, generation, fn, args, kwargs))
+        return key
+
+    def is_current(self, key, generation):
+        return self._generations.get(key) == generation
+
+    def is_pending(self, key):
+        return key in self._callbacks
+
+    def cancel(self, key):
+        self._generations[key] = self._generations.get(key, 0) + 1
+        self._callbacks.pop(key, None)
+
+    def cancel_all(self):
+        for key in list(self._callbacks):
+            self.cancel(key)
+
+    def _take_callbacks(self, key, generation):
+        callbacks = self._callbacks.get(key)
+        if callbacks is None or callbacks[0] != generation:
+            return None
+        del self._callbacks[key]
+        if isinstance(key, tuple) and key[0] == "unique":
+            self._generations.pop(key, None)
+        return callbacks
+
+    def _on_finished(self, key, generation, result):
+        callbacks = self._take_callbacks(key, generation)
+        if callbacks and callbacks[1]:
+            callbacks[1](result)
+
+    def _on_failed(self, key, generation, error):
+        callbacks = self._take_callbacks(key, generation)
+        if not callbacks:
+            return
+        if callbacks[2]:
+            callbacks[2](error)
+        else:
+            print(f"Background query failed: {error!r}", file=sys.stderr)
@@ -0,0 +1,237 @@
+"""Stream tables out of the database in constant memory as CSV, JSON Lines or Parquet.
+
+    python export.py --out exports/                          # every table as CSV
+    python export.py --tables sales,orders --format jsonl --out - --filter "sales:sold_at>=2026-10-01"
+    python export.py --tables sales,orders --since nightly.cursor --out exports/2026-10-18/
+
+Rows are read in id order with fetchmany(), so memory use depends on --chunk-size,
+not on the table size. With --since, only rows whose id is above the one stored in
+the cursor file are exported, and the file is advanced after a successful run.
+Ids only grow on insert, so this is meant for append-only tables such as sales and
+orders; updates to earlier menu or cart rows are not picked up.
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+
+from database import DB_PATH, Database
+
+CHUNK_SIZE = 5000
+# Exported tables and their columns; passwords never leave the database
+TABLES = {
+    "users": ("id", "username", "role"),
+    "menu": ("id", "item_name", "price", "quantity", "category"),
+    "cart": ("id", "username", "item_name", "price", "quantity"),
+    "orders": ("id", "username", "created_at", "total"),
+    "sales": ("id", "username", "item_name", "price", "quantity", "order_id", "sold_at"),
+    "comments": ("id", "created_at", "author", "comment"),
+}
+FORMATS = ("csv", "jsonl", "parquet")
+FILTER_OPERATORS = ("<=", ">=", "!=", "=", "<", ">")
+_FILTER_RE = re.compile(r"^(\w+):(\w+)\s*(<=|>=|!=|=|<|>)\s*(.*)$")
+
+
+class CsvSink:
+    def __init__(self, stream, columns):
+        self.writer = csv.writer(stream)
+        self.writer.writerow(columns)
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        pass
+
+
+class JsonlSink:
+    def __init__(self, stream, columns, table=None):
+        self.stream = stream
+        self.columns = columns
+        # On stdout several tables share one stream, so tag each line with its table
+        self.table = table
+
+    def write(self, rows):
+        for row in rows:
+            record = dict(zip(self.columns, row))
+            if self.table:
+                record = {"table": self.table, **record}
+            self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self):
+        pass
+
+
+class ParquetSink:
+    """One Parquet row group per chunk; needs the optional pyarrow package."""
+
+    def __init__(self, path, columns):
+        import pyarrow
+        import pyarrow.parquet
+
+        self.pyarrow = pyarrow
+        self.columns = columns
+        self.path = path
+        self.writer = None
+        self.parquet = pyarrow.parquet
+
+    def write(self, rows):
+        table = self.pyarrow.Table.from_pydict(
+            {name: [row[index] for row in rows] for index, name in enumerate(self.columns)}
+        )
+        if self.writer is None:
+            self.writer = self.parquet.ParquetWriter(self.path, table.schema)
+        elif table.schema != self.writer.schema:
+            # A chunk of all-NULL values infers a different type; cast to the first chunk's schema
+            table = table.cast(self.writer.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def parse_filter(text):
+    """Parse "table:column<op>value" into (table, column, op, value)."""
+    match = _FILTER_RE.match(text.strip())
+    if not match:
+        raise ValueError(f"Bad filter {text!r}; expected table:column<op>value with op in {FILTER_OPERATORS}")
+    table, column, op, value = match.groups()
+    if table not in TABLES:
+        raise ValueError(f"Unknown table in filter: {table}")
+    if column not in TABLES[table]:
+        raise ValueError(f"Unknown column {column!r} for {table}; choose from {', '.join(TABLES[table])}")
+    return table, column, op, value
+
+
+def iter_chunks(conn, table, after_id=0, filters=(), chunk_size=CHUNK_SIZE):
+    """Yield lists of at most chunk_size rows, in id order, with id > after_id."""
+    clauses, params = ["id > ?"], [after_id]
+    for column, op, value in filters:
+        # Column names and operators come from the allow-lists above, values are bound
+        clauses.append(f"{column} {op} ?")
+        params.append(value)
+    cursor = conn.execute(
+        f"SELECT {', '.join(TABLES[table])} FROM {table} WHERE {' AND '.join(clauses)} ORDER BY id",
+        params,
+    )
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield rows
+
+
+def open_sink(fmt, out, table, columns):
+    """Return (sink, file to close or None)."""
+    if out == "-":
+        if fmt == "parquet":
+            raise ValueError("Parquet output needs a directory, not stdout")
+        if fmt == "csv":
+            return CsvSink(sys.stdout, columns), None
+        return JsonlSink(sys.stdout, columns, table=table), None
+    path = os.path.join(out, f"{table}.{fmt}")
+    if fmt == "parquet":
+        return ParquetSink(path, columns), None
+    stream = open(path, "w", encoding="utf-8", newline="")
+    sink = CsvSink(stream, columns) if fmt == "csv" else JsonlSink(stream, columns)
+    return sink, stream
+
+
+def export(db, tables, fmt, out, filters=None, cursor=None, chunk_size=CHUNK_SIZE):
+    """Export each table; returns {table: (rows_written, last_id)}."""
+    filters = filters or {}
+    cursor = cursor or {}
+    results = {}
+    with db.connection() as conn:
+        # One read transaction so every table comes from the same snapshot
+        conn.execute("BEGIN")
+        try:
+            for table in tables:
+                if fmt == "csv" and out == "-":
+                    print(f"# {table}")
+                sink, stream = open_sink(fmt, out, table, TABLES[table])
+                written, last_id = 0, cursor.get(table, 0)
+                try:
+                    for rows in iter_chunks(conn, table, last_id, filters.get(table, ()), chunk_size):
+                        sink.write(rows)
+                        written += len(rows)
+                        last_id = rows[-1][0]
+                finally:
+                    sink.close()
+                    if stream:
+                        stream.close()
+                results[table] = (written, last_id)
+        finally:
+            conn.execute("COMMIT")
+    return results
+
+
+def load_cursor(path):
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_cursor(path, cursor):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(cursor, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--tables", default=",".join(TABLES), help="comma-separated, default: all")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--out", default="-", help="output directory, or - for stdout")
+    parser.add_argument(
+        "--filter", action="append", default=[], metavar="TABLE:COLUMN<OP>VALUE",
+        help="row filter such as sales:sold_at>=2026-10-01; repeatable",
+    )
+    parser.add_argument("--since", metavar="CURSOR_FILE", help="incremental export: only rows after the cursor")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    tables = [name.strip() for name in args.tables.split(",") if name.strip()]
+    unknown = [name for name in tables if name not in TABLES]
+    if unknown:
+        parser.error(f"unknown tables: {', '.join(unknown)}; choose from {', '.join(TABLES)}")
+    filters = {}
+    try:
+        for text in args.filter:
+            table, column, op, value = parse_filter(text)
+            filters.setdefault(table, []).append((column, op, value))
+    except ValueError as e:
+        parser.error(str(e))
+    if args.format == "parquet":
+        if args.out == "-":
+            parser.error("--format parquet needs --out DIR")
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error("--format parquet needs the optional pyarrow package (pip install pyarrow)")
+    if args.out != "-":
+        os.makedirs(args.out, exist_ok=True)
+
+    cursor = load_cursor(args.since)
+    db = Database(args.db, pool_size=1)
+    try:
+        results = export(db, tables, args.format, args.out, filters, cursor, args.chunk_size)
+    finally:
+        db.close()
+
+    if args.since:
+        cursor.update({table: last_id for table, (_written, last_id) in results.items()})
+        save_cursor(args.since, cursor)
+    for table, (written, last_id) in results.items():
+        print(f"{table}: {written:,} rows (last id {last_id})", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
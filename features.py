@@ -1,11 +1,27 @@
-import sys
 from PyQt5.QtWidgets import (
-    QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-    QPushButton, QListWidget, QFrame, QListWidgetItem
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel,
+    QPushButton, QListWidget, QFrame, QListWidgetItem, QComboBox
 )
-from PyQt5.QtGui import QFont, QPixmap
+from PyQt5.QtGui import QFont
 from PyQt5.QtCore import Qt
-import sqlite3
+from insights import DATE_RANGE_PRESETS, resolve_date_range
+from services import get_service
+from db_worker import QueryExecutor
+from menu_notifier import get_menu_notifier
+from navigation import get_window_stack, scaled_pixmap
+
+REORDER_LIST_SIZE = 20
+BASKET_LIST_SIZE = 10
+
+
+def format_hours(hours):
+    if hours <= 0:
+        return "sold out"
+    if hours < 1:
+        return "under 1 h to stockout"
+    if hours < 48:
+        return f"~{hours:.0f} h to stockout"
+    return f"~{hours / 24:.0f} days to stockout"
 
 
 class InsightsPage(QWidget):
@@ -14,11 +30,12 @@ class InsightsPage(QWidget):
         self.username = username
         self.setFixedSize(1400, 900)
         self.setWindowTitle("Restaurant Insights")
+        self.executor = QueryExecutor(self)
         self.setStyleSheet("color: white; font-size: 18px;")
 
         # Background image
         self.bg_label = QLabel(self)
-        self.bg_label.setPixmap(QPixmap("bg.jpg").scaled(self.size(), Qt.KeepAspectRatioByExpanding))
+        self.bg_label.setPixmap(scaled_pixmap("bg.jpg", self.size(), Qt.KeepAspectRatioByExpanding))
         self.bg_label.setGeometry(0, 0, 1400, 900)
         self.bg_label.lower()
 
@@ -26,8 +43,15 @@ class InsightsPage(QWidget):
         layout.setContentsMargins(30, 30, 30, 30)
         layout.setSpacing(20)
 
-        # Top bar with Back button
+        # Top bar with the sales date range and Back button
         top_bar = QHBoxLayout()
+        self.sales_range = (None, None)
+        self.range_combo = QComboBox()
+        self.range_combo.addItems(DATE_RANGE_PRESETS)
+        self.range_combo.setStyleSheet("color: black;")
+        self.range_combo.currentTextChanged.connect(self.change_sales_range)
+        top_bar.addWidget(QLabel("Sales range:"))
+        top_bar.addWidget(self.range_combo)
         top_bar.addStretch()
         back_button = QPushButton("⬅️ Back to Admin")
         back_button.setStyleSheet("""
@@ -54,20 +78,88 @@ class InsightsPage(QWidget):
         sections_layout = QHBoxLayout()
         layout.addLayout(sections_layout)
 
-        trending_box = self.create_list_section("🔥 Trending Items", self.get_trending_items())
+        trending_box, self.trending_list = self.create_list_section("🔥 Trending Items", ["Loading..."])
         sections_layout.addWidget(trending_box)
 
-        stock_box = self.create_list_section("⚠️ Low Stock Items", self.get_low_stock_items())
+        stock_box, self.stock_list = self.create_list_section("⚠️ Reorder Soon", ["Loading..."])
         sections_layout.addWidget(stock_box)
 
+        basket_box, self.basket_list = self.create_list_section("🛒 Bought Together", ["Loading..."])
+        sections_layout.addWidget(basket_box)
+
         stats_box = self.create_stats_section()
         sections_layout.addWidget(stats_box)
 
+        self.load_insights()
+        # Low stock and inventory stats follow menu writes from any terminal while the page is open
+        notifier = get_menu_notifier()
+        notifier.menuChanged.connect(self.menu_changed)
+        notifier.resyncNeeded.connect(self.menu_changed)
+
+    def load_insights(self):
+        self.load_trending()
+        self.load_bought_together()
+        self.load_menu_insights()
+
+    def menu_changed(self, _changes=None):
+        # A hidden page catches up in screen_shown
+        if self.isVisible():
+            self.load_menu_insights()
+
+    def load_menu_insights(self):
+        self.executor.submit(
+            "low_stock", self.get_low_stock_items,
+            on_result=lambda items: self.fill_list(self.stock_list, items),
+        )
+        self.executor.submit(
+            "stats", self.get_inventory_stats,
+            on_result=lambda stats: self.show_stats(self.format_inventory_stats(stats)),
+            on_error=lambda e: self.show_stats([f"Inventory stats unavailable: {e}"]),
+        )
+
+    def load_trending(self):
+        self.executor.submit(
+            "trending", self.get_trending_items,
+            on_result=lambda items: self.fill_list(self.trending_list, items),
+        )
+
+    def load_bought_together(self):
+        self.executor.submit(
+            "bought_together", self.get_bought_together,
+            on_result=lambda items: self.fill_list(self.basket_list, items),
+        )
+
+    def change_sales_range(self, preset):
+        self.sales_range = resolve_date_range(preset)
+        self.fill_list(self.trending_list, ["Loading..."])
+        self.load_trending()
+
+    def fill_list(self, list_widget, items):
+        list_widget.clear()
+        for item in items:
+            list_widget.addItem(QListWidgetItem(item))
+
+    def show_stats(self, stats):
+        while len(self.stat_labels) < len(stats):
+            stat_label = QLabel()
+            stat_label.setFont(QFont("Arial", 16))
+            self.stats_layout.addWidget(stat_label)
+            self.stat_labels.append(stat_label)
+        for index, stat_label in enumerate(self.stat_labels):
+            stat_label.setVisible(index < len(stats))
+            if index < len(stats):
+                stat_label.setText(stats[index])
+
+    def closeEvent(self, event):
+        self.executor.cancel_all()
+        super().closeEvent(event)
+
+    def screen_shown(self):
+        self.load_insights()
+
     def go_back_to_admin(self):
         from admin import AdminHome
-        self.admin_page = AdminHome(self.username)
-        self.admin_page.show()
-        self.close()
+        self.admin_page = get_window_stack().show_screen(("admin", self.username), lambda: AdminHome(self.username))
 
     def create_list_section(self, title, items):
         box = QVBoxLayout()
@@ -76,76 +168,71 @@ class InsightsPage(QWidget):
         box.addWidget(label)
         list_widget = QListWidget()
         list_widget.setStyleSheet("background-color: rgba(255, 255, 255, 0.2);")
-        for item in items:
-            list_widget.addItem(QListWidgetItem(item))
+        self.fill_list(list_widget, items)
         box.addWidget(list_widget)
         frame = QFrame()
         frame.setLayout(box)
         frame.setStyleSheet("background-color: rgba(0, 0, 0, 0.3); padding: 10px; border-radius: 15px;")
-        return frame
+        return frame, list_widget
 
     def create_stats_section(self):
         box = QVBoxLayout()
         label = QLabel("📦 Inventory Insights")
         label.setFont(QFont("Arial", 20, QFont.Bold))
         box.addWidget(label)
-        stats = self.get_inventory_stats()
-        for stat in stats:
-            stat_label = QLabel(stat)
-            stat_label.setFont(QFont("Arial", 16))
-            box.addWidget(stat_label)
+        self.stats_layout = box
+        self.stat_labels = []
+        self.show_stats(["Loading..."])
+        box.addStretch()
         frame = QFrame()
         frame.setLayout(box)
         frame.setStyleSheet("background-color: rgba(0, 0, 0, 0.3); padding: 10px; border-radius: 15px;")
         return frame
 
     def get_trending_items(self):
-        conn = sqlite3.connect("restaurant.db")
-        c = conn.cursor()
-        c.execute('''
-            SELECT item_name, SUM(quantity) as total_qty 
-            FROM sales 
-            GROUP BY item_name 
-            ORDER BY total_qty DESC 
-            LIMIT 5
-        ''')
-        results = [f"{row[0]} - {row[1]} sold" for row in c.fetchall()]
-        conn.close()
+        results = [f"{row.item_name} - {row.total_qty} sold" for row in get_service().trending(5, *self.sales_range)]
         return results or ["No sales data available"]
 
-    def get_low_stock_items(self):
-        conn = sqlite3.connect("restaurant.db")
-        c = conn.cursor()
-        c.execute('SELECT item_name, quantity FROM menu WHERE quantity <= 3')
-        results = [f"{row[0]} - Only {row[1]} left" for row in c.fetchall()]
-        conn.close()
-        return results or ["No items with low stock"]
+    def get_bought_together(self):
+        results = [
+            f"{pair.item_name} + {pair.partner}: {pair.baskets} orders, "
+            f"{pair.confidence:.0%} confidence, lift {pair.lift:.1f}"
+            for pair in get_service().bought_together(BASKET_LIST_SIZE)
+        ]
+        return results or ["No orders with several items yet"]
 
-    def get_inventory_stats(self):
-        conn = sqlite3.connect("restaurant.db")
-        c = conn.cursor()
+    def get_low_stock_items(self):
         try:
-            c.execute('SELECT AVG(price) FROM menu')
-            avg_price = round(c.fetchone()[0] or 0, 2)
-            c.execute('SELECT item_name, price FROM menu ORDER BY price DESC LIMIT 1')
-            most_expensive = c.fetchone() or ("N/A", 0)
-            c.execute('SELECT item_name, price FROM menu ORDER BY price ASC LIMIT 1')
-            cheapest = c.fetchone() or ("N/A", 0)
-            c.execute('SELECT SUM(price * quantity) FROM menu')
-            total_value = round(c.fetchone()[0] or 0, 2)
-        except:
-            avg_price, most_expensive, cheapest, total_value = 0, ("N/A", 0), ("N/A", 0), 0
-        conn.close()
-        return [
-            f"🔹 Average Price: {avg_price} EGP",
-            f"💎 Most Expensive: {most_expensive[0]} - {most_expensive[1]} EGP",
-            f"🥉 Cheapest: {cheapest[0]} - {cheapest[1]} EGP",
-            f"💰 Total Inventory Value: {total_value} EGP"
+            items = get_service().reorder(REORDER_LIST_SIZE)
+        except ImportError:
+            # No numpy for forecasting: fall back to the fixed threshold
+            results = [f"{row.item_name} - Only {row.quantity} left" for row in get_service().low_stock()]
+            return results or ["No items with low stock"]
+        results = [
+            f"{item.item_name} - {item.quantity} left, {format_hours(item.hours_until_stockout)} "
+            f"(reorder at {item.reorder_point})"
+            for item in items
         ]
+        return results or ["Stock covers forecast demand"]
 
-
-if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = InsightsPage("admin_user")  # Test username
-    window.show()
-    sys.exit(app.exec_())
+    def get_inventory_stats(self):
+        return get_service().inventory_stats()
+
+    def format_inventory_stats(self, stats):
+        lines = [
+            f"🔹 Average Price: {round(stats.avg_price, 2)} EGP",
+            f"💎 Most Expensive: {stats.most_expensive.item_name} - {stats.most_expensive.price} EGP",
+            f"🥉 Cheapest: {stats.cheapest.item_name} - {stats.cheapest.price} EGP",
+            f"💰 Total Inventory Value: {round(stats.total_value, 2)} EGP",
+            "📊 Price p25 / p50 / p90: " + " / ".join(
+                f"{stats.price_percentiles[pct]:.2f}" for pct in (25, 50, 90)
+            ),
+        ]
+        for bucket in stats.stock_value_distribution:
+            if bucket.items:
+                lines.append(f"   Stock value {bucket.label} EGP: {bucket.items} items")
+        for category in stats.categories:
+            lines.append(
+                f"🏷️ {category.category}: {category.items} items, {round(category.stock_value, 2)} EGP"
+            )
+        return lines
@@ -0,0 +1,219 @@
+"""UI-free insights engine: inventory statistics computed in a single pass over the menu."""
+import threading
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from database import get_db
+from forecasting import forecast_demand
+from insights_cache import InsightsCache
+
+PRICE_PERCENTILES = (25, 50, 75, 90)
+# Upper bounds of the stock-value (price * quantity) buckets; the last bucket is open-ended
+STOCK_VALUE_BUCKETS = (100, 500, 1000, 5000)
+DATE_RANGE_PRESETS = ("All time", "Today", "Last 7 days", "Last 30 days", "This month")
+
+
+@dataclass(frozen=True)
+class PricePoint:
+    item_name: str
+    price: float
+
+
+@dataclass(frozen=True)
+class StockValueBucket:
+    label: str
+    items: int
+    value: float
+
+
+@dataclass(frozen=True)
+class CategoryStats:
+    category: str
+    items: int
+    avg_price: float
+    stock_units: int
+    stock_value: float
+
+
+@dataclass(frozen=True)
+class Association:
+    """Customers who ordered `item_name` also ordered `partner` in `confidence` of those orders.
+
+    support: share of all orders containing both; lift: how many times likelier the
+    pair is than if the two were ordered independently (above 1 means they go together).
+    """
+
+    item_name: str
+    partner: str
+    baskets: int
+    support: float
+    confidence: float
+    lift: float
+
+
+@dataclass(frozen=True)
+class InventoryStats:
+    item_count: int
+    avg_price: float
+    most_expensive: PricePoint
+    cheapest: PricePoint
+    total_value: float
+    price_percentiles: dict
+    stock_value_distribution: tuple
+    categories: tuple
+
+
+def _interpolated_percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def _bucket_labels():
+    labels, low = [], 0
+    for high in STOCK_VALUE_BUCKETS:
+        labels.append(f"{low}-{high}")
+        low = high
+    labels.append(f"{low}+")
+    return labels
+
+
+def association(pair, total_baskets, oriented=False):
+    """Association metrics for a database.BasketPair among total_baskets orders.
+
+    Unless `oriented`, the pair is turned so that the rarer item is the antecedent,
+    the direction with the higher confidence.
+    """
+    if not oriented and pair.partner_baskets < pair.item_baskets:
+        pair = pair._replace(
+            item_name=pair.partner, partner=pair.item_name,
+            item_baskets=pair.partner_baskets, partner_baskets=pair.item_baskets,
+        )
+    support = pair.baskets / total_baskets if total_baskets else 0.0
+    confidence = pair.baskets / pair.item_baskets if pair.item_baskets else 0.0
+    partner_share = pair.partner_baskets / total_baskets if total_baskets else 0.0
+    lift = confidence / partner_share if partner_share else 0.0
+    return Association(pair.item_name, pair.partner, pair.baskets, support, confidence, lift)
+
+
+def resolve_date_range(preset, today=None):
+    """Map a DATE_RANGE_PRESETS label to an inclusive (start, end) pair of dates; (None, None) is all time."""
+    today = today or date.today()
+    if preset == "Today":
+        return today, today
+    if preset == "Last 7 days":
+        return today - timedelta(days=6), today
+    if preset == "Last 30 days":
+        return today - timedelta(days=29), today
+    if preset == "This month":
+        return today.replace(day=1), today
+    return None, None
+
+
+class InsightsEngine:
+    def __init__(self, db=None, cache=None):
+        self.db = db or get_db()
+        self.cache = cache or InsightsCache(self.db.get_data_versions)
+
+    def trending_items(self, limit=5, start=None, end=None):
+        return self.cache.get_or_compute(
+            ("trending", limit, start, end), ("sales",), lambda: self.db.get_trending_items(limit, start, end)
+        )
+
+    def low_stock_items(self, threshold=3):
+        return self.cache.get_or_compute(
+            ("low_stock", threshold), ("menu",), lambda: self.db.get_low_stock_items(threshold)
+        )
+
+    def bought_together(self, limit=5, item_name=None):
+        """The pairs ordered together most often, or the best partners of one item."""
+        return self.cache.get_or_compute(
+            ("bought_together", limit, item_name), ("sales",), lambda: self._bought_together(limit, item_name)
+        )
+
+    def _bought_together(self, limit, item_name):
+        total = self.db.get_basket_count()
+        if item_name is None:
+            return [association(pair, total) for pair in self.db.get_top_basket_pairs(limit)]
+        return [association(pair, total, oriented=True) for pair in self.db.get_basket_partners(item_name, limit)]
+
+    def demand_forecast(self):
+        """forecasting.DemandForecast for the whole menu; raises ImportError without numpy."""
+        today = date.today()
+        return self.cache.get_or_compute(
+            ("demand_forecast", today), ("menu", "sales"), lambda: forecast_demand(self.db, today)
+        )
+
+    def reorder_items(self, limit=None):
+        return self.demand_forecast().reorder_list(limit)
+
+    def inventory_stats(self):
+        return self.cache.get_or_compute(("inventory_stats",), ("menu",), self._compute_inventory_stats)
+
+    def _compute_inventory_stats(self):
+        with self.db.connection() as conn:
+            rows = conn.execute(
+                "SELECT item_name, price, quantity, category FROM menu ORDER BY price, id"
+            ).fetchall()
+        return self.reduce(rows)
+
+    @staticmethod
+    def reduce(rows):
+        """Fold (item_name, price, quantity, category) rows, sorted by price, into InventoryStats."""
+        prices = []
+        total_value = 0.0
+        bucket_items = [0] * (len(STOCK_VALUE_BUCKETS) + 1)
+        bucket_value = [0.0] * (len(STOCK_VALUE_BUCKETS) + 1)
+        categories = {}
+        top = None
+        for item_name, price, quantity, category in rows:
+            prices.append(price)
+            if top is None or price > top[1]:
+                top = (item_name, price)
+            value = price * quantity
+            total_value += value
+
+            bucket = 0
+            while bucket < len(STOCK_VALUE_BUCKETS) and value >= STOCK_VALUE_BUCKETS[bucket]:
+                bucket += 1
+            bucket_items[bucket] += 1
+            bucket_value[bucket] += value
+
+            acc = categories.setdefault(category, [0, 0.0, 0, 0.0])
+            acc[0] += 1
+            acc[1] += price
+            acc[2] += quantity
+            acc[3] += value
+
+        count = len(prices)
+        return InventoryStats(
+            item_count=count,
+            avg_price=sum(prices) / count if count else 0.0,
+            most_expensive=PricePoint(top[0], top[1]) if top else PricePoint("N/A", 0),
+            cheapest=PricePoint(rows[0][0], rows[0][1]) if rows else PricePoint("N/A", 0),
+            total_value=total_value,
+            price_percentiles={pct: _interpolated_percentile(prices, pct) for pct in PRICE_PERCENTILES},
+            stock_value_distribution=tuple(
+                StockValueBucket(label, items, value)
+                for label, items, value in zip(_bucket_labels(), bucket_items, bucket_value)
+            ),
+            categories=tuple(
+                CategoryStats(name, items, price_sum / items, units, value)
+                for name, (items, price_sum, units, value) in sorted(categories.items())
+            ),
+        )
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_insights_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = InsightsEngine()
+        return _engine
@@ -0,0 +1,59 @@
+"""TTL + LRU cache for insights results, invalidated when the tables they read change."""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from database import get_db
+
+MAX_ENTRIES = 64
+TTL_SECONDS = 300.0
+
+_Entry = namedtuple("_Entry", ["value", "versions", "created"])
+
+
+class InsightsCache:
+    """Entries are keyed by the caller and tagged with the data versions of the tables
+    they depend on; a lookup only hits when those versions are unchanged and the entry
+    is younger than the TTL.
+    """
+
+    def __init__(self, version_source=None, max_entries=MAX_ENTRIES, ttl=TTL_SECONDS, clock=time.monotonic):
+        self.version_source = version_source or (lambda: get_db().get_data_versions())
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key, depends_on, compute):
+        versions = self.version_source()
+        current = tuple(versions.get(table, 0) for table in depends_on)
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry.versions == current and now - entry.created < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.value
+            self.misses += 1
+
+        value = compute()
+        with self._lock:
+            self._entries[key] = _Entry(value, current, now)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,339 @@
+"""Latency histograms for SQL statements, screens and background tasks, plus a slow-query log.
+
+Off by default. Turn it on with RESTAURANT_METRICS=1, `python main.py --metrics DIR`
+or `python api_server.py --metrics DIR`; the last two also write metrics.prom
+(Prometheus text format) and metrics.json snapshots into DIR as they run.
+
+When enabled, Database opens its connections as InstrumentedConnection, whose
+cursors time every execute and fetch. A statement slower than SLOW_QUERY_MS is
+logged to stderr with its EXPLAIN QUERY PLAN and kept for the JSON snapshot.
+Screen builds and refreshes (navigation.WindowStack), QueryExecutor tasks and
+functions decorated with @timed are recorded the same way. Histograms use fixed
+buckets, so recording is O(1) and memory does not grow with traffic.
+"""
+import functools
+import json
+import math
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import deque, namedtuple
+from contextlib import contextmanager
+from datetime import datetime
+
+SLOW_QUERY_MS = float(os.environ.get("RESTAURANT_SLOW_QUERY_MS", "50"))
+SLOW_QUERY_LOG_SIZE = 200
+# Upper bounds in milliseconds; anything slower lands in the final +Inf bucket
+BUCKETS_MS = (
+    0.05, 0.1, 0.15, 0.25, 0.4, 0.6, 1, 1.5, 2.5, 4, 6, 10, 15, 25, 40, 60,
+    100, 150, 250, 400, 600, 1000, 1500, 2500, 4000, 6000, 10000,
+)
+# Statements worth explaining; BEGIN, COMMIT and PRAGMA have no query plan
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+_PLACEHOLDER_RUN_RE = re.compile(r"\?(?:\s*,\s*\?){2,}")
+
+SlowQuery = namedtuple("SlowQuery", ["at", "ms", "sql", "plan"])
+
+_enabled = os.environ.get("RESTAURANT_METRICS", "") not in ("", "0")
+
+
+def is_enabled():
+    return _enabled
+
+
+def enable(on=True):
+    """Switch recording on or off; connections opened afterwards pick up the change."""
+    global _enabled
+    _enabled = on
+
+
+def normalize_sql(sql):
+    """One-line statement text used as the histogram name; long IN lists collapse to `?, ...`."""
+    return _PLACEHOLDER_RUN_RE.sub("?, ...", " ".join(sql.split()))
+
+
+class Histogram:
+    """Counts per BUCKETS_MS bucket plus count, sum and max; not thread-safe on its own."""
+
+    __slots__ = ("counts", "count", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms):
+        self.counts[bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, pct):
+        """Nearest-rank estimate, interpolated linearly inside the bucket holding that observation."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(pct / 100 * self.count))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                low = BUCKETS_MS[index - 1] if index else 0.0
+                high = BUCKETS_MS[index] if index < len(BUCKETS_MS) else self.max_ms
+                return min(low + (high - low) * (rank - seen) / bucket_count, self.max_ms)
+            seen += bucket_count
+        return self.max_ms
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max_ms,
+        }
+
+
+class MetricsRegistry:
+    """Histograms keyed by (kind, name), e.g. ("sql", "SELECT ...") or ("screen", "build admin")."""
+
+    def __init__(self, slow_query_ms=SLOW_QUERY_MS, slow_log_size=SLOW_QUERY_LOG_SIZE):
+        self.slow_query_ms = slow_query_ms
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self.slow_queries = deque(maxlen=slow_log_size)
+
+    def observe(self, kind, name, ms):
+        with self._lock:
+            histogram = self._histograms.get((kind, name))
+            if histogram is None:
+                histogram = self._histograms[(kind, name)] = Histogram()
+            histogram.observe(ms)
+
+    @contextmanager
+    def timer(self, kind, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(kind, name, (time.perf_counter() - start) * 1000)
+
+    def record_slow_query(self, ms, sql, plan):
+        entry = SlowQuery(datetime.now().strftime("%Y-%m-%d %H:%M:%S"), ms, sql, plan)
+        with self._lock:
+            self.slow_queries.append(entry)
+        print(f"Slow query ({ms:.1f} ms): {sql}", file=sys.stderr)
+        for line in plan:
+            print(f"    {line}", file=sys.stderr)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self.slow_queries.clear()
+
+    def summary(self, kind=None, limit=None, key="p99_ms"):
+        """[(kind, name, snapshot dict)] sorted slowest first by `key`."""
+        with self._lock:
+            rows = [
+                (hist_kind, name, histogram.snapshot())
+                for (hist_kind, name), histogram in self._histograms.items()
+                if kind is None or hist_kind == kind
+            ]
+        rows.sort(key=lambda row: row[2][key], reverse=True)
+        return rows[:limit]
+
+    def snapshot(self):
+        histograms = {}
+        for kind, name, stats in self.summary():
+            histograms.setdefault(kind, {})[name] = stats
+        with self._lock:
+            slow = [entry._asdict() for entry in self.slow_queries]
+        return {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "histograms": histograms,
+            "slow_queries": slow,
+        }
+
+    def to_prometheus(self, prefix="restaurant"):
+        """Prometheus text exposition: one histogram family per kind, in seconds."""
+        with self._lock:
+            items = sorted(
+                ((kind, name, list(h.counts), h.count, h.total_ms) for (kind, name), h in self._histograms.items()),
+                key=lambda item: item[:2],
+            )
+        lines, current_kind = [], None
+        for kind, name, counts, count, total_ms in items:
+            metric = f"{prefix}_{kind}_duration_seconds"
+            if kind != current_kind:
+                lines.append(f"# HELP {metric} Duration of {kind} operations.")
+                lines.append(f"# TYPE {metric} histogram")
+                current_kind = kind
+            label = f'name="{_escape_label(name)}"'
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS_MS, counts):
+                cumulative += bucket_count
+                lines.append(f'{metric}_bucket{{{label},le="{bound / 1000:g}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{{label},le="+Inf"}} {count}')
+            lines.append(f"{metric}_sum{{{label}}} {total_ms / 1000:.6f}")
+            lines.append(f"{metric}_count{{{label}}} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        _write_atomic(path, self.to_prometheus())
+
+    def write_json(self, path):
+        _write_atomic(path, json.dumps(self.snapshot(), indent=2, ensure_ascii=False))
+
+    def export(self, directory):
+        """Write metrics.prom and metrics.json into directory."""
+        os.makedirs(directory, exist_ok=True)
+        self.write_prometheus(os.path.join(directory, "metrics.prom"))
+        self.write_json(os.path.join(directory, "metrics.json"))
+
+
+def _escape_label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _write_atomic(path, text):
+    # Scrapers and tail -f never see a half-written file
+    temp = f"{path}.tmp"
+    with open(temp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(temp, path)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Times execute plus the fetches that follow it and records one observation per statement.
+
+    The observation is recorded at fetchall, the next execute, close or when the
+    cursor is garbage collected, so `conn.execute(sql).fetchall()` counts as one
+    statement. Rows read by iterating the cursor are not timed.
+    """
+
+    _sql = None
+    _params = ()
+    _elapsed = 0.0
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._sql, self._params = sql, parameters
+            self._elapsed = time.perf_counter() - start
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            # Parameters of a batch are not kept; its plan is explained without them
+            self._sql, self._params = sql, None
+            self._elapsed = time.perf_counter() - start
+
+    def fetchone(self):
+        start = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            self._elapsed += time.perf_counter() - start
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        try:
+            return super().fetchmany(self.arraysize if size is None else size)
+        finally:
+            self._elapsed += time.perf_counter() - start
+
+    def fetchall(self):
+        start = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            self._elapsed += time.perf_counter() - start
+            self._finish()
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+    def _finish(self):
+        sql = self._sql
+        if sql is None:
+            return
+        self._sql = None
+        ms = self._elapsed * 1000
+        metrics = self.connection.metrics
+        name = normalize_sql(sql)
+        metrics.observe("sql", name, ms)
+        if ms >= metrics.slow_query_ms and name.lstrip("( ").upper().startswith(_EXPLAINABLE):
+            metrics.record_slow_query(ms, name, self._explain(sql, self._params))
+
+    def _explain(self, sql, params):
+        # A plain cursor, so explaining is not itself timed
+        try:
+            rows = sqlite3.Cursor(self.connection).execute(
+                f"EXPLAIN QUERY PLAN {sql}", params if params is not None else ()
+            ).fetchall()
+        except sqlite3.Error as e:
+            return [f"(no plan: {e})"]
+        return [row[-1] for row in rows]
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """sqlite3 connection whose cursors (including conn.execute's) are InstrumentedCursor."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = get_metrics()
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    # The built-in shortcuts create a plain cursor in C, bypassing cursor() above
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def timed(kind, name=None):
+    """Decorator recording each call under (kind, name or the function's qualified name) when enabled."""
+    def decorate(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with get_metrics().timer(kind, label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = MetricsRegistry()
+        return _metrics
@@ -0,0 +1,128 @@
+from PyQt5.QtWidgets import (
+    QWidget, QLabel, QLineEdit, QPushButton,
+    QComboBox, QVBoxLayout, QHBoxLayout, QMessageBox
+)
+from PyQt5.QtGui import QFont
+from PyQt5.QtCore import Qt
+from auth import get_authenticator
+from db_worker import QueryExecutor
+from navigation import apply_background, get_window_stack
+
+
+class LoggingWindow(QWidget):
+    def __init__(self):
+        super().__init__()
+        self.setFixedSize(1400, 900)
+        self.setWindowTitle("Restaurant Login")
+        self.executor = QueryExecutor(self)
+
+        apply_background(self)
+        self.setup_ui()
+
+    def screen_shown(self):
+        # Back from a logout: don't leave the previous user's password behind
+        self.pass_input.clear()
+        self.set_busy(False)
+
+    def setup_ui(self):
+        layout = QVBoxLayout()
+        layout.setAlignment(Qt.AlignCenter)
+
+        title = QLabel("Welcome to our restaurant")
+        title.setFont(QFont("serif", 26, QFont.Bold))
+        title.setStyleSheet("color: white;")
+        title.setAlignment(Qt.AlignCenter)
+        layout.addWidget(title)
+
+        self.name_input = QLineEdit()
+        self.name_input.setPlaceholderText("Enter Name")
+        self.name_input.setFixedWidth(300)
+
+        self.pass_input = QLineEdit()
+        self.pass_input.setPlaceholderText("Enter Password")
+        self.pass_input.setEchoMode(QLineEdit.Password)
+        self.pass_input.setFixedWidth(300)
+
+        self.role_box = QComboBox()
+        self.role_box.addItems(["Customer", "Admin"])
+        self.role_box.setFixedWidth(300)
+
+        btn_layout = QHBoxLayout()
+        self.login_btn = QPushButton("Sign In")
+        self.signup_btn = QPushButton("Sign Up")
+        self.login_btn.clicked.connect(self.sign_in)
+        self.signup_btn.clicked.connect(self.sign_up)
+        btn_layout.addWidget(self.login_btn)
+        btn_layout.addWidget(self.signup_btn)
+
+        for widget in [self.name_input, self.pass_input, self.role_box]:
+            layout.addWidget(widget)
+
+        layout.addLayout(btn_layout)
+        self.setLayout(layout)
+
+    def sign_in(self):
+        username = self.name_input.text().strip()
+        password = self.pass_input.text()
+        role = self.role_box.currentText()
+
+        self.set_busy(True)
+        self.executor.submit(
+            "auth", self.check_credentials, username, password, role,
+            on_result=lambda result: self.finish_sign_in(result, username, role),
+            on_error=self.show_db_error,
+        )
+
+    def finish_sign_in(self, result, username, role):
+        self.set_busy(False)
+        if result:
+            QMessageBox.information(self, "Success", f"Signed in as {role}")
+
+            import importlib
+
+            stack = get_window_stack()
+            if role.lower() == "admin":
+                admin_module = importlib.import_module("admin")
+                self.admin_window = stack.show_screen(("admin", username), lambda: admin_module.AdminHome(username))
+            else:
+                customer_module = importlib.import_module("customer_page")
+                self.customer_window = stack.show_screen(
+                    ("customer", username), lambda: customer_module.CustomerHome(username)
+                )
+
+        else:
+            QMessageBox.warning(self, "Error", "Invalid credentials or user not found.")
+
+    def sign_up(self):
+        username = self.name_input.text().strip()
+        password = self.pass_input.text()
+        role = self.role_box.currentText()
+
+        # The unique (username, role) index decides between concurrent sign-ups
+        self.set_busy(True)
+        self.executor.submit(
+            "auth", self.register, username, password, role,
+            on_result=self.finish_sign_up, on_error=self.show_db_error,
+        )
+
+    def finish_sign_up(self, created):
+        self.set_busy(False)
+        if created:
+            QMessageBox.information(self, "Success", "User signed up successfully. You can now sign in.")
+        else:
+            QMessageBox.warning(self, "Exists", "User already exists. Please sign in.")
+
+    # Run on the worker pool: hashing is deliberately slow
+    def check_credentials(self, username, password, role):
+        return get_authenticator().sign_in(username, password, role)
+
+    def register(self, username, password, role):
+        return get_authenticator().sign_up(username, password, role)
+
+    def set_busy(self, busy):
+        self.login_btn.setEnabled(not busy)
+        self.signup_btn.setEnabled(not busy)
+
+    def show_db_error(self, error):
+        self.set_busy(False)
+        QMessageBox.warning(self, "Error", f"Could not reach the database: {error}")
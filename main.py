@@ -0,0 +1,121 @@
+"""Application entry point: paints the login screen first and loads everything else afterwards.
+
+    python main.py
+    python main.py --profile-startup
+    python main.py --metrics metrics/
+"""
+import argparse
+import importlib
+import sys
+import time
+
+STARTED = time.perf_counter()
+
+# Screens the login can navigate to; imported on a worker thread once the login is on screen
+LAZY_MODULES = ("admin", "customer_page", "features")
+METRICS_EXPORT_INTERVAL_MS = 10000
+
+
+def _ms(since):
+    return (time.perf_counter() - since) * 1000
+
+
+def preload(profile):
+    """Open the database (running any pending migrations), prepare sign-in and import the other screens."""
+    from auth import get_authenticator
+    from database import get_db
+
+    start = time.perf_counter()
+    get_db()
+    profile["db_open_ms"] = _ms(start)
+
+    start = time.perf_counter()
+    get_authenticator()
+    profile["auth_ready_ms"] = _ms(start)
+
+    start = time.perf_counter()
+    for name in LAZY_MODULES:
+        importlib.import_module(name)
+    profile["lazy_imports_ms"] = _ms(start)
+    return profile
+
+
+def report(profile):
+    print("Startup profile:")
+    for label, key in (
+        ("imports", "imports_ms"),
+        ("first window painted", "first_paint_ms"),
+        ("database open", "db_open_ms"),
+        ("sign-in ready", "auth_ready_ms"),
+        ("background imports", "lazy_imports_ms"),
+        ("ready", "ready_ms"),
+    ):
+        print(f"  {label + ':':<22}{profile.get(key, 0.0):8.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--profile-startup", action="store_true",
+        help="report import, first-paint and database-open times, then exit",
+    )
+    parser.add_argument(
+        "--metrics", metavar="DIR",
+        help="record SQL, screen and task latencies and write metrics.prom/metrics.json into DIR",
+    )
+    args = parser.parse_args(argv)
+    if args.metrics:
+        # Before the database opens, so its connections are instrumented
+        import instrumentation
+        instrumentation.enable()
+
+    profile = {}
+    start = time.perf_counter()
+    from PyQt5.QtCore import QEvent, QObject, QTimer
+    from PyQt5.QtWidgets import QApplication
+
+    from db_worker import QueryExecutor
+    from login import LoggingWindow
+    from navigation import LOGIN_SCREEN, get_window_stack
+    profile["imports_ms"] = _ms(start)
+
+    class FirstPaint(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint:
+                obj.removeEventFilter(self)
+                profile["first_paint_ms"] = _ms(STARTED)
+                executor.submit(None, preload, profile, on_result=ready, on_error=failed)
+            return False
+
+    def ready(_):
+        profile["ready_ms"] = _ms(STARTED)
+        if args.profile_startup:
+            report(profile)
+            app.quit()
+
+    def failed(error):
+        print(f"Startup preload failed: {error!r}", file=sys.stderr)
+        if args.profile_startup:
+            app.exit(1)
+
+    app = QApplication(sys.argv[:1])
+    executor = QueryExecutor(app)
+    stack = get_window_stack()
+    first_paint = FirstPaint(stack)
+    stack.installEventFilter(first_paint)
+    stack.show_screen(LOGIN_SCREEN, LoggingWindow)
+    if args.metrics:
+        from instrumentation import get_metrics
+
+        def export_metrics():
+            get_metrics().export(args.metrics)
+
+        export_timer = QTimer(app)
+        export_timer.timeout.connect(export_metrics)
+        export_timer.start(METRICS_EXPORT_INTERVAL_MS)
+        app.aboutToQuit.connect(export_metrics)
+    return app.exec_()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+"""Bulk menu import from CSV, JSON or JSON Lines, with a dry-run diff before anything is written.
+
+    python menu_import.py delivery.csv --dry-run          # validate and show what would change
+    python menu_import.py delivery.csv                    # add the quantities to current stock
+    python menu_import.py spring_menu.json --set-stock    # replace stock with the file's quantities
+
+Files need item_name, price and quantity columns (or keys) and may have a category.
+Rows are validated one at a time while the file is read, so a bad row is reported
+with its line (or record) number without the file being loaded first. The whole
+import is applied as one executemany upsert in one transaction: either every row is
+written or none is, and triggers fire once per row instead of once per statement.
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+from collections import namedtuple
+
+from database import DB_PATH, Database
+
+MAX_NAME_LENGTH = 100
+CHUNK_SIZE = 65536
+# Header spellings accepted for each column
+COLUMN_ALIASES = {
+    "item_name": ("item_name", "name", "item"),
+    "price": ("price",),
+    "quantity": ("quantity", "qty", "stock"),
+    "category": ("category",),
+}
+
+ImportRow = namedtuple("ImportRow", ["item_name", "price", "quantity", "category"])
+RowError = namedtuple("RowError", ["line", "message"])
+# kind is "new", "updated" or "unchanged"; before is the current (price, quantity, category) or None
+Change = namedtuple("Change", ["kind", "row", "before", "after"])
+
+
+class ImportPlan:
+    """Validated rows plus their diff against the current menu; nothing has been written yet."""
+
+    def __init__(self, add_stock=True):
+        self.add_stock = add_stock
+        self.changes = []
+        self.errors = []
+
+    def count(self, kind):
+        return sum(1 for change in self.changes if change.kind == kind)
+
+    def summary(self):
+        return (f"{self.count('new')} new, {self.count('updated')} updated, "
+                f"{self.count('unchanged')} unchanged, {len(self.errors)} invalid")
+
+    def describe(self, limit=20):
+        """Human-readable lines for the changes (and errors), at most limit of each."""
+        lines = []
+        for change in [change for change in self.changes if change.kind != "unchanged"][:limit]:
+            price, quantity, category = change.after
+            if change.kind == "new":
+                lines.append(f"+ {change.row.item_name}: ${price:.2f}, qty {quantity}, {category}")
+                continue
+            old_price, old_quantity, old_category = change.before
+            parts = []
+            if price != old_price:
+                parts.append(f"price ${old_price:.2f} -> ${price:.2f}")
+            if quantity != old_quantity:
+                parts.append(f"qty {old_quantity} -> {quantity}")
+            if category != old_category:
+                parts.append(f"category {old_category} -> {category}")
+            lines.append(f"~ {change.row.item_name}: {', '.join(parts)}")
+        changed = len(self.changes) - self.count("unchanged")
+        if changed > limit:
+            lines.append(f"... and {changed - limit} more changes")
+        lines.extend(f"! line {error.line}: {error.message}" for error in self.errors[:limit])
+        if len(self.errors) > limit:
+            lines.append(f"... and {len(self.errors) - limit} more errors")
+        return lines
+
+
+def _iter_json_array(stream, chunk_size=CHUNK_SIZE):
+    """Yield the elements of a top-level JSON array without reading the whole file."""
+    decoder = json.JSONDecoder()
+    buffer = stream.read(chunk_size).lstrip()
+    if not buffer.startswith("["):
+        raise ValueError("JSON import file must hold an array of objects")
+    buffer = buffer[1:]
+    eof = False
+    while True:
+        buffer = buffer.lstrip()
+        if buffer.startswith(","):
+            buffer = buffer[1:]
+            continue
+        if buffer.startswith("]"):
+            return
+        try:
+            if not buffer:
+                raise json.JSONDecodeError("Unexpected end of data", buffer, 0)
+            element, end = decoder.raw_decode(buffer)
+            # A number or literal cut off at the chunk boundary decodes "successfully"
+            if end == len(buffer) and not eof and not isinstance(element, (dict, list, str)):
+                raise json.JSONDecodeError("Element may continue in the next chunk", buffer, end)
+        except json.JSONDecodeError:
+            more = stream.read(chunk_size)
+            if not more:
+                if eof or not buffer:
+                    raise ValueError("JSON import file ends before the array is closed") from None
+                eof = True
+            buffer += more
+            continue
+        yield element
+        buffer = buffer[end:]
+
+
+def _header_map(fieldnames):
+    """Map canonical column names to the file's own header spelling."""
+    found = {name.strip().casefold(): name for name in fieldnames or () if name}
+    mapping = {}
+    for column, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in found:
+                mapping[column] = found[alias]
+                break
+    missing = [column for column in ("item_name", "price", "quantity") if column not in mapping]
+    if missing:
+        raise ValueError(f"missing column(s): {', '.join(missing)}")
+    return mapping
+
+
+def read_records(path):
+    """Yield (line_or_record_number, dict) from a .csv, .json or .jsonl file, one record at a time."""
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if extension == ".csv":
+            reader = csv.DictReader(f)
+            try:
+                mapping = _header_map(reader.fieldnames)
+            except ValueError as e:
+                raise ValueError(f"{path}: {e}") from None
+            for record in reader:
+                yield reader.line_num, {column: record.get(source) for column, source in mapping.items()}
+        elif extension == ".jsonl":
+            for line_number, line in enumerate(f, start=1):
+                if line.strip():
+                    try:
+                        yield line_number, json.loads(line)
+                    except json.JSONDecodeError as e:
+                        yield line_number, e
+        elif extension == ".json":
+            for number, element in enumerate(_iter_json_array(f), start=1):
+                yield number, element
+        else:
+            raise ValueError(f"Unsupported import file type {extension!r}; use .csv, .json or .jsonl")
+
+
+def validate_record(record):
+    """Return an ImportRow, or raise ValueError describing the first problem."""
+    if isinstance(record, Exception):
+        raise ValueError(f"not valid JSON ({record.msg})")
+    if not isinstance(record, dict):
+        raise ValueError("expected an object with item_name, price and quantity")
+    if "item_name" not in record or "quantity" not in record:
+        # JSON keys may use the same aliases as CSV headers
+        record = {column: record.get(source) for column, source in _header_map(record.keys()).items()}
+    item_name = str(record.get("item_name") or "").strip()
+    if not item_name:
+        raise ValueError("item_name is empty")
+    if len(item_name) > MAX_NAME_LENGTH:
+        raise ValueError(f"item_name is longer than {MAX_NAME_LENGTH} characters")
+    try:
+        price = float(record.get("price"))
+    except (TypeError, ValueError):
+        raise ValueError(f"price {record.get('price')!r} is not a number") from None
+    if not math.isfinite(price) or price < 0:
+        raise ValueError(f"price {price} must be zero or more")
+    quantity = record.get("quantity")
+    try:
+        if isinstance(quantity, float) and not quantity.is_integer():
+            raise ValueError
+        quantity = int(quantity)
+    except (TypeError, ValueError):
+        raise ValueError(f"quantity {record.get('quantity')!r} is not a whole number") from None
+    if quantity < 0:
+        raise ValueError(f"quantity {quantity} must be zero or more")
+    category = record.get("category")
+    if category is not None:
+        category = str(category).strip() or None
+    return ImportRow(item_name, round(price, 2), quantity, category)
+
+
+def current_menu(db):
+    """{casefolded item_name: (price, quantity, category)}, matching the menu's NOCASE key."""
+    with db.connection() as conn:
+        return {
+            name.casefold(): (price, quantity, category)
+            for name, price, quantity, category in conn.execute(
+                "SELECT item_name, price, quantity, category FROM menu"
+            )
+        }
+
+
+def plan_import(db, records, add_stock=True):
+    """Validate records and diff them against the menu in one pass; writes nothing.
+
+    A name repeated in the file is an error rather than a silent second upsert, since
+    one of the two rows would otherwise be lost (or double-counted with add_stock).
+    """
+    plan = ImportPlan(add_stock)
+    existing = current_menu(db)
+    seen = {}
+    for line, record in records:
+        try:
+            row = validate_record(record)
+        except ValueError as e:
+            plan.errors.append(RowError(line, str(e)))
+            continue
+        key = row.item_name.casefold()
+        if key in seen:
+            plan.errors.append(RowError(line, f"{row.item_name!r} already appears on line {seen[key]}"))
+            continue
+        seen[key] = line
+        before = existing.get(key)
+        if before is None:
+            after = (row.price, row.quantity, row.category or "General")
+            kind = "new"
+        else:
+            quantity = before[1] + row.quantity if add_stock else row.quantity
+            after = (row.price, quantity, row.category or before[2])
+            kind = "unchanged" if after == before else "updated"
+        plan.changes.append(Change(kind, row, before, after))
+    return plan
+
+
+def apply_import(db, plan):
+    """Write every planned row in one transaction; returns the number of rows written."""
+    if plan.errors:
+        raise ValueError(f"Import has {len(plan.errors)} invalid row(s); fix them before applying")
+    rows = [change.row for change in plan.changes if change.kind != "unchanged"]
+    if rows:
+        db.bulk_upsert_menu_items(rows, add_stock=plan.add_stock)
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("file", help=".csv, .json (array of objects) or .jsonl file")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--dry-run", action="store_true", help="show the diff without writing anything")
+    parser.add_argument("--set-stock", action="store_true",
+                        help="replace stock with the file's quantities instead of adding to it")
+    parser.add_argument("--show", type=int, default=20, help="changes and errors to list")
+    args = parser.parse_args()
+
+    db = Database(args.db, pool_size=1)
+    try:
+        try:
+            plan = plan_import(db, read_records(args.file), add_stock=not args.set_stock)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+        for line in plan.describe(args.show):
+            print(line)
+        print(plan.summary())
+        if plan.errors:
+            print("Nothing imported: fix the invalid rows first", file=sys.stderr)
+            return 1
+        if args.dry_run:
+            return 0
+        written = apply_import(db, plan)
+        print(f"Imported {written:,} row(s)")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""Polls the menu change feed from the Qt event loop and broadcasts deltas to open screens."""
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from change_feed import ChangeFeed
+from db_worker import QueryExecutor
+
+POLL_INTERVAL_MS = 500
+
+
+class MenuChangeNotifier(QObject):
+    """One feed per process, shared by every open screen.
+
+    Each tick runs a single indexed read of menu_changes on the thread pool, so the
+    cost does not grow with the number of windows or the size of the menu.
+    """
+
+    menuChanged = pyqtSignal(list)   # coalesced database.MenuChange rows
+    lowStock = pyqtSignal(list)      # changes that took an item to LOW_STOCK_THRESHOLD or below
+    resyncNeeded = pyqtSignal()      # too much changed to patch; reload the menu
+
+    def __init__(self, feed=None, interval_ms=POLL_INTERVAL_MS, parent=None):
+        super().__init__(parent)
+        self.executor = QueryExecutor(self)
+        self.feed = None
+        self._poll_again = False
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.poll_now)
+        self.timer.start(interval_ms)
+        if feed is not None:
+            self.feed = feed
+        else:
+            # Reading the starting cursor is a query too; keep it off the GUI thread
+            self.executor.submit("menu_feed", ChangeFeed, on_result=self._feed_ready)
+
+    def _feed_ready(self, feed):
+        self.feed = feed
+        if self._poll_again:
+            self._poll_again = False
+            self.poll_now()
+
+    def poll_now(self):
+        """Poll immediately, e.g. right after this terminal wrote to the menu."""
+        if self.feed is None or self.executor.is_pending("menu_feed"):
+            # The poll in flight may have started before the write committed
+            self._poll_again = True
+            return
+        self.executor.submit("menu_feed", self.feed.poll, on_result=self._deliver)
+
+    def _deliver(self, batch):
+        if self._poll_again:
+            self._poll_again = False
+            self.poll_now()
+        if batch is None:
+            return
+        if batch.resync:
+            self.resyncNeeded.emit()
+            return
+        self.menuChanged.emit(batch.changes)
+        if batch.low_stock:
+            self.lowStock.emit(batch.low_stock)
+
+
+_notifier = None
+
+
+def get_menu_notifier():
+    global _notifier
+    if _notifier is None:
+        _notifier = MenuChangeNotifier()
+    return _notifier
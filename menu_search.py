@@ -0,0 +1,122 @@
+"""In-memory menu name index: word-prefix search on a sorted array plus trigram fuzzy matching."""
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+
+MIN_FUZZY_QUERY = 3
+# Share of the query's trigrams a name must contain to count as a fuzzy match
+FUZZY_THRESHOLD = 0.6
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize(text):
+    """Casefold, drop accents/diacritics and punctuation, and collapse whitespace."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(_NON_WORD.sub(" ", stripped).split())
+
+
+def trigrams(normalized):
+    grams = set()
+    for word in normalized.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class MenuSearchIndex:
+    """Item names keyed by their normalized form.
+
+    Every word start of a name is stored in one sorted list as (suffix, name_key), so
+    "piz" finds "Margherita Pizza" with a bisect and a short forward scan. Adding or
+    removing a name touches only its own entries, so the index is maintained
+    incrementally instead of being rebuilt when the menu changes.
+    """
+
+    def __init__(self, names=()):
+        self._names = {}                 # normalized name -> display name
+        self._suffixes = []              # sorted (normalized suffix at a word start, normalized name)
+        self._grams = defaultdict(set)   # trigram -> normalized names
+        for name in names:
+            self.add(name)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return normalize(name) in self._names
+
+    def add(self, name):
+        """Index a display name; returns False if an equivalent name is already indexed."""
+        key = normalize(name)
+        if not key or key in self._names:
+            return False
+        self._names[key] = name
+        words = key.split(" ")
+        for start in range(len(words)):
+            insort(self._suffixes, (" ".join(words[start:]), key))
+        for gram in trigrams(key):
+            self._grams[gram].add(key)
+        return True
+
+    def remove(self, name):
+        key = normalize(name)
+        if self._names.pop(key, None) is None:
+            return False
+        words = key.split(" ")
+        for start in range(len(words)):
+            entry = (" ".join(words[start:]), key)
+            position = bisect_left(self._suffixes, entry)
+            if position < len(self._suffixes) and self._suffixes[position] == entry:
+                del self._suffixes[position]
+        for gram in trigrams(key):
+            keys = self._grams.get(gram)
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del self._grams[gram]
+        return True
+
+    def _word_prefix(self, word):
+        keys = set()
+        position = bisect_left(self._suffixes, (word,))
+        while position < len(self._suffixes) and self._suffixes[position][0].startswith(word):
+            keys.add(self._suffixes[position][1])
+            position += 1
+        return keys
+
+    def prefix_matches(self, query):
+        """Names where every query word starts some word of the name, whole-name prefixes first."""
+        words = normalize(query).split()
+        if not words:
+            return []
+        keys = self._word_prefix(words[0])
+        for word in words[1:]:
+            if not keys:
+                break
+            keys &= self._word_prefix(word)
+        whole = " ".join(words)
+        return [self._names[key] for key in sorted(keys, key=lambda key: (not key.startswith(whole), key))]
+
+    def fuzzy_matches(self, query, threshold=FUZZY_THRESHOLD):
+        """Names sharing enough trigrams with the query to survive a typo or two, best first."""
+        key = normalize(query)
+        if len(key) < MIN_FUZZY_QUERY:
+            return []
+        grams = trigrams(key)
+        counts = Counter()
+        for gram in grams:
+            counts.update(self._grams.get(gram, ()))
+        scored = [
+            (shared / len(grams), name_key) for name_key, shared in counts.items()
+            if shared / len(grams) >= threshold
+        ]
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [self._names[name_key] for _score, name_key in scored]
+
+    def search(self, query, limit=None):
+        """Prefix matches; only when there are none, fall back to fuzzy matches for typos."""
+        results = self.prefix_matches(query) or self.fuzzy_matches(query)
+        return results[:limit] if limit is not None else results
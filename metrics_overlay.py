@@ -0,0 +1,55 @@
+"""Floating panel with live p50/p99 latencies from instrumentation, for finding regressions on real hardware."""
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QFont
+from PyQt5.QtWidgets import QLabel
+
+from instrumentation import get_metrics
+
+REFRESH_MS = 1000
+ROWS = 12
+NAME_WIDTH = 48
+
+
+class MetricsOverlay(QLabel):
+    """Shows the slowest operations by p99 over its parent; refreshes only while visible."""
+
+    def __init__(self, parent, metrics=None):
+        super().__init__(parent)
+        self.metrics = metrics or get_metrics()
+        self.setFont(QFont("Monospace", 9))
+        self.setTextFormat(Qt.PlainText)
+        self.setAlignment(Qt.AlignTop | Qt.AlignLeft)
+        self.setStyleSheet("background-color: rgba(0, 0, 0, 200); color: #7CFC00; padding: 8px;")
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.timer = QTimer(self)
+        self.timer.setInterval(REFRESH_MS)
+        self.timer.timeout.connect(self.refresh)
+        self.hide()
+
+    def toggle(self):
+        self.setVisible(not self.isVisible())
+
+    def showEvent(self, event):
+        self.refresh()
+        self.timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        lines = [f"{'operation':<{NAME_WIDTH}}{'count':>8}{'p50 ms':>9}{'p99 ms':>9}"]
+        for kind, name, stats in self.metrics.summary(limit=ROWS):
+            label = f"{kind}: {name}"
+            if len(label) > NAME_WIDTH - 1:
+                label = label[:NAME_WIDTH - 2] + "…"
+            lines.append(f"{label:<{NAME_WIDTH}}{stats['count']:>8}{stats['p50_ms']:>9.2f}{stats['p99_ms']:>9.2f}")
+        slow = len(self.metrics.slow_queries)
+        if slow:
+            lines.append(f"{slow} slow queries logged (over {self.metrics.slow_query_ms:g} ms)")
+        self.setText("\n".join(lines))
+        self.adjustSize()
+        parent = self.parentWidget()
+        self.move(parent.width() - self.width() - 20, 20)
+        self.raise_()
@@ -0,0 +1,385 @@
+"""Versioned schema migrations, applied at startup and tracked in PRAGMA user_version."""
+
+BASE_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL,
+        password TEXT NOT NULL,
+        role TEXT NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS menu (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        item_name TEXT NOT NULL,
+        price REAL NOT NULL,
+        quantity INTEGER NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS cart (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL,
+        item_name TEXT NOT NULL,
+        price REAL NOT NULL,
+        quantity INTEGER NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS sales (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL,
+        item_name TEXT NOT NULL,
+        price REAL NOT NULL,
+        quantity INTEGER NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS comments (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        comment TEXT NOT NULL
+    )""",
+]
+
+HOT_PATH_INDEXES = [
+    # Fold case-insensitive duplicate menu rows into the oldest one so the unique key can be built
+    """UPDATE menu
+       SET quantity = (SELECT SUM(dup.quantity) FROM menu dup
+                       WHERE dup.item_name = menu.item_name COLLATE NOCASE)
+       WHERE id IN (SELECT MIN(id) FROM menu GROUP BY item_name COLLATE NOCASE HAVING COUNT(*) > 1)""",
+    "DELETE FROM menu WHERE id NOT IN (SELECT MIN(id) FROM menu GROUP BY item_name COLLATE NOCASE)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_menu_item_name ON menu(item_name COLLATE NOCASE)",
+    "CREATE INDEX IF NOT EXISTS idx_menu_quantity ON menu(quantity)",
+    "CREATE INDEX IF NOT EXISTS idx_cart_user_item ON cart(username, item_name)",
+    "CREATE INDEX IF NOT EXISTS idx_sales_item_qty ON sales(item_name, quantity)",
+]
+
+SALES_AGGREGATES = [
+    """CREATE TABLE IF NOT EXISTS sales_item_totals (
+        item_name TEXT PRIMARY KEY,
+        quantity INTEGER NOT NULL DEFAULT 0,
+        revenue REAL NOT NULL DEFAULT 0
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_sales_item_totals_quantity ON sales_item_totals(quantity)",
+    """CREATE TABLE IF NOT EXISTS sales_summary (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        total_quantity INTEGER NOT NULL DEFAULT 0,
+        total_revenue REAL NOT NULL DEFAULT 0
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS trg_sales_totals_insert AFTER INSERT ON sales BEGIN
+        INSERT INTO sales_item_totals (item_name, quantity, revenue)
+        VALUES (NEW.item_name, NEW.quantity, NEW.price * NEW.quantity)
+        ON CONFLICT (item_name) DO UPDATE
+        SET quantity = quantity + excluded.quantity,
+            revenue  = revenue + excluded.revenue;
+        UPDATE sales_summary
+        SET total_quantity = total_quantity + NEW.quantity,
+            total_revenue  = total_revenue + NEW.price * NEW.quantity
+        WHERE id = 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_sales_totals_delete AFTER DELETE ON sales BEGIN
+        UPDATE sales_item_totals
+        SET quantity = quantity - OLD.quantity,
+            revenue  = revenue - OLD.price * OLD.quantity
+        WHERE item_name = OLD.item_name;
+        UPDATE sales_summary
+        SET total_quantity = total_quantity - OLD.quantity,
+            total_revenue  = total_revenue - OLD.price * OLD.quantity
+        WHERE id = 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_sales_totals_update
+    AFTER UPDATE OF item_name, price, quantity ON sales BEGIN
+        UPDATE sales_item_totals
+        SET quantity = quantity - OLD.quantity,
+            revenue  = revenue - OLD.price * OLD.quantity
+        WHERE item_name = OLD.item_name;
+        INSERT INTO sales_item_totals (item_name, quantity, revenue)
+        VALUES (NEW.item_name, NEW.quantity, NEW.price * NEW.quantity)
+        ON CONFLICT (item_name) DO UPDATE
+        SET quantity = quantity + excluded.quantity,
+            revenue  = revenue + excluded.revenue;
+        UPDATE sales_summary
+        SET total_quantity = total_quantity - OLD.quantity + NEW.quantity,
+            total_revenue  = total_revenue - OLD.price * OLD.quantity + NEW.price * NEW.quantity
+        WHERE id = 1;
+    END""",
+    # Backfill from the existing history
+    """INSERT OR REPLACE INTO sales_item_totals (item_name, quantity, revenue)
+       SELECT item_name, SUM(quantity), SUM(price * quantity) FROM sales GROUP BY item_name""",
+    """INSERT OR REPLACE INTO sales_summary (id, total_quantity, total_revenue)
+       SELECT 1, COALESCE(SUM(quantity), 0), COALESCE(SUM(price * quantity), 0) FROM sales""",
+]
+
+CART_FLUSH_STATE = [
+    # Last session-cart journal entry applied per user, so journal replay is idempotent
+    """CREATE TABLE IF NOT EXISTS cart_flush_state (
+        username TEXT PRIMARY KEY,
+        seq INTEGER NOT NULL
+    )""",
+]
+
+MENU_CATEGORIES = [
+    "ALTER TABLE menu ADD COLUMN category TEXT NOT NULL DEFAULT 'General'",
+]
+
+DATA_VERSIONS = [
+    # Bumped by triggers on every write, so caches in any process can tell when data changed
+    """CREATE TABLE IF NOT EXISTS data_versions (
+        name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    )""",
+    "INSERT OR IGNORE INTO data_versions (name, version) VALUES ('menu', 0), ('sales', 0)",
+] + [
+    f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{event.lower()} AFTER {event} ON {table} BEGIN
+        UPDATE data_versions SET version = version + 1 WHERE name = '{table}';
+    END"""
+    for table in ("menu", "sales")
+    for event in ("INSERT", "UPDATE", "DELETE")
+]
+
+
+def _rollup_triggers(table, bucket_expr):
+    """Triggers that keep a per-(bucket, item) rollup of timestamped sales current."""
+    new_bucket = bucket_expr.format(row="NEW")
+    old_bucket = bucket_expr.format(row="OLD")
+    add_new = f"""INSERT INTO {table} (bucket, item_name, quantity, revenue)
+        VALUES ({new_bucket}, NEW.item_name, NEW.quantity, NEW.price * NEW.quantity)
+        ON CONFLICT (bucket, item_name) DO UPDATE
+        SET quantity = quantity + excluded.quantity,
+            revenue  = revenue + excluded.revenue;"""
+    remove_old = f"""UPDATE {table}
+        SET quantity = quantity - OLD.quantity,
+            revenue  = revenue - OLD.price * OLD.quantity
+        WHERE bucket = {old_bucket} AND item_name = OLD.item_name;"""
+    return [
+        f"""CREATE TABLE IF NOT EXISTS {table} (
+            bucket TEXT NOT NULL,
+            item_name TEXT NOT NULL,
+            quantity INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (bucket, item_name)
+        ) WITHOUT ROWID""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_insert AFTER INSERT ON sales
+        WHEN NEW.sold_at IS NOT NULL BEGIN
+            {add_new}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_delete AFTER DELETE ON sales
+        WHEN OLD.sold_at IS NOT NULL BEGIN
+            {remove_old}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_update_old
+        AFTER UPDATE OF item_name, price, quantity, sold_at ON sales
+        WHEN OLD.sold_at IS NOT NULL BEGIN
+            {remove_old}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_update_new
+        AFTER UPDATE OF item_name, price, quantity, sold_at ON sales
+        WHEN NEW.sold_at IS NOT NULL BEGIN
+            {add_new}
+        END""",
+    ]
+
+
+SALES_LEDGER = [
+    """CREATE TABLE IF NOT EXISTS orders (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        total REAL NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_orders_created_at ON orders(created_at)",
+    # Rows sold before this migration keep NULL here: they count toward all-time totals only
+    "ALTER TABLE sales ADD COLUMN order_id INTEGER REFERENCES orders(id)",
+    "ALTER TABLE sales ADD COLUMN sold_at TEXT",
+    "CREATE INDEX IF NOT EXISTS idx_sales_sold_at ON sales(sold_at)",
+    "CREATE INDEX IF NOT EXISTS idx_sales_order_id ON sales(order_id)",
+] + _rollup_triggers("sales_daily", "substr({row}.sold_at, 1, 10)") \
+  + _rollup_triggers("sales_monthly", "substr({row}.sold_at, 1, 7)")
+
+USER_ACCOUNTS = [
+    # Sign-up used to check-then-insert without a lock; keep the oldest of any duplicates
+    "DELETE FROM users WHERE id NOT IN (SELECT MIN(id) FROM users GROUP BY username, role)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_users_username_role ON users(username, role)",
+]
+
+MENU_CHANGE_LOG_ROWS = 10000
+
+MENU_CHANGE_FEED = [
+    # Row-level log of menu writes; change_feed.ChangeFeed tails it by id from any process
+    """CREATE TABLE IF NOT EXISTS menu_changes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        menu_id INTEGER NOT NULL,
+        op TEXT NOT NULL CHECK (op IN ('insert', 'update', 'delete')),
+        item_name TEXT NOT NULL,
+        price REAL,
+        quantity INTEGER,
+        old_quantity INTEGER,
+        category TEXT
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS trg_menu_changes_insert AFTER INSERT ON menu BEGIN
+        INSERT INTO menu_changes (menu_id, op, item_name, price, quantity, old_quantity, category)
+        VALUES (NEW.id, 'insert', NEW.item_name, NEW.price, NEW.quantity, NULL, NEW.category);
+    END""",
+    # Upserts that change nothing (same price, no stock delta) are not logged
+    """CREATE TRIGGER IF NOT EXISTS trg_menu_changes_update AFTER UPDATE ON menu
+    WHEN OLD.item_name IS NOT NEW.item_name OR OLD.price IS NOT NEW.price
+      OR OLD.quantity IS NOT NEW.quantity OR OLD.category IS NOT NEW.category BEGIN
+        INSERT INTO menu_changes (menu_id, op, item_name, price, quantity, old_quantity, category)
+        VALUES (NEW.id, 'update', NEW.item_name, NEW.price, NEW.quantity, OLD.quantity, NEW.category);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_menu_changes_delete AFTER DELETE ON menu BEGIN
+        INSERT INTO menu_changes (menu_id, op, item_name, price, quantity, old_quantity, category)
+        VALUES (OLD.id, 'delete', OLD.item_name, NULL, NULL, OLD.quantity, OLD.category);
+    END""",
+    # Keep the log bounded; a reader that falls further behind than this resyncs from the menu
+    f"""CREATE TRIGGER IF NOT EXISTS trg_menu_changes_prune AFTER INSERT ON menu_changes
+    WHEN NEW.id % 1000 = 0 BEGIN
+        DELETE FROM menu_changes WHERE id <= NEW.id - {MENU_CHANGE_LOG_ROWS};
+    END""",
+]
+
+COMMENT_SEARCH = [
+    # Comments written before this migration keep NULL author and created_at
+    "ALTER TABLE comments ADD COLUMN author TEXT",
+    "ALTER TABLE comments ADD COLUMN created_at TEXT",
+    # External-content FTS5 index: the text is stored once, in comments
+    """CREATE VIRTUAL TABLE IF NOT EXISTS comments_fts USING fts5(
+        comment, content='comments', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS trg_comments_fts_insert AFTER INSERT ON comments BEGIN
+        INSERT INTO comments_fts (rowid, comment) VALUES (NEW.id, NEW.comment);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_comments_fts_delete AFTER DELETE ON comments BEGIN
+        INSERT INTO comments_fts (comments_fts, rowid, comment) VALUES ('delete', OLD.id, OLD.comment);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_comments_fts_update AFTER UPDATE OF comment ON comments BEGIN
+        INSERT INTO comments_fts (comments_fts, rowid, comment) VALUES ('delete', OLD.id, OLD.comment);
+        INSERT INTO comments_fts (rowid, comment) VALUES (NEW.id, NEW.comment);
+    END""",
+    "INSERT INTO comments_fts (comments_fts) VALUES ('rebuild')",
+]
+
+
+def _basket_updates(row, step):
+    """Statements that add (step=1) or remove (step=-1) sales row `row` from the basket counts.
+
+    A basket is one order. Only the first row of an item in an order counts, so a
+    repeated item never pairs with itself or counts twice.
+    """
+    others = f"FROM sales WHERE order_id = {row}.order_id AND id != {row}.id"
+    first_of_item = f"NOT EXISTS (SELECT 1 {others} AND item_name = {row}.item_name)"
+    if step > 0:
+        return f"""UPDATE basket_summary SET baskets = baskets + 1
+        WHERE id = 1 AND NOT EXISTS (SELECT 1 {others});
+        INSERT INTO basket_items (item_name, baskets)
+        SELECT {row}.item_name, 1 WHERE {first_of_item}
+        ON CONFLICT (item_name) DO UPDATE SET baskets = baskets + 1;
+        INSERT INTO basket_pairs (item_a, item_b, baskets)
+        SELECT min({row}.item_name, item_name), max({row}.item_name, item_name), 1
+        FROM (SELECT DISTINCT item_name {others} AND item_name != {row}.item_name)
+        WHERE {first_of_item}
+        ON CONFLICT (item_a, item_b) DO UPDATE SET baskets = baskets + 1;"""
+    return f"""UPDATE basket_summary SET baskets = baskets - 1
+        WHERE id = 1 AND NOT EXISTS (SELECT 1 {others});
+        UPDATE basket_items SET baskets = baskets - 1
+        WHERE item_name = {row}.item_name AND {first_of_item};
+        DELETE FROM basket_items WHERE item_name = {row}.item_name AND baskets <= 0;
+        UPDATE basket_pairs SET baskets = baskets - 1
+        WHERE {first_of_item} AND (item_a, item_b) IN (
+            SELECT min({row}.item_name, item_name), max({row}.item_name, item_name)
+            {others} AND item_name != {row}.item_name
+        );
+        DELETE FROM basket_pairs
+        WHERE (item_a = {row}.item_name OR item_b = {row}.item_name) AND baskets <= 0;"""
+
+
+# Recount the basket tables from sales; shared with aggregates.rebuild
+BASKET_BACKFILL = [
+    "DELETE FROM basket_pairs",
+    "DELETE FROM basket_items",
+    """INSERT OR REPLACE INTO basket_summary (id, baskets)
+       SELECT 1, COUNT(DISTINCT order_id) FROM sales WHERE order_id IS NOT NULL""",
+    """INSERT INTO basket_items (item_name, baskets)
+       SELECT item_name, COUNT(DISTINCT order_id) FROM sales WHERE order_id IS NOT NULL GROUP BY item_name""",
+    """INSERT INTO basket_pairs (item_a, item_b, baskets)
+       WITH lines AS (SELECT DISTINCT order_id, item_name FROM sales WHERE order_id IS NOT NULL)
+       SELECT a.item_name, b.item_name, COUNT(*)
+       FROM lines a JOIN lines b ON b.order_id = a.order_id AND b.item_name > a.item_name
+       GROUP BY a.item_name, b.item_name""",
+]
+
+MARKET_BASKETS = [
+    # Orders (baskets) containing each item, and each pair of items, kept current by
+    # triggers so association metrics never self-join the sales history
+    """CREATE TABLE IF NOT EXISTS basket_summary (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        baskets INTEGER NOT NULL DEFAULT 0
+    )""",
+    """CREATE TABLE IF NOT EXISTS basket_items (
+        item_name TEXT PRIMARY KEY,
+        baskets INTEGER NOT NULL
+    ) WITHOUT ROWID""",
+    # Sparse: a pair only has a row once it has been bought together; item_a < item_b
+    """CREATE TABLE IF NOT EXISTS basket_pairs (
+        item_a TEXT NOT NULL,
+        item_b TEXT NOT NULL,
+        baskets INTEGER NOT NULL,
+        PRIMARY KEY (item_a, item_b)
+    ) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS idx_basket_pairs_item_b ON basket_pairs(item_b)",
+    "CREATE INDEX IF NOT EXISTS idx_basket_pairs_baskets ON basket_pairs(baskets)",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_basket_insert AFTER INSERT ON sales
+    WHEN NEW.order_id IS NOT NULL BEGIN
+        {_basket_updates("NEW", 1)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_basket_delete AFTER DELETE ON sales
+    WHEN OLD.order_id IS NOT NULL BEGIN
+        {_basket_updates("OLD", -1)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_basket_update_old AFTER UPDATE OF item_name, order_id ON sales
+    WHEN OLD.order_id IS NOT NULL BEGIN
+        {_basket_updates("OLD", -1)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_basket_update_new AFTER UPDATE OF item_name, order_id ON sales
+    WHEN NEW.order_id IS NOT NULL BEGIN
+        {_basket_updates("NEW", 1)}
+    END""",
+] + BASKET_BACKFILL
+
+# (version, description, statements) -- append only, never edit a shipped entry
+MIGRATIONS = [
+    (1, "base schema", BASE_SCHEMA),
+    (2, "hot-path indexes and case-insensitive menu key", HOT_PATH_INDEXES),
+    (3, "trigger-maintained sales aggregates", SALES_AGGREGATES),
+    (4, "session cart flush state", CART_FLUSH_STATE),
+    (5, "menu categories", MENU_CATEGORIES),
+    (6, "data version counters", DATA_VERSIONS),
+    (7, "timestamped sales ledger with daily/monthly rollups", SALES_LEDGER),
+    (8, "unique (username, role) accounts", USER_ACCOUNTS),
+    (9, "menu change feed", MENU_CHANGE_FEED),
+    (10, "comment authors, timestamps and full-text index", COMMENT_SEARCH),
+    (11, "market-basket item and pair counts", MARKET_BASKETS),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn, target=LATEST_VERSION):
+    """Apply every pending migration up to `target`, one transaction per version."""
+    current = get_version(conn)
+    for version, _description, statements in MIGRATIONS:
+        if version <= current or version > target:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        # Another terminal may have migrated while we waited for the write lock
+        if get_version(conn) >= version:
+            conn.execute("COMMIT")
+            current = version
+            continue
+        try:
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        current = version
+    return current
@@ -0,0 +1,105 @@
+"""One top-level window that keeps screens alive, plus a process-wide cache of scaled pixmaps."""
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QBrush, QPalette, QPixmap
+from PyQt5.QtWidgets import QStackedWidget
+
+from instrumentation import get_metrics, is_enabled
+
+WINDOW_SIZE = (1400, 900)
+BACKGROUND = "bg.jpg"
+LOGIN_SCREEN = "login"
+
+_pixmaps = {}
+
+
+def scaled_pixmap(path, size, mode=Qt.IgnoreAspectRatio):
+    """Load and smooth-scale an image once per (path, size, mode); later calls are free.
+
+    A missing file is cached as a null pixmap so it isn't looked up on every screen.
+    """
+    key = (path, size.width(), size.height(), mode)
+    pixmap = _pixmaps.get(key)
+    if pixmap is None:
+        pixmap = QPixmap(path)
+        if not pixmap.isNull():
+            pixmap = pixmap.scaled(size, mode, Qt.SmoothTransformation)
+        _pixmaps[key] = pixmap
+    return pixmap
+
+
+def apply_background(widget, path=BACKGROUND):
+    pixmap = scaled_pixmap(path, widget.size())
+    if pixmap.isNull():
+        return False
+    palette = widget.palette()
+    palette.setBrush(QPalette.Window, QBrush(pixmap))
+    widget.setPalette(palette)
+    # Screens inside the stack are child widgets, which don't paint their palette by default
+    widget.setAutoFillBackground(True)
+    return True
+
+
+class WindowStack(QStackedWidget):
+    """Switches between screens that are built once and kept alive.
+
+    Screens are registered by key, e.g. ("admin", username). Showing a screen that
+    already exists calls its optional `screen_shown()` hook to refresh its data
+    instead of rebuilding the widget.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.setFixedSize(*WINDOW_SIZE)
+        self._screens = {}
+
+    def show_screen(self, key, factory):
+        screen = self._screens.get(key)
+        created = screen is None
+        if created:
+            screen = self._timed(key, "build", factory)
+            self._screens[key] = screen
+            self.addWidget(screen)
+        self.setCurrentWidget(screen)
+        self.setWindowTitle(screen.windowTitle())
+        if not created and hasattr(screen, "screen_shown"):
+            self._timed(key, "refresh", screen.screen_shown)
+        self.show()
+        return screen
+
+    @staticmethod
+    def _timed(key, action, fn):
+        if not is_enabled():
+            return fn()
+        with get_metrics().timer("screen", f"{action} {key[0] if isinstance(key, tuple) else key}"):
+            return fn()
+
+    def discard(self, keep=()):
+        """Close and drop every screen except the keys in `keep` (e.g. on logout)."""
+        for key in list(self._screens):
+            if key in keep:
+                continue
+            screen = self._screens.pop(key)
+            screen.close()
+            self.removeWidget(screen)
+            screen.deleteLater()
+
+    def reset(self, key, factory):
+        self.discard(keep=(key,))
+        return self.show_screen(key, factory)
+
+    def closeEvent(self, event):
+        # Child widgets only get hidden with the window; close them so they flush and cancel work
+        for screen in self._screens.values():
+            screen.close()
+        super().closeEvent(event)
+
+
+_stack = None
+
+
+def get_window_stack():
+    # Qt widgets live on the GUI thread, so unlike the database singletons this needs no lock
+    global _stack
+    if _stack is None:
+        _stack = WindowStack()
+    return _stack
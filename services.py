@@ -0,0 +1,132 @@
+"""UI-free restaurant operations shared by the Qt screens, the HTTP API and load tests.
+
+Every method takes and returns plain values (namedtuples, dataclasses, lists), so a
+kitchen display, a tablet front-end or a benchmark can drive the same code paths as
+the desktop screens without importing Qt.
+"""
+import threading
+from collections import namedtuple
+
+from checkout import CheckoutEngine, get_checkout_engine
+from database import get_db
+from insights import InsightsEngine, get_insights_engine
+
+MAX_PAGE_SIZE = 500
+MAX_COMMENT_LENGTH = 1000
+
+CartView = namedtuple("CartView", ["username", "lines", "total"])
+MenuEntry = namedtuple("MenuEntry", ["id", "item_name", "price", "quantity"])
+
+
+class ServiceError(Exception):
+    """A request the service refuses; `status` is the matching HTTP status code."""
+
+    status = 400
+
+
+class NotFoundError(ServiceError):
+    status = 404
+
+
+class OutOfStockError(ServiceError):
+    status = 409
+
+
+def cart_total(lines):
+    """Sum of price * quantity over (item_name, quantity, price) cart lines."""
+    return round(sum(line.price * line.quantity for line in lines), 2)
+
+
+def _page_size(limit):
+    if limit < 1:
+        raise ServiceError("limit must be at least 1")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+class RestaurantService:
+    """Menu, cart, checkout, insights and comments over one Database.
+
+    The methods listed in WRITES change the database; the HTTP API sends those
+    through its single writer queue and runs everything else on concurrent readers.
+    """
+
+    WRITES = frozenset({"add_to_cart", "remove_from_cart", "checkout", "add_comment"})
+
+    def __init__(self, db=None, engine=None, insights=None):
+        self.db = db or get_db()
+        if db is None:
+            self.engine = engine or get_checkout_engine()
+            self.insights = insights or get_insights_engine()
+        else:
+            self.engine = engine or CheckoutEngine(db)
+            self.insights = insights or InsightsEngine(db)
+
+    # --- Menu
+    def menu(self, after_id=None, limit=200):
+        return [MenuEntry(*row) for row in self.db.get_menu_page(after_id, _page_size(limit))]
+
+    def low_stock(self, threshold=3):
+        return self.insights.low_stock_items(threshold)
+
+    # --- Cart and checkout
+    def cart(self, username):
+        lines = self.db.get_cart(username)
+        return CartView(username, lines, cart_total(lines))
+
+    def add_to_cart(self, username, item_name, quantity=1):
+        if quantity < 1:
+            raise ServiceError("quantity must be at least 1")
+        if not self.db.add_to_cart(username, item_name, quantity):
+            raise OutOfStockError(f"Not enough stock for {item_name}")
+        return self.cart(username)
+
+    def remove_from_cart(self, username, item_name):
+        if not self.db.delete_from_cart(username, item_name):
+            raise NotFoundError(f"{item_name} is not in the cart")
+        return self.cart(username)
+
+    def checkout(self, username):
+        """Return the Receipt; raises checkout.CheckoutError for an empty cart or missing stock."""
+        return self.engine.checkout(username)
+
+    # --- Insights
+    def trending(self, limit=5, start=None, end=None):
+        return self.insights.trending_items(_page_size(limit), start, end)
+
+    def inventory_stats(self):
+        return self.insights.inventory_stats()
+
+    def bought_together(self, limit=5, item_name=None):
+        return self.insights.bought_together(_page_size(limit), item_name)
+
+    def reorder(self, limit=20):
+        """Items at or below their forecast reorder point, soonest stockout first."""
+        return self.insights.reorder_items(_page_size(limit))
+
+    def total_sales(self, start=None, end=None):
+        return self.db.get_total_sales(start, end)
+
+    # --- Comments
+    def comments(self, before_id=None, limit=50, query=None):
+        """Newest first; `query` keeps comments containing every word (as a prefix)."""
+        return self.db.get_comments_page(before_id, _page_size(limit), query)
+
+    def add_comment(self, comment, author=None):
+        comment = comment.strip()
+        if not comment:
+            raise ServiceError("comment is empty")
+        if len(comment) > MAX_COMMENT_LENGTH:
+            raise ServiceError(f"comment is longer than {MAX_COMMENT_LENGTH} characters")
+        self.db.add_comment(comment, author)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service():
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = RestaurantService()
+        return _service
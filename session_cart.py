@@ -0,0 +1,254 @@
+"""In-memory shopping cart that reserves stock locally and flushes to the cart table in batches.
+
+Every change is appended to a per-user journal file before it is applied in memory,
+so lines that were not flushed yet survive a crash and are replayed on the next
+session. Flushes record the last journal sequence number in `cart_flush_state` in
+the same transaction, which makes replay idempotent.
+"""
+import json
+import os
+import re
+import threading
+from collections import OrderedDict, defaultdict, namedtuple
+
+from checkout import CheckoutEngine, get_checkout_engine
+from database import get_db
+
+JOURNAL_DIR = os.environ.get("RESTAURANT_CART_JOURNAL_DIR", ".cart_journal")
+
+FlushResult = namedtuple("FlushResult", ["flushed", "shortfalls"])
+
+
+class InventoryLedger:
+    """Process-wide stock view: last known database quantity minus unflushed reservations."""
+
+    def __init__(self, db=None):
+        self.db = db or get_db()
+        self._lock = threading.Lock()
+        self._stock = {}
+        self._pending = defaultdict(int)
+        self.reload()
+
+    def reload(self):
+        stock = {item.item_name.casefold(): item.quantity for item in self.db.get_menu()}
+        with self._lock:
+            self._stock = stock
+
+    def observe(self, item_name, quantity):
+        with self._lock:
+            self._stock[item_name.casefold()] = quantity
+
+    def available(self, item_name):
+        key = item_name.casefold()
+        with self._lock:
+            return self._stock.get(key, 0) - self._pending[key]
+
+    def reserve(self, item_name, quantity=1, force=False):
+        key = item_name.casefold()
+        with self._lock:
+            if not force and self._stock.get(key, 0) - self._pending[key] < quantity:
+                return False
+            self._pending[key] += quantity
+            return True
+
+    def release(self, item_name, quantity):
+        with self._lock:
+            self._pending[item_name.casefold()] -= quantity
+
+    def settle(self, item_name, requested, applied):
+        """Called after a flush committed: `applied` units actually left (or returned to) the menu."""
+        key = item_name.casefold()
+        with self._lock:
+            self._pending[key] -= requested
+            self._stock[key] = self._stock.get(key, 0) - applied
+
+
+class SessionCart:
+    def __init__(self, username, db=None, ledger=None, engine=None, journal_dir=JOURNAL_DIR):
+        self.username = username
+        self.db = db or get_db()
+        self.ledger = ledger or get_ledger()
+        self.engine = engine or (get_checkout_engine() if db is None else CheckoutEngine(db))
+        self._lock = threading.RLock()
+        # Flushes must commit in journal order, so only one runs at a time
+        self._flush_lock = threading.Lock()
+        self._lines = OrderedDict()    # item_name -> [price, quantity]
+        self._pending = OrderedDict()  # item_name -> [price, delta] not yet in the cart table
+        self._seq = 0
+
+        os.makedirs(journal_dir, exist_ok=True)
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", username)
+        self._journal_path = os.path.join(journal_dir, f"{safe_name}.jsonl")
+
+        for line in self.db.get_cart(username):
+            self._lines[line.item_name] = [line.price, line.quantity]
+        self._recover()
+
+    # --- Journal
+    def _recover(self):
+        applied = self.db.get_cart_flush_seq(self.username)
+        self._seq = applied
+        if not os.path.exists(self._journal_path):
+            return
+        with open(self._journal_path, encoding="utf-8") as journal:
+            for raw in journal:
+                try:
+                    entry = json.loads(raw)
+                except ValueError:
+                    break  # torn write at the tail of the journal
+                self._seq = max(self._seq, entry["seq"])
+                if entry["seq"] <= applied:
+                    continue
+                self.ledger.reserve(entry["item"], entry["delta"], force=True)
+                self._apply(entry["item"], entry["price"], entry["delta"])
+        if self._pending:
+            self.flush()
+        else:
+            self._rewrite_journal(self._seq)
+
+    def _append(self, item_name, price, delta):
+        self._seq += 1
+        with open(self._journal_path, "a", encoding="utf-8") as journal:
+            journal.write(json.dumps({"seq": self._seq, "item": item_name, "price": price, "delta": delta}) + "\n")
+
+    def _rewrite_journal(self, flushed_seq):
+        if not os.path.exists(self._journal_path):
+            return
+        with open(self._journal_path, encoding="utf-8") as journal:
+            keep = [raw for raw in journal if raw.strip() and _entry_seq(raw) > flushed_seq]
+        tmp_path = self._journal_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as journal:
+            journal.writelines(keep)
+        os.replace(tmp_path, self._journal_path)
+
+    # --- Cart operations (memory only)
+    def _apply(self, item_name, price, delta):
+        line = self._lines.setdefault(item_name, [price, 0])
+        line[1] += delta
+        if line[1] <= 0:
+            del self._lines[item_name]
+        pending = self._pending.setdefault(item_name, [price, 0])
+        pending[1] += delta
+        if pending[1] == 0:
+            del self._pending[item_name]
+
+    def add(self, item_name, price, quantity=1):
+        with self._lock:
+            if item_name in self._lines:
+                price = self._lines[item_name][0]
+            if not self.ledger.reserve(item_name, quantity):
+                return False
+            self._append(item_name, price, quantity)
+            self._apply(item_name, price, quantity)
+            return True
+
+    def remove(self, item_name):
+        with self._lock:
+            line = self._lines.get(item_name)
+            if not line:
+                return False
+            price, quantity = line
+            self._append(item_name, price, -quantity)
+            self._apply(item_name, price, -quantity)
+            self.ledger.release(item_name, quantity)
+            return True
+
+    def lines(self):
+        with self._lock:
+            return [(name, price, quantity) for name, (price, quantity) in self._lines.items()]
+
+    def page(self, after=None, limit=200):
+        # Rows shaped for QueryTableModel: key first, then the displayed columns
+        rows = [(index, *line) for index, line in enumerate(self.lines(), start=1)]
+        start = after or 0
+        return rows[start:start + limit]
+
+    def total(self):
+        with self._lock:
+            return sum(price * quantity for price, quantity in self._lines.values())
+
+    def has_pending(self):
+        with self._lock:
+            return bool(self._pending)
+
+    # --- Persistence
+    def flush(self):
+        """Write every pending change to the cart table in one transaction."""
+        with self._flush_lock:
+            return self._flush()
+
+    def _flush(self):
+        with self._lock:
+            if not self._pending:
+                return FlushResult(0, [])
+            batch = [(name, price, delta) for name, (price, delta) in self._pending.items()]
+            flushed_seq = self._seq
+            self._pending.clear()
+
+        try:
+            applied = self.db.apply_cart_changes(self.username, batch, flushed_seq)
+        except BaseException:
+            with self._lock:
+                # Merge the batch back with anything added while it was in flight
+                for name, price, delta in batch:
+                    pending = self._pending.setdefault(name, [price, 0])
+                    pending[1] += delta
+            raise
+
+        shortfalls = []
+        with self._lock:
+            for (name, price, delta), taken in zip(batch, applied):
+                self.ledger.settle(name, delta, taken)
+                if taken < delta:
+                    # Another terminal sold the stock first; shrink the line to what we got
+                    shortfalls.append((name, delta - taken))
+                    line = self._lines.get(name)
+                    if line:
+                        line[1] -= delta - taken
+                        if line[1] <= 0:
+                            del self._lines[name]
+            self._rewrite_journal(flushed_seq)
+        return FlushResult(len(batch), shortfalls)
+
+    def checkout(self):
+        # No flush may run until the checkout commits, or it could slip new lines into the order
+        with self._flush_lock:
+            while True:
+                result = self._flush()
+                if result.shortfalls:
+                    return None, result.shortfalls
+                with self._lock:
+                    if not self._pending:
+                        # The cart table holds exactly these lines; changes from here on
+                        # start the next cart, so add and remove never wait for the checkout
+                        ordered, self._lines = self._lines, OrderedDict()
+                        break
+            try:
+                receipt = self.engine.checkout(self.username)
+            except BaseException:
+                with self._lock:
+                    # The lines are still in the cart table; put them back ahead of any new ones
+                    for name, (price, quantity) in self._lines.items():
+                        line = ordered.setdefault(name, [price, 0])
+                        line[1] += quantity
+                    self._lines = ordered
+                raise
+        return receipt, []
+
+def _entry_seq(raw):
+    try:
+        return json.loads(raw)["seq"]
+    except ValueError:
+        return 0
+
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+
+def get_ledger():
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = InventoryLedger()
+        return _ledger
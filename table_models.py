@@ -0,0 +1,295 @@
+import sys
+from bisect import bisect_left
+from collections import Counter
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel, QVariant, pyqtSignal
+
+from menu_search import MenuSearchIndex, normalize
+
+PAGE_SIZE = 200
+
+
+class QueryTableModel(QAbstractTableModel):
+    """Table model that pages rows in on demand and patches only changed rows on refresh.
+
+    `fetch_page(after_key, limit)` must return rows ordered by a stable key, where
+    row[0] is that key and row[1:] are the displayed columns. `after_key` is None
+    for the first page. With an `executor` (db_worker.QueryExecutor) pages are
+    fetched off the GUI thread and `loadingChanged` reports when a fetch is in flight.
+    """
+
+    loadingChanged = pyqtSignal(bool)
+
+    def __init__(self, headers, fetch_page, formatters=None, page_size=PAGE_SIZE, executor=None, parent=None):
+        super().__init__(parent)
+        self.headers = headers
+        self.fetch_page = fetch_page
+        self.formatters = formatters or {}
+        self.page_size = page_size
+        self.executor = executor
+        self.loading = False
+        self._rows = []
+        self._exhausted = False
+        self._key = ("table_model", id(self))
+
+    # --- Qt model interface
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return QVariant()
+        value = self._rows[index.row()][index.column() + 1]
+        formatter = self.formatters.get(index.column(), str)
+        return formatter(value)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return QVariant()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted and not self.loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted or self.loading:
+            return
+        after = self._rows[-1][0] if self._rows else None
+        self._run(self._append_page, after, self.page_size)
+
+    # --- Helpers
+    def row_values(self, row):
+        return self._rows[row][1:]
+
+    def find_row(self, column, value):
+        for row, data in enumerate(self._rows):
+            if data[column + 1] == value:
+                return row
+        return -1
+
+    def set_row_values(self, row, values):
+        """Patch one row in place without a round trip to the database."""
+        self._rows[row] = (self._rows[row][0], *values)
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.headers) - 1))
+
+    def patch_rows(self, updates, removed=()):
+        """Apply row-level changes by key without re-reading the table.
+
+        `updates` maps keys to displayed values. Loaded rows are patched in place; a
+        new key is inserted at its position unless it lies past the last loaded row of
+        a model that still has pages to fetch, which will bring it in. Only for models
+        whose fetch_page orders rows by ascending key.
+        """
+        removed = set(removed)
+        for row in reversed(range(len(self._rows))):
+            if self._rows[row][0] in removed:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self._rows[row]
+                self.endRemoveRows()
+
+        positions = {data[0]: row for row, data in enumerate(self._rows)}
+        inserts = []
+        for key, values in updates.items():
+            row = positions.get(key)
+            if row is None:
+                if self._exhausted or (self._rows and key < self._rows[-1][0]):
+                    inserts.append((key, *values))
+            elif self._rows[row][1:] != tuple(values):
+                self.set_row_values(row, values)
+
+        for data in sorted(inserts):
+            row = bisect_left([existing[0] for existing in self._rows], data[0])
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._rows.insert(row, data)
+            self.endInsertRows()
+
+    def refresh(self):
+        """Re-read the rows already paged in and emit changes only where they differ."""
+        if not self._rows:
+            self._exhausted = False
+            self._set_loading(False)
+            self.fetchMore()
+            return
+        loaded = max(len(self._rows), self.page_size)
+        self._run(lambda fresh: self._apply(fresh, exhausted=len(fresh) < loaded), None, loaded)
+
+    def reload(self):
+        """Drop every loaded row and fetch the first page again, e.g. after a filter changed."""
+        if self.executor is not None:
+            self.executor.cancel(self._key)
+        self._set_loading(False)
+        self.beginResetModel()
+        self._rows = []
+        self._exhausted = False
+        self.endResetModel()
+        self.fetchMore()
+
+    def _run(self, apply, after, limit):
+        if self.executor is None:
+            apply(self.fetch_page(after, limit))
+            return
+        self._set_loading(True)
+        self.executor.submit(
+            self._key, self.fetch_page, after, limit,
+            on_result=lambda rows: self._finish(apply, rows),
+            on_error=self._failed,
+        )
+
+    def _finish(self, apply, rows):
+        self._set_loading(False)
+        apply(rows)
+
+    def _failed(self, error):
+        self._set_loading(False)
+        print(f"Could not load table rows: {error!r}", file=sys.stderr)
+
+    def _set_loading(self, loading):
+        if loading != self.loading:
+            self.loading = loading
+            self.loadingChanged.emit(loading)
+
+    def _append_page(self, rows):
+        if len(rows) < self.page_size:
+            self._exhausted = True
+        if rows:
+            first = len(self._rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+            self._rows.extend(rows)
+            self.endInsertRows()
+
+    def _apply(self, fresh, exhausted):
+        old_count, new_count = len(self._rows), len(fresh)
+        common = min(old_count, new_count)
+
+        # Coalesce changed rows into contiguous dataChanged ranges
+        start = None
+        for row in range(common + 1):
+            changed = row < common and self._rows[row] != fresh[row]
+            if changed:
+                self._rows[row] = fresh[row]
+                if start is None:
+                    start = row
+            elif start is not None:
+                self.dataChanged.emit(self.index(start, 0), self.index(row - 1, len(self.headers) - 1))
+                start = None
+
+        if new_count > old_count:
+            self.beginInsertRows(QModelIndex(), old_count, new_count - 1)
+            self._rows.extend(fresh[old_count:])
+            self.endInsertRows()
+        elif new_count < old_count:
+            self.beginRemoveRows(QModelIndex(), new_count, old_count - 1)
+            del self._rows[new_count:]
+            self.endRemoveRows()
+        self._exhausted = exhausted
+
+
+class SearchFilterProxyModel(QSortFilterProxyModel):
+    """Filters a QueryTableModel by a MenuSearchIndex over one column, keeping the source order.
+
+    The index follows the source model: names are added or removed as rows load,
+    refresh or disappear, so it is never rebuilt from the database. While a query
+    is active the rest of the source is paged in, because a match may not be loaded yet.
+    """
+
+    def __init__(self, column=0, parent=None):
+        super().__init__(parent)
+        self.column = column
+        self.search_index = MenuSearchIndex()
+        self.query = ""
+        self._row_keys = []         # normalized name of every source row, in source order
+        self._counts = Counter()    # normalized name -> source rows carrying it
+        self._matches = None        # normalized names matching the active query
+
+    def setSourceModel(self, model):
+        super().setSourceModel(model)
+        model.rowsInserted.connect(self._rows_inserted)
+        model.rowsRemoved.connect(self._rows_removed)
+        model.dataChanged.connect(self._rows_changed)
+        model.modelReset.connect(self._reset)
+        self._reset()
+
+    def set_query(self, text):
+        self.query = text.strip()
+        previous = self._matches
+        self._match()
+        # Typing often narrows to the same set ("larg" -> "large"); skip the re-filter then
+        if self._matches != previous:
+            self.invalidateFilter()
+        self._fetch_rest()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self._matches is None:
+            return True
+        if source_row < len(self._row_keys):
+            return self._row_keys[source_row] in self._matches
+        # Qt filters inserted rows before _rows_inserted has seen them
+        return self._key(source_row) in self._matches
+
+    def _key(self, source_row):
+        return normalize(self.sourceModel().row_values(source_row)[self.column])
+
+    def _match(self):
+        if self.query:
+            self._matches = {normalize(name) for name in self.search_index.search(self.query)}
+        else:
+            self._matches = None
+
+    def _track(self, key, delta):
+        self._counts[key] += delta
+        if delta > 0 and self._counts[key] == 1:
+            self.search_index.add(key)
+            return True
+        if delta < 0 and self._counts[key] == 0:
+            del self._counts[key]
+            self.search_index.remove(key)
+            return True
+        return False
+
+    def _changed(self, index_changed):
+        if index_changed and self._matches is not None:
+            self._match()
+            self.invalidateFilter()
+
+    def _rows_inserted(self, parent, first, last):
+        keys = [self._key(row) for row in range(first, last + 1)]
+        self._row_keys[first:first] = keys
+        changed = False
+        for key in keys:
+            changed = self._track(key, 1) or changed
+        self._changed(changed)
+        self._fetch_rest()
+
+    def _rows_removed(self, parent, first, last):
+        keys = self._row_keys[first:last + 1]
+        del self._row_keys[first:last + 1]
+        changed = False
+        for key in keys:
+            changed = self._track(key, -1) or changed
+        self._changed(changed)
+
+    def _rows_changed(self, top_left, bottom_right, roles=()):
+        changed = False
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            key = self._key(row)
+            if key != self._row_keys[row]:
+                changed = self._track(key, 1) or changed
+                changed = self._track(self._row_keys[row], -1) or changed
+                self._row_keys[row] = key
+                changed = True
+        self._changed(changed)
+
+    def _reset(self):
+        self.search_index = MenuSearchIndex()
+        self._row_keys, self._counts = [], Counter()
+        source = self.sourceModel()
+        if source is not None and source.rowCount():
+            self._rows_inserted(QModelIndex(), 0, source.rowCount() - 1)
+
+    def _fetch_rest(self):
+        source = self.sourceModel()
+        if self.query and source is not None and source.canFetchMore():
+            source.fetchMore()
@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import checkout  # noqa: E402
+import database  # noqa: E402
+import session_cart  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A migrated database in tmp_path, installed as the get_db() singleton."""
+    test_db = database.Database(str(tmp_path / "restaurant.db"), pool_size=2)
+    monkeypatch.setattr(database, "_db", test_db)
+    monkeypatch.setattr(checkout, "_engine", None)
+    monkeypatch.setattr(session_cart, "_ledger", None)
+    yield test_db
+    test_db.close()
+
+
+@pytest.fixture
+def qapp():
+    QtWidgets = pytest.importorskip("PyQt5.QtWidgets")
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
@@ -0,0 +1,80 @@
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("PyQt5")
+
+from PyQt5.QtCore import QThreadPool  # noqa: E402
+from PyQt5.QtWidgets import QMessageBox  # noqa: E402
+
+import admin  # noqa: E402
+import menu_notifier  # noqa: E402
+
+
+def settle(app):
+    for _ in range(20):
+        QThreadPool.globalInstance().waitForDone()
+        app.processEvents()
+
+
+@pytest.fixture
+def admin_page(db, qapp, monkeypatch):
+    monkeypatch.setattr(menu_notifier, "_notifier", None)
+    monkeypatch.setattr(QMessageBox, "information", staticmethod(lambda *args, **kwargs: None))
+    monkeypatch.setattr(QMessageBox, "warning", staticmethod(lambda *args, **kwargs: None))
+    page = admin.AdminHome("alice")
+    settle(qapp)
+    yield page
+    page.close()
+    settle(qapp)
+
+
+def test_saving_an_unchanged_row_keeps_stock(db, qapp, admin_page):
+    db.upsert_menu_item("Burger", 8.5, 7)
+    admin_page.menu_model.refresh()
+    settle(qapp)
+
+    admin_page.fill_item_form(admin_page.menu_proxy.index(0, 0))
+    admin_page.add_item()
+    settle(qapp)
+
+    assert [(item.item_name, item.price, item.quantity) for item in db.get_menu()] == [("Burger", 8.5, 7)]
+
+
+def test_editing_the_price_keeps_stock(db, qapp, admin_page):
+    db.upsert_menu_item("Burger", 8.5, 7)
+    admin_page.menu_model.refresh()
+    settle(qapp)
+
+    admin_page.fill_item_form(admin_page.menu_proxy.index(0, 0))
+    admin_page.price_input.setText("9.25")
+    admin_page.add_item()
+    settle(qapp)
+
+    assert [(item.item_name, item.price, item.quantity) for item in db.get_menu()] == [("Burger", 9.25, 7)]
+
+
+def test_changing_the_sales_range_starts_again_from_the_first_page(db, qapp, admin_page):
+    today = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with db.transaction() as conn:
+        conn.executemany(
+            "INSERT INTO sales (username, item_name, price, quantity, sold_at) VALUES ('bob', ?, 2.5, 1, ?)",
+            [("Old", "2000-01-03 12:00:00")] * 5 + [("New", today)] * 5,
+        )
+    model = admin_page.sales_model
+    model.page_size = 2
+    admin_page.update_sales_table()
+    settle(qapp)
+    while model.canFetchMore():
+        model.fetchMore()
+        settle(qapp)
+    assert model.rowCount() == 10
+
+    resets = []
+    model.modelReset.connect(lambda: resets.append(model.rowCount()))
+    admin_page.sales_range_combo.setCurrentText("Today")
+    settle(qapp)
+
+    # The old range's pages are dropped rather than re-read row for row
+    assert resets == [0]
+    assert {model.row_values(row)[0] for row in range(model.rowCount())} == {"New"}
@@ -0,0 +1,40 @@
+import asyncio
+import json
+
+import pytest
+
+from api_server import ApiServer
+from services import RestaurantService
+
+
+@pytest.fixture
+def server(db):
+    server = ApiServer(RestaurantService(db))
+    yield server
+    server.readers.shutdown(wait=False)
+
+
+@pytest.mark.parametrize("body", [[], "x", 3])
+def test_add_comment_rejects_a_body_that_is_not_an_object(server, body):
+    status, payload = asyncio.run(server.respond("POST", "/comments", json.dumps(body).encode()))
+
+    assert status == 400
+    assert "comment" in json.loads(payload)["error"]
+
+
+@pytest.mark.parametrize("length", ["-1", "abc"])
+def test_invalid_content_length_gets_400(server, length):
+    async def send():
+        listener = await asyncio.start_server(server.handle_connection, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"POST /comments HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode())
+        response = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        listener.close()
+        await listener.wait_closed()
+        return response
+
+    status_line = asyncio.run(send()).split(b"\r\n", 1)[0]
+
+    assert status_line == b"HTTP/1.1 400 Bad Request"
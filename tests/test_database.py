@@ -0,0 +1,35 @@
+import sqlite3
+
+import pytest
+
+from database import Database
+
+
+def test_add_to_cart_uses_the_menu_spelling(db):
+    db.upsert_menu_item("Burger", 8.5, 5)
+
+    assert db.add_to_cart("bob", "burger")
+    assert db.add_to_cart("bob", "BURGER")
+
+    assert [(line.item_name, line.quantity) for line in db.get_cart("bob")] == [("Burger", 2)]
+    assert db.get_menu()[0].quantity == 3
+
+
+def test_failed_commit_does_not_leave_a_pooled_connection_in_a_transaction(tmp_path):
+    path = str(tmp_path / "rollback.db")
+    db = Database(path, pool_size=1, journal_mode="DELETE", busy_timeout_ms=50)
+    db.upsert_menu_item("Burger", 8.5, 5)
+    reader = sqlite3.connect(path, isolation_level=None)
+    reader.execute("BEGIN")
+    reader.execute("SELECT COUNT(*) FROM menu").fetchone()  # a shared lock blocks COMMIT in rollback-journal mode
+
+    with pytest.raises(sqlite3.OperationalError):
+        db.add_to_cart("bob", "Burger")
+    reader.execute("COMMIT")
+    reader.close()
+
+    with db.connection() as conn:
+        assert not conn.in_transaction
+    assert db.add_to_cart("bob", "Burger")
+    assert db.get_menu()[0].quantity == 4
+    db.close()
@@ -0,0 +1,33 @@
+import threading
+
+import pytest
+
+pytest.importorskip("PyQt5")
+
+from PyQt5 import sip  # noqa: E402
+from PyQt5.QtCore import QThreadPool  # noqa: E402
+from PyQt5.QtWidgets import QWidget  # noqa: E402
+
+from db_worker import QueryExecutor  # noqa: E402
+
+
+def test_task_finishing_after_its_owner_is_deleted(qapp):
+    owner = QWidget()
+    executor = QueryExecutor(owner)
+    started, release = threading.Event(), threading.Event()
+    results = []
+
+    def slow_query():
+        started.set()
+        release.wait(5)
+        return "done"
+
+    executor.submit("slow", slow_query, on_result=results.append)
+    assert started.wait(5)
+    sip.delete(owner)
+    assert sip.isdeleted(executor)
+    release.set()
+    QThreadPool.globalInstance().waitForDone()
+    qapp.processEvents()
+
+    assert results == []
@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+
+from checkout import CheckoutEngine, CheckoutError
+from session_cart import InventoryLedger, SessionCart
+
+
+class PausedCheckout(CheckoutEngine):
+    """Checkout engine that stops inside checkout until the test lets it continue."""
+
+    def __init__(self, db, fail=False):
+        super().__init__(db)
+        self.fail = fail
+        self.entered = threading.Event()
+        self.proceed = threading.Event()
+
+    def checkout(self, username):
+        self.entered.set()
+        assert self.proceed.wait(5)
+        if self.fail:
+            raise CheckoutError("Payment declined")
+        return super().checkout(username)
+
+
+@pytest.fixture
+def cart_with_burger(db, tmp_path):
+    db.upsert_menu_item("Burger", 8.5, 5)
+    db.upsert_menu_item("Cola", 2.5, 5)
+
+    def make(engine):
+        ledger = InventoryLedger(db)
+        cart = SessionCart("bob", db=db, ledger=ledger, engine=engine, journal_dir=str(tmp_path / "journal"))
+        assert cart.add("Burger", 8.5)
+        return cart, ledger
+    return make
+
+
+def run_checkout(cart):
+    outcome = {}
+
+    def target():
+        try:
+            outcome["result"] = cart.checkout()
+        except CheckoutError as e:
+            outcome["error"] = e
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread, outcome
+
+
+def test_line_added_during_checkout_stays_in_the_cart(db, cart_with_burger):
+    engine = PausedCheckout(db)
+    cart, ledger = cart_with_burger(engine)
+
+    thread, outcome = run_checkout(cart)
+    assert engine.entered.wait(5)
+    # The checkout is paused inside its database call; the cart must not be locked meanwhile
+    assert cart.add("Cola", 2.5)
+    assert not cart.remove("Burger")
+    engine.proceed.set()
+    thread.join(5)
+
+    receipt, shortfalls = outcome["result"]
+    assert receipt is not None and not shortfalls
+    assert [(sale.item_name, sale.quantity) for sale in db.get_sales()] == [("Burger", 1)]
+    assert cart.lines() == [("Cola", 2.5, 1)]
+    assert ledger.available("Cola") == 4
+
+    cart.flush()
+    assert [(line.item_name, line.quantity) for line in db.get_cart("bob")] == [("Cola", 1)]
+    assert ledger.available("Cola") == 4
+    assert {item.item_name: item.quantity for item in db.get_menu()} == {"Burger": 4, "Cola": 4}
+
+
+def test_failed_checkout_keeps_its_lines(db, cart_with_burger):
+    engine = PausedCheckout(db, fail=True)
+    cart, ledger = cart_with_burger(engine)
+
+    thread, outcome = run_checkout(cart)
+    assert engine.entered.wait(5)
+    assert cart.add("Burger", 8.5)
+    assert cart.add("Cola", 2.5)
+    engine.proceed.set()
+    thread.join(5)
+
+    assert isinstance(outcome["error"], CheckoutError)
+    assert cart.lines() == [("Burger", 8.5, 2), ("Cola", 2.5, 1)]
+
+    cart.flush()
+    assert [(line.item_name, line.quantity) for line in db.get_cart("bob")] == [("Burger", 2), ("Cola", 1)]
+    assert {item.item_name: item.quantity for item in db.get_menu()} == {"Burger": 3, "Cola": 4}
+    assert ledger.available("Burger") == 3